@@ -0,0 +1,16 @@
+# Mesh preprocessing.
+
+from spytran.utils.synthetic import slabMesh1D
+
+
+class Connectivity(object):
+    params = [100, 400, 1600]
+    param_names = ['nElements']
+    timeout = 600
+    number = 1
+
+    def setup(self, nElements):
+        self.mesh = slabMesh1D(nElements, 2)
+
+    def time_enable_connectivity(self, nElements):
+        self.mesh.enable_connectivity()
@@ -0,0 +1,17 @@
+# Angular tables.
+
+import numpy as np
+from spytran.utils.ordReader import createSphrHarm
+
+
+class SphericalHarmonics(object):
+    params = ([4, 8, 16], [4, 8, 16])
+    param_names = ['sN', 'lMax']
+
+    def setup(self, sN, lMax):
+        nOrd = sN * (sN + 2) // 2
+        rng = np.random.RandomState(0)
+        self.mu, self.omega = rng.uniform(-1, 1, nOrd), rng.uniform(0, 2 * np.pi, nOrd)
+
+    def time_createSphrHarm(self, sN, lMax):
+        createSphrHarm(self.mu, self.omega, lMax)
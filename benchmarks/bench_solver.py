@@ -0,0 +1,51 @@
+# Transport operator, RHS, scattering source, boundary conditions and
+# linear solves of the fe and dg super meshes.
+
+from common import scatteredSolver
+
+
+class SolverKernels1D(object):
+    params = (['fe', 'dg'], [200, 2000])
+    param_names = ['space', 'nElements']
+    timeout = 600
+
+    def setup(self, space, nElements):
+        self.slv = scatteredSolver(space, 1, nElements)
+        self.mesh = self.slv.superMesh
+
+    def time_buildSysMatrix(self, space, nElements):
+        self.mesh.buildSysMatrix(1)
+
+    def time_buildSysRHS(self, space, nElements):
+        self.mesh.buildSysRHS()
+
+    def time_scatter(self, space, nElements):
+        self.mesh.scatter(2, 1.0)
+
+    def time_applyBCs(self, space, nElements):
+        self.mesh.applyBCs(2)
+
+    def time_sweepFlux(self, space, nElements):
+        self.mesh.sweepFlux(1e-6)
+
+
+class SolverKernels2D(SolverKernels1D):
+    # the dg connectivity is 1D only
+    params = (['fe'], [11, 31])
+    param_names = ['space', 'nNodesPerSide']
+
+    def setup(self, space, nNodesPerSide):
+        self.slv = scatteredSolver(space, 2, nNodesPerSide)
+        self.mesh = self.slv.superMesh
+
+
+class ScatterSource(object):
+    params = ([4, 32], [1, 8])
+    param_names = ['nG', 'lOrder']
+    timeout = 600
+
+    def setup(self, nG, lOrder):
+        self.mesh = scatteredSolver('fe', 1, 200, nG=nG, lOrder=lOrder).superMesh
+
+    def time_scatter(self, nG, lOrder):
+        self.mesh.scatter(2, 1.0)
@@ -0,0 +1,54 @@
+# Cross section parsing and material mixing.
+
+import os
+import shutil
+import tempfile
+import numpy as np
+from spytran.utils.synthetic import writeXSFile
+from spytran.materials.readXS import readXS
+from spytran.materials.globalMatLib import MaterialLibrary
+from spytran.materials.materialMixxer import mixedMat
+from spytran.materials.macroCache import macroCache
+from spytran.materials.batchMix import BatchMixer
+
+
+class XSParse(object):
+    params = [10, 100, 300]
+    param_names = ['nG']
+
+    def setup(self, nG):
+        self.tmpDir = tempfile.mkdtemp()
+        self.xsFile = os.path.join(self.tmpDir, 'synth.xs')
+        writeXSFile(self.xsFile, nG)
+
+    def teardown(self, nG):
+        shutil.rmtree(self.tmpDir)
+
+    def time_readXS(self, nG):
+        readXS(self.xsFile)
+
+
+class XSMix(object):
+    params = [10, 100]
+    param_names = ['nG']
+
+    def setup(self, nG):
+        self.tmpDir = tempfile.mkdtemp()
+        self.lib = MaterialLibrary()
+        for i, fissile in enumerate([True, True, False, False]):
+            xsFile = os.path.join(self.tmpDir, 'iso%d.xs' % i)
+            writeXSFile(xsFile, nG, fissile=fissile)
+            self.lib['iso%d' % i] = dict(readXS(xsFile), M=1. + 10. * i, A=1. + 10. * i)
+        self.isotopes = sorted(self.lib)
+        self.nD = np.random.RandomState(0).rand(50, len(self.isotopes)) * 1e-2
+
+    def teardown(self, nG):
+        shutil.rmtree(self.tmpDir)
+
+    def time_mixedMat(self, nG):
+        # mixtures are cached by composition
+        macroCache.clear()
+        mixedMat(dict(zip(self.isotopes, self.nD[0])), matLib=self.lib)
+
+    def time_batchMix(self, nG):
+        BatchMixer(self.isotopes, matLib=self.lib).mix(self.nD)
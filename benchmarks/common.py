@@ -0,0 +1,40 @@
+# Synthetic problems shared by the benchmarks (no gmsh, no xs library).
+
+import numpy as np
+from spytran.utils.perf import Profiler
+from spytran.utils.ordReader import sharedD2quadSet
+from spytran.utils.synthetic import slabMesh1D, squareMesh2D, SynthMaterial
+
+
+def buildSolver(space, dim, size, nG=4, sN=4, lOrder=3):
+    """
+    SnFeSlv / SnDgSlv on a two region synthetic mesh: size elements (1D)
+    or size x size nodes (2D), fixed source in the first region.  The
+    profiler is disabled so only the kernels are timed.
+    """
+    if dim == 1:
+        mesh, nOrd = slabMesh1D(size, 2), sN
+        bcDict = {'left': 'vac', 'right': 'ref'}
+    else:
+        mesh, nOrd = squareMesh2D(size, 2), sharedD2quadSet(sN, lOrder).sNords
+        bcDict = {'left': 'vac', 'right': 'vac', 'bottom': 'ref', 'top': 'ref'}
+    materials = {'mat_1': SynthMaterial(nG, lOrder), 'mat_2': SynthMaterial(nG, lOrder)}
+    srcDict = {'mat_1': np.ones((nG, nOrd)), 'mat_2': None}
+    if space == 'fe':
+        from spytran.fe.solver import SnFeSlv as Solver
+    else:
+        from spytran.dg.dg_solver import SnDgSlv as Solver
+    return Solver(None, materials, bcDict, srcDict, nG, lOrder, sN, dim,
+                  mesh=mesh, perf=Profiler(enabled=False))
+
+
+def scatteredSolver(*args, **kwargs):
+    """
+    buildSolver after two source iterations: nonzero element fluxes and
+    the csc operators of depth >= 1.
+    """
+    slv = buildSolver(*args, **kwargs)
+    for i in range(2):
+        slv.solveFlux()
+        slv.scatterSource()
+    return slv
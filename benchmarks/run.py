@@ -0,0 +1,175 @@
+#!/usr/bin/python
+#
+# Minimal runner for the asv style benchmarks in this directory, for
+# machines without asv (asv run / asv compare work on the same files, see
+# asv.conf.json).
+#
+# exec (from the repository root):
+#   python benchmarks/run.py                   # all, results/<commit>.json
+#   python benchmarks/run.py -b Connectivity   # regex on benchmark names
+#   python benchmarks/run.py --compare <commit> [--factor 1.2]
+#
+# Every time_* method of every class (or module level function) in the
+# bench_*.py modules is timed for each combination of its params, best of
+# --repeat runs of `number` calls (auto-tuned to ~0.1 s when the class does
+# not set it).  Results of each commit go to results/<commit>.json;
+# --compare prints the ratios to an earlier commit's results and exits 1 on
+# a slowdown above --factor.
+
+from __future__ import print_function
+import os
+import re
+import sys
+import json
+import time
+import glob
+import platform
+import argparse
+import itertools
+import subprocess
+
+benchDir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(benchDir))
+
+
+def gitCommit():
+    """
+    (commit hash, True if the working tree has local changes)
+    """
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=benchDir).strip()
+        dirty = bool(subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                             cwd=benchDir).strip())
+        return commit.decode(), dirty
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', True
+
+
+def discover(pattern=None):
+    """
+    [(name, owner class or None, function name)] of the time_* benchmarks.
+    """
+    import importlib
+    found = []
+    for path in sorted(glob.glob(os.path.join(benchDir, 'bench_*.py'))):
+        modName = os.path.splitext(os.path.basename(path))[0]
+        module = importlib.import_module('benchmarks.' + modName)
+        for attr in sorted(dir(module)):
+            obj = getattr(module, attr)
+            if isinstance(obj, type) and obj.__module__ == module.__name__:
+                found += [(modName + '.' + attr + '.' + meth, obj, meth)
+                          for meth in sorted(dir(obj)) if meth.startswith('time_')]
+            elif attr.startswith('time_') and callable(obj):
+                found.append((modName + '.' + attr, module, attr))
+    return [b for b in found if pattern is None or re.search(pattern, b[0])]
+
+
+def paramSets(owner):
+    params = getattr(owner, 'params', [])
+    names = getattr(owner, 'param_names', [])
+    if not params:
+        return [()]
+    if len(names) > 1:
+        return list(itertools.product(*params))
+    return [(p, ) for p in params]
+
+
+def timeOne(owner, meth, params, repeat):
+    """
+    Best time [s] per call of owner.meth(*params).
+    """
+    if isinstance(owner, type):
+        bench = owner()
+        func = getattr(bench, meth)
+    else:
+        bench, func = owner, getattr(owner, meth)
+    if hasattr(bench, 'setup'):
+        try:
+            bench.setup(*params)
+        except NotImplementedError:
+            return None
+    try:
+        number = getattr(bench, 'number', 0)
+        if not number:
+            tStart = time.time()
+            func(*params)
+            number = max(1, min(1000, int(0.1 / max(time.time() - tStart, 1e-6))))
+        best = float('inf')
+        for i in range(repeat):
+            tStart = time.time()
+            for j in range(number):
+                func(*params)
+            best = min(best, (time.time() - tStart) / number)
+        return best
+    finally:
+        if hasattr(bench, 'teardown'):
+            bench.teardown(*params)
+
+
+def compare(results, refFile, factor):
+    with open(refFile) as infile:
+        ref = json.load(infile)['results']
+    slower = 0
+    print("{0: <64} {1: >11} {2: >11} {3: >7}".format("benchmark", "before [s]", "after [s]", "ratio"))
+    for name, entry in sorted(results.items()):
+        if name not in ref:
+            continue
+        for params, after, before in zip(entry['params'], entry['times'], ref[name]['times']):
+            if after is None or before is None:
+                continue
+            ratio = after / before
+            mark = ''
+            if ratio > factor:
+                mark, slower = ' SLOWER', slower + 1
+            elif ratio < 1. / factor:
+                mark = ' faster'
+            label = name + ('' if not params else str(tuple(params)))
+            print("{0: <64} {1: >11.3e} {2: >11.3e} {3: >7.2f}{4}".format(label, before, after, ratio, mark))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the spytran benchmarks")
+    parser.add_argument('-b', '--bench', default=None, help="regex selecting benchmarks by name")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--results', default=os.path.join(benchDir, 'results'))
+    parser.add_argument('--compare', default=None, help="commit (prefix) of earlier results")
+    parser.add_argument('--factor', type=float, default=1.2, help="slowdown reported as a regression")
+    args = parser.parse_args(argv)
+    commit, dirty = gitCommit()
+    results = {}
+    for name, owner, meth in discover(args.bench):
+        entry = results[name] = {'param_names': list(getattr(owner, 'param_names', [])),
+                                 'params': [], 'times': []}
+        for params in paramSets(owner):
+            t = timeOne(owner, meth, params, args.repeat)
+            entry['params'].append(list(params))
+            entry['times'].append(t)
+            print("{0: <64} {1: >11}".format(name + ('' if not params else str(params)),
+                                             'n/a' if t is None else '%.3e' % t))
+    import numpy
+    import scipy
+    out = {'commit': commit, 'dirty': dirty, 'date': time.time(), 'machine': platform.node(),
+           'python': platform.python_version(), 'numpy': numpy.__version__, 'scipy': scipy.__version__,
+           'results': results}
+    if not os.path.isdir(args.results):
+        os.makedirs(args.results)
+    fname = os.path.join(args.results, commit + ('-dirty' if dirty else '') + '.json')
+    if args.bench is not None and os.path.exists(fname):
+        # partial run, keep the other benchmarks of this commit
+        with open(fname) as infile:
+            out['results'] = dict(json.load(infile)['results'], **results)
+    with open(fname, 'w') as outfile:
+        json.dump(out, outfile, indent=1, sort_keys=True)
+    print("Results written to " + fname)
+    if args.compare:
+        refs = [f for f in glob.glob(os.path.join(args.results, args.compare + '*.json'))
+                if os.path.abspath(f) != os.path.abspath(fname)]
+        if not refs:
+            sys.exit("FATALITY: No results for commit " + args.compare)
+        return 1 if compare(results, refs[0], args.factor) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
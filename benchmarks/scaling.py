@@ -0,0 +1,69 @@
+#!/usr/bin/python
+#
+# End to end scaling studies (spytran/utils/scaling.py) from the command line.
+#
+# exec (from the repository root):
+#   python benchmarks/scaling.py size 100 200 400 800
+#   python benchmarks/scaling.py sN 2 4 8 16 --space fe dg --set size=200 nG=4
+#   python benchmarks/scaling.py size 200 400 800 --space fe --renumber none rcm hilbert
+#   python benchmarks/scaling.py nG 2 4 8 --mode k --json nG.json
+#
+# The variants are all combinations of the --space, --renumber and
+# --quadKind choices.  Prints the runs and the fitted exponents per phase
+# and variant; --json also writes the records and fits.
+
+from __future__ import print_function
+import os
+import sys
+import argparse
+import itertools
+
+benchDir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(benchDir))
+
+
+def _value(text):
+    if text.lower() == 'none':
+        return None
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    return text
+
+
+def main(argv=None):
+    from spytran.utils.scaling import scalingStudy, scaleOf
+    parser = argparse.ArgumentParser(description="Scaling study of complete spytran solves")
+    parser.add_argument('param', choices=sorted(scaleOf), help="parameter to refine")
+    parser.add_argument('values', nargs='+', type=int)
+    parser.add_argument('--space', nargs='+', default=['fe', 'dg'])
+    parser.add_argument('--renumber', nargs='+', default=['none'])
+    parser.add_argument('--quadKind', nargs='+', default=['levelSym'])
+    parser.add_argument('--mode', default='fixed', choices=['fixed', 'k'])
+    parser.add_argument('--set', nargs='*', default=[], metavar='KEY=VALUE',
+                        help="other case parameters, e.g. dim=2 nG=8")
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--inprocess', action='store_true', help="no fresh interpreter per run")
+    parser.add_argument('--json', default=None)
+    args = parser.parse_args(argv)
+    base = dict((key, _value(value)) for key, value in (item.split('=', 1) for item in args.set))
+    base['mode'] = args.mode
+    variants = []
+    for space, renumber, quadKind in itertools.product(args.space, args.renumber, args.quadKind):
+        variant = {'space': space}
+        if len(args.renumber) > 1 or _value(renumber) is not None:
+            variant['renumber'] = _value(renumber)
+        if len(args.quadKind) > 1:
+            variant['quadKind'] = quadKind
+        variants.append(variant)
+    study = scalingStudy(args.param, args.values, variants, isolate=not args.inprocess,
+                         repeat=args.repeat, **base)
+    if args.json:
+        study.writeJSON(args.json)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
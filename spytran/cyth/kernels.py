@@ -0,0 +1,20 @@
+# Mesh level 1D Sn kernels.
+#
+# Uses the compiled scattSrc extension when it has been built
+# (see setup.py), otherwise the pure python scattSource module.
+# Both give identical results.  The step characteristic and linear
+# discontinuous sweeps are only available in python.
+#
+# Set SPYTRAN_PURE_PYTHON=1 to force the python kernels.
+
+import os
+
+try:
+    if os.environ.get('SPYTRAN_PURE_PYTHON', '0') not in ('', '0'):
+        raise ImportError
+    from scattSrc import scalarFlux, scatterSource, fissionSource, sweepDD
+    compiled = True
+except ImportError:
+    from scattSource import scalarFlux, scatterSource, fissionSource, sweepDD
+    compiled = False
+from scattSource import sweepSC, sweepLD
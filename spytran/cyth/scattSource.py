@@ -1,5 +1,4 @@
 import numpy as np
-from copy import deepcopy
 
 
 def evalScatterSourceImp(cell, g, skernel, weights, lw):
@@ -80,17 +79,195 @@ def sweepOrd(cell, skernel, chiNuFission, keff=1.0, depth=0, overRlx=1.0):
         if depth >= 2:
             for g in range(cell.nG):
                 cell.qin[g, 0, :] = overRlx * (evalScatterSourceImp(cell, g, skernel, weights, lw) - cell.previousQin[g, 0, :]) + cell.previousQin[g, 0, :]
-            cell.previousQin = cell.qin
+            cell.previousQin[...] = cell.qin
         else:
             for g in range(cell.nG):
                 cell.qin[g, 0, :] = evalScatterSourceImp(cell, g, skernel, weights, lw)
-            cell.previousQin = cell.qin
+            cell.previousQin[...] = cell.qin
     elif cell.multiplying and depth == 0:
         for g in range(cell.nG):
             # compute gth group fission source
             cell.qin[g, 0, :] = cell._computeFissionSource(g, chiNuFission, keff)
         cell.resetTotOrdFlux()
     elif not cell.multiplying and depth == 0:
-        cell.qin = deepcopy(cell.S)
+        cell.qin[...] = cell.S
         cell.resetTotOrdFlux()
     return cell.qin
+
+
+# ============================================================================ #
+# Mesh level kernels.
+# Operate on every cell of a 1D mesh at once.  Angular flux arrays are laid
+# out as (nCells, nGroups, nOrdinates).  Reductions are carried out one term
+# at a time so that the compiled kernels in scattSrc.pyx, which loop in the
+# same order, reproduce these results exactly.
+# ============================================================================ #
+def scalarFlux(psi, wN):
+    """
+    Angle integrated flux, 1/2 * sum_n(w_n * psi_n), in every cell.
+
+    parameter : psi
+        type : ndarray (nCells, nG, nOrd)
+    parameter : wN
+        type : ndarray (nOrd)
+    returns : ndarray (nCells, nG)
+    """
+    phi = np.zeros(psi.shape[:2])
+    for o in range(psi.shape[2]):
+        phi += wN[o] * psi[:, :, o]
+    return 0.5 * phi
+
+
+def scatterSource(psi, skernel, wLeg, legArray, band=None):
+    """
+    Scattering source in every cell:
+        q_g(mu) = sum_l((2l+1) * P_l(mu) * sum_g'(sigma_l,g<-g' * flux_l,g'))
+
+    parameter : psi
+        type : ndarray (nCells, nG, nOrd).  Cell centered angular flux.
+    parameter : skernel
+        type : ndarray (nLeg, nG, nG).  Scattering kernel.  Only the first
+        nLeg legendre moments are evaluated.
+    parameter : wLeg
+        type : ndarray (>= nLeg, nOrd).  wN * legArray
+    parameter : legArray
+        type : ndarray (>= nLeg, nOrd).  P_l(mu_n)
+    parameter : band
+        type : (rowLo, rowHi, colLo, colHi) int arrays, optional.  Nonzero
+        source group range of each destination group and vice versa, see
+        materials/scatterKernel.py.  Transfers outside of it are skipped.
+    returns : ndarray (nCells, nG, nOrd)
+    """
+    nCells, nG, nOrd = psi.shape
+    nLeg = skernel.shape[0]
+    # legendre moments of the flux, (nCells, nLeg, nG)
+    legFlux = np.zeros((nCells, nLeg, nG))
+    for o in range(nOrd):
+        legFlux += wLeg[:nLeg, o][None, :, None] * psi[:, None, :, o]
+    legFlux *= 0.5
+    # in-scatter rate into each group, (nCells, nLeg, nG)
+    inScatter = np.zeros((nCells, nLeg, nG))
+    for gp in range(nG):
+        lo, hi = (0, nG) if band is None else (band[2][gp], band[3][gp])
+        if hi > lo:
+            inScatter[:, :, lo:hi] += skernel[None, :, lo:hi, gp] * legFlux[:, :, gp][:, :, None]
+    inScatter *= (2. * np.arange(nLeg) + 1.)[None, :, None]
+    q = np.zeros((nCells, nG, nOrd))
+    for l in range(nLeg):
+        q += inScatter[:, l, :, None] * legArray[l][None, None, :]
+    return q
+
+
+def fissionSource(phi, chiNuFission, coeff):
+    """
+    Isotropic fission source in every cell:
+        q_g = coeff * sum_g'(chiNuFission[g, g'] * flux_g)
+
+    parameter : phi
+        type : ndarray (nCells, nG).  Total scalar flux.
+    parameter : chiNuFission
+        type : ndarray (nG, nG)
+    parameter : coeff
+        type : float.  1 / keff normalization.
+    returns : ndarray (nCells, nG)
+    """
+    q = np.zeros(phi.shape)
+    for gp in range(phi.shape[1]):
+        q += chiNuFission[:, gp][None, :] * phi
+    return coeff * q
+
+
+def sweepDD(ordFlux, qin, cellOrder, o0, o1, f, faceIn, dx, twoMu, denom):
+    """
+    Diamond difference sweep through a contiguous run of cells for the
+    ordinates [o0, o1) which all travel in the same direction.
+
+    parameter : ordFlux
+        type : ndarray (nCells, nG, 3, nOrd).  Updated in place.
+    parameter : qin
+        type : ndarray (nCells, nG, 3, nOrd).  Cell source.
+    parameter : cellOrder
+        type : int ndarray.  Cell indices in sweep order.
+    parameter : f
+        type : int.  Incomming face (1 left, 2 right)
+    parameter : faceIn
+        type : ndarray (nG, o1 - o0).  Angular flux entering the first cell.
+    parameter : twoMu
+        type : ndarray (o1 - o0).  2 * |mu|
+    parameter : denom
+        type : ndarray (nG, o1 - o0).  1 + sigma_t * dx / (2 * |mu|)
+    returns : ndarray (nG, o1 - o0).  Angular flux leaving the last cell.
+    """
+    fOut = 3 - f
+    for c in cellOrder:
+        cellFlux = ordFlux[c]
+        cellFlux[:, f, o0:o1] = faceIn
+        psi = (faceIn + dx * qin[c, :, 0, o0:o1] / twoMu) / denom
+        cellFlux[:, 0, o0:o1] = psi
+        faceIn = 2. * psi - faceIn
+        cellFlux[:, fOut, o0:o1] = faceIn
+    return faceIn
+
+
+def sweepSC(ordFlux, qin, cellOrder, o0, o1, f, faceIn, expTau, tau, invSigt):
+    """
+    Step characteristic sweep through a run of cells.  The source is flat
+    in each cell and the angular flux is attenuated exactly along each
+    characteristic, so cell edge and average fluxes stay positive for any
+    cell width.  Requires sigma_t > 0.
+
+    parameter : expTau
+        type : ndarray (nG, o1 - o0).  exp(-sigma_t * dx / |mu|)
+    parameter : tau
+        type : ndarray (nG, o1 - o0).  sigma_t * dx / |mu|
+    parameter : invSigt
+        type : ndarray (nG, 1).  1 / sigma_t
+    returns : ndarray (nG, o1 - o0).  Angular flux leaving the last cell.
+    """
+    fOut = 3 - f
+    oneMinusExp = 1. - expTau
+    for c in cellOrder:
+        cellFlux = ordFlux[c]
+        cellFlux[:, f, o0:o1] = faceIn
+        qOverSigt = qin[c, :, 0, o0:o1] * invSigt
+        faceOut = faceIn * expTau + qOverSigt * oneMinusExp
+        cellFlux[:, 0, o0:o1] = qOverSigt + (faceIn - faceOut) / tau
+        cellFlux[:, fOut, o0:o1] = faceOut
+        faceIn = faceOut
+    return faceIn
+
+
+def sweepLD(ordFlux, ordFluxSlope, qin, qinSlope, cellOrder, o0, o1, f, faceIn, a, sigt, det, sgn):
+    """
+    Linear discontinuous sweep through a run of cells.  Solves the zeroth
+    and first spatial moment equations of each cell,
+        a * (psi_out - psi_in) + sigma_t * psi_A = q_A
+        3a * (psi_out + psi_in - 2 * psi_A) + sigma_t * psi_X = q_X
+    with the outgoing edge flux psi_out = psi_A + psi_X and a = |mu| / dx.
+    Slopes are stored along +x, sgn flips them into the sweep direction.
+
+    parameter : ordFluxSlope, qinSlope
+        type : ndarray (nCells, nG, nOrd).  Flux and source slope moments.
+    parameter : a
+        type : ndarray (o1 - o0).  |mu| / dx
+    parameter : sigt
+        type : ndarray (nG, 1)
+    parameter : det
+        type : ndarray (nG, o1 - o0).  (a + sigt) * (3a + sigt) + 3a^2
+    parameter : sgn
+        type : float.  1.0 when sweeping along +x, -1.0 otherwise
+    returns : ndarray (nG, o1 - o0).  Angular flux leaving the last cell.
+    """
+    fOut = 3 - f
+    for c in cellOrder:
+        cellFlux = ordFlux[c]
+        cellFlux[:, f, o0:o1] = faceIn
+        rA = qin[c, :, 0, o0:o1] + a * faceIn
+        rX = sgn * qinSlope[c, :, o0:o1] - 3. * a * faceIn
+        psiA = (rA * (3. * a + sigt) - a * rX) / det
+        psiX = ((a + sigt) * rX + 3. * a * rA) / det
+        cellFlux[:, 0, o0:o1] = psiA
+        ordFluxSlope[c, :, o0:o1] = sgn * psiX
+        faceIn = psiA + psiX
+        cellFlux[:, fOut, o0:o1] = faceIn
+    return faceIn
@@ -3,94 +3,126 @@
 # Use as traditional python module after setup.py is run.
 # ex:
 #   import scattSrc as scs
+#
+# Compiled versions of the mesh level kernels in scattSource.py.
+# Every loop accumulates in the same order as its numpy counterpart and
+# setup.py disables floating point contraction, so results are bit for bit
+# identical to the pure python path.  Do not reorder the sums.
+#
+# Inputs are const memoryviews so read only arrays (cached macro xs) are accepted.
+#
+# cython: language_level=2, boundscheck=False, wraparound=False, cdivision=True
 
 import numpy as np
 cimport numpy as np
-import scipy.special as spc
+cimport cython
 
 
-def evalScatterSource(cell, int g, np.ndarray skernel):
+def scalarFlux(const double[:, :, :] psi, const double[:] wN):
     """
-    computes within group scattering sources:
-        sigma_s(x, Omega.Omega')*flux_n(r, omega)
-        where n is the group
-    returns vector of scattered ordinate fluxes
-
-    parameter : cell
-        type : Cell1DSn object
-    parameter : g
-        type : int
-        description : neutron group number
-    parameter : skernel
-        type : ndarray
-        notes : neutron scattering kernel matrix
+    Angle integrated flux, 1/2 * sum_n(w_n * psi_n), in every cell.
+    psi is (nCells, nG, nOrd), returns (nCells, nG)
     """
-    cdef int l
-    cdef np.ndarray[np.float64_t, ndim=2] weights = np.array([np.zeros(cell.maxLegOrder + 1)])
-    def ggprimeInScatter(g, l):
-        """
-        Computes in-scattring into grp g reaction rate.
-        """
-        return np.sum(skernel[l, g, :] * evalVecLegFlux(cell, l))
-    #
-    for l in range(cell.maxLegOrder + 1):
-        weights[0][l] = (2 * l + 1) * ggprimeInScatter(g, l)
-    #return np.polynomial.legendre.legval(cell.sNmu, weights)
-    return np.sum(weights.T * cell.legArray, axis=0)
+    cdef Py_ssize_t nC = psi.shape[0], nG = psi.shape[1], nO = psi.shape[2]
+    cdef Py_ssize_t c, g, o
+    cdef np.ndarray[np.float64_t, ndim=2] phiArr = np.zeros((nC, nG))
+    cdef double[:, :] phi = phiArr
+    for c in range(nC):
+        for g in range(nG):
+            for o in range(nO):
+                phi[c, g] = phi[c, g] + wN[o] * psi[c, g, o]
+            phi[c, g] = 0.5 * phi[c, g]
+    return phiArr
 
 
-cdef evalVecLegFlux(cell, int l):
+def scatterSource(const double[:, :, :] psi, const double[:, :, :] skernel,
+                  const double[:, :] wLeg, const double[:, :] legArray, band=None):
     """
-    Vectorized version of legendre moment of flux routine (must faster)
+    Scattering source in every cell:
+        q_g(mu) = sum_l((2l+1) * P_l(mu) * sum_g'(sigma_l,g<-g' * flux_l,g'))
+    psi is (nCells, nG, nOrd), skernel is (nLeg, nG, nG).  Returns (nCells, nG, nOrd)
+    band limits g' to [rowLo[g], rowHi[g]), see scattSource.py
     """
-    cdef np.ndarray legsum
-    #legsum = np.sum(spc.eval_legendre(l, cell.sNmu) *
-    #                cell.wN * (cell.ordFlux[:, 0, :]), axis=1)
-    legsum = np.sum(cell.legArray[l, :] *
-                    cell.wN * (cell.ordFlux[:, 0, :]), axis=1)
-    return 0.5 * legsum
+    cdef Py_ssize_t nC = psi.shape[0], nG = psi.shape[1], nO = psi.shape[2]
+    cdef Py_ssize_t nLeg = skernel.shape[0]
+    cdef Py_ssize_t c, g, gp, l, o
+    cdef double acc
+    cdef np.ndarray[np.int64_t, ndim=1] rowLo, rowHi
+    if band is None:
+        rowLo, rowHi = np.zeros(nG, dtype=np.int64), np.full(nG, nG, dtype=np.int64)
+    else:
+        rowLo = np.asarray(band[0], dtype=np.int64)
+        rowHi = np.asarray(band[1], dtype=np.int64)
+    cdef np.ndarray[np.float64_t, ndim=3] qArr = np.zeros((nC, nG, nO))
+    cdef double[:, :, :] q = qArr
+    cdef double[:, :] legFlux = np.zeros((nLeg, nG))
+    cdef double[:, :] inScatter = np.zeros((nLeg, nG))
+    for c in range(nC):
+        # legendre moments of the flux
+        for l in range(nLeg):
+            for gp in range(nG):
+                acc = 0.
+                for o in range(nO):
+                    acc = acc + wLeg[l, o] * psi[c, gp, o]
+                legFlux[l, gp] = acc * 0.5
+        # in-scatter rate into each group
+        for l in range(nLeg):
+            for g in range(nG):
+                acc = 0.
+                for gp in range(rowLo[g], rowHi[g]):
+                    acc = acc + skernel[l, g, gp] * legFlux[l, gp]
+                inScatter[l, g] = acc * (2. * l + 1.)
+        for g in range(nG):
+            for o in range(nO):
+                acc = 0.
+                for l in range(nLeg):
+                    acc = acc + inScatter[l, g] * legArray[l, o]
+                q[c, g, o] = acc
+    return qArr
 
 
-def sweepOrd(cell, skernel, chiNuFission, keff=1.0, depth=0, overRlx=1.0):
+def fissionSource(const double[:, :] phi, const double[:, :] chiNuFission, double coeff):
     """
-    Use the scattering source iteration to sweep through sN discrete balance
-    equations, one for each sN ordinate direction.
-    Perform scattering source iteration
-
-    Scattering source iteration:
-    m = 0:
-        [Omega'.grad + sigma_t] * qflux^(m)_g = fixed_source + fission_src
-    when m>0:
-        [Omega'.grad + sigma_t] * qflux^(m)_g =
-        sum(o, sigma_s(r, g->g', Omega.Omega')_g * qflux^(m-1)_o)
-    m is the scattering souce iteration index
-    o is the direction ordinate
-    g is the group index
+    Isotropic fission source in every cell:
+        q_g = coeff * sum_g'(chiNuFission[g, g'] * flux_g)
+    phi is (nCells, nG), returns (nCells, nG)
+    """
+    cdef Py_ssize_t nC = phi.shape[0], nG = phi.shape[1]
+    cdef Py_ssize_t c, g, gp
+    cdef double acc
+    cdef np.ndarray[np.float64_t, ndim=2] qArr = np.zeros((nC, nG))
+    cdef double[:, :] q = qArr
+    for c in range(nC):
+        for g in range(nG):
+            acc = 0.
+            for gp in range(nG):
+                acc = acc + chiNuFission[g, gp] * phi[c, g]
+            q[c, g] = coeff * acc
+    return qArr
 
-    As m-> inf.  fewer and fewer neutrons will be around to contribute to the
-    mth scattering source.  qflux^(m) should tend to 0 at large m.
 
-    :Parameters:
-        - :param arg1: descrition
-        - :type arg1: type
-        - :return: return desctipt
-        - :rtype: return type
+def sweepDD(double[:, :, :, :] ordFlux, const double[:, :, :, :] qin, cellOrder,
+            Py_ssize_t o0, Py_ssize_t o1, Py_ssize_t f, faceIn, double dx,
+            const double[:] twoMu, const double[:, :] denom):
+    """
+    Diamond difference sweep through a run of cells for the ordinates
+    [o0, o1) which all travel in the same direction.  ordFlux is updated
+    in place.  Returns the angular flux leaving the last cell, (nG, o1 - o0).
     """
-    if depth >= 1:
-        if depth >= 2:
-            for g in range(cell.nG):
-                cell.qin[g, 0, :] = overRlx * (evalScatterSource(cell, g, skernel) - cell.previousQin[g, 0, :]) + cell.previousQin[g, 0, :]
-            cell.previousQin = cell.qin
-        else:
-            for g in range(cell.nG):
-                cell.qin[g, 0, :] = evalScatterSource(cell, g, skernel)
-            cell.previousQin = cell.qin
-    elif cell.multiplying and depth == 0:
-        for g in range(cell.nG):
-            # compute gth group fission source
-            cell.qin[g, 0, :] = cell._computeFissionSource(g, chiNuFission, keff)
-        cell.resetTotOrdFlux()
-    elif not cell.multiplying and depth == 0:
-        cell.qin = cell.S
-        cell.resetTotOrdFlux()
-    return cell.qin
+    cdef Py_ssize_t nG = ordFlux.shape[1], nO = o1 - o0
+    cdef Py_ssize_t fOut = 3 - f
+    cdef Py_ssize_t i, c, g, o
+    cdef double psi
+    cdef np.ndarray[np.int64_t, ndim=1] cells = np.asarray(cellOrder, dtype=np.int64)
+    cdef np.ndarray[np.float64_t, ndim=2] faceArr = np.array(faceIn, dtype=np.float64)
+    cdef double[:, :] face = faceArr
+    for i in range(cells.shape[0]):
+        c = cells[i]
+        for g in range(nG):
+            for o in range(nO):
+                ordFlux[c, g, f, o0 + o] = face[g, o]
+                psi = (face[g, o] + dx * qin[c, g, 0, o0 + o] / twoMu[o]) / denom[g, o]
+                ordFlux[c, g, 0, o0 + o] = psi
+                face[g, o] = 2. * psi - face[g, o]
+                ordFlux[c, g, fOut, o0 + o] = face[g, o]
+    return faceArr
@@ -1,11 +1,18 @@
 # Execute with:
 # python2 setup.py build_ext --inplace
+#
+# Builds the optional compiled sweep kernels (scattSrc).  When the extension
+# is not built, kernels.py falls back to the pure python scattSource module.
 
 from distutils.core import setup
 from Cython.Build import cythonize
 from distutils.extension import Extension
+import numpy as np
 
-extensions = [Extension("scattSrc", ["scattSrc.pyx"])]
+# -ffp-contract=off: no fused multiply-adds, keeps results identical to numpy
+extensions = [Extension("scattSrc", ["scattSrc.pyx"],
+                        include_dirs=[np.get_include()],
+                        extra_compile_args=["-O2", "-ffp-contract=off"])]
 
 setup(
     name="1D Sn",
@@ -1,8 +1,6 @@
 import numpy as np
 import scattSource as scs
-from copy import deepcopy
 # import scattSrc as scs
-import scipy.special as spc
 import sys
 from utils.ordReader import gaussLegQuadSet
 np.set_printoptions(linewidth=200)  # set print to screen opts
@@ -37,7 +35,17 @@ class Cell1DSn(object):
                 }
 
     def __init__(self, xpos, deltaX, nGroups=10, legOrder=8, sNords=2, **kwargs):
-        quadSet = gaussLegQuadSet(sNords)
+        """
+        Optional kwargs:
+            quadSet, legArray: precomputed quadrature and legendre tables,
+                may be shared between all cells of a mesh.
+            storage: (ordFlux, totOrdFlux, qin) tuple of (nGroups, 3, sNords)
+                arrays.  When given the cell operates on these arrays
+                (typically views into mesh wide arrays) instead of its own.
+        """
+        quadSet = kwargs.pop('quadSet', None)
+        if quadSet is None:
+            quadSet = gaussLegQuadSet(sNords)
         self.faceNormals = np.array([-1, 1])
         self.centroid = xpos
         self.deltaX = deltaX
@@ -46,17 +54,23 @@ class Cell1DSn(object):
         self.maxLegOrder = legOrder                             # remember to range(maxLegORder + 1)
         self.legweights = np.zeros(legOrder + 1)
         self.nG = nGroups                                       # number of energy groups
-        self.legArray = self._createLegArray(self.maxLegOrder)  # Stores leg polys
-        #
-        # initial flux guess
-        iguess = kwargs.pop('iFlux', np.ones((nGroups, 3, self.sNords)))
+        self.legArray = kwargs.pop('legArray', None)            # Stores leg polys
+        if self.legArray is None:
+            self.legArray = self._createLegArray(self.maxLegOrder)
         #
-        # Ord flux vector: 0 is cell centered, 1 is left, 2 is right face
-        self.ordFlux = iguess
-        self.totOrdFlux = iguess
-        #
-        # Scattering Source term(s)
-        self.qin = np.zeros((nGroups, 3, self.sNords))  # init scatter/fission source
+        storage = kwargs.pop('storage', None)
+        if storage is None:
+            # initial flux guess
+            iguess = kwargs.pop('iFlux', np.ones((nGroups, 3, self.sNords)))
+            #
+            # Ord flux vector: 0 is cell centered, 1 is left, 2 is right face
+            self.ordFlux = iguess
+            self.totOrdFlux = np.array(iguess)
+            #
+            # Scattering Source term(s)
+            self.qin = np.zeros((nGroups, 3, self.sNords))  # init scatter/fission source
+        else:
+            self.ordFlux, self.totOrdFlux, self.qin = storage
         #self.qin[0, 0, :] = 5e10
         self.previousQin = np.ones((nGroups, 3, self.sNords))  # init scatter/fission source
         #
@@ -98,10 +112,10 @@ class Cell1DSn(object):
             return False
 
     def resetTotOrdFlux(self):
-        self.totOrdFlux = np.zeros((self.nG, 3, self.sNords))
+        self.totOrdFlux[...] = 0.
 
     def resetOrdFlux(self):
-        self.ordFlux = np.zeros((self.nG, 3, self.sNords))
+        self.ordFlux[...] = 0.
 
     def sweepOrd(self, skernel, chiNuFission, keff=1.0, depth=0, overRlx=1.0):
         """
@@ -133,18 +147,18 @@ class Cell1DSn(object):
                 for g in range(self.nG):
                     self.qin[g, 0, :] = overRlx * (scs.evalScatterSource(self, g, skernel) -
                                                    self.previousQin[g, 0, :]) + self.previousQin[g, 0, :]
-                self.previousQin = self.qin
+                self.previousQin[...] = self.qin
             else:
                 for g in range(self.nG):
                     self.qin[g, 0, :] = scs.evalScatterSource(self, g, skernel)
-                self.previousQin = self.qin
+                self.previousQin[...] = self.qin
         elif self.multiplying and depth == 0:
             for g in range(self.nG):
                 # compute gth group fission source
                 self.qin[g, 0, :] = self._computeFissionSource(g, chiNuFission, keff)
             self.resetTotOrdFlux()
         elif not self.multiplying and depth == 0:
-            self.qin = deepcopy(self.S)
+            self.qin[...] = self.S
             self.resetTotOrdFlux()
         return self.qin
 
@@ -242,11 +256,13 @@ class Cell1DSn(object):
         where l is the legendre order
         and n is the ordinate iterate
         """
+        import scipy.special as spc
         legsum = np.sum(spc.eval_legendre(l, self.sNmu) *
                         self.wN * (self.ordFlux[:, pos, :]), axis=1)
         return 0.5 * legsum
 
     def _createLegArray(self, lMax):
+        import scipy.special as spc
         legArray = np.zeros((lMax + 1, len(self.sNmu)))
         for l in range(lMax + 1):
             legArray[l, :] = spc.eval_legendre(l, self.sNmu)
@@ -215,8 +215,9 @@ class d2InteriorElement(object):
             :return: return notes
             :rtype: return type
         """
-        weights = np.array([np.zeros((self.maxLegOrder + 1, self.maxLegOrder + 1))])
-        lw = np.arange(self.maxLegOrder + 1)
+        # skernel is truncated to the material's effective legendre order
+        weights = np.array([np.zeros((skernel.shape[0], skernel.shape[0]))])
+        lw = np.arange(skernel.shape[0])
         if depth >= 1:
             for g in range(self.nG):
                 self.qin[g, :] = self.evalScatterSourceImp(g, skernel, weights, lw)
@@ -236,10 +237,12 @@ class d2InteriorElement(object):
         operations with 0 _python_ for loops.  all in numpy!
         """
         # Ylm[m, l, ord]
-        fluxM = 0.25 * np.dot(self.wN * self.quadSet.Ylm[:, :, :], self.centScFlux[:, :].T)
+        # Ylm[m > l] = 0, dropping moments above the kernel order is exact
+        Ylm = self.quadSet.Ylm[:len(lw), :len(lw)]
+        fluxM = 0.25 * np.dot(self.wN * Ylm, self.centScFlux[:, :].T)
         ggprimeInScatter = np.sum(skernel[:, G, :] * fluxM, axis=2)
-        weights[0] = (2 - self.C) * np.swapaxes(ggprimeInScatter, 1, 0)
-        scs1 = np.sum(weights.T * self.quadSet.Ylm, axis=(1, 0))
+        weights[0] = (2 - self.C[:len(lw)]) * np.swapaxes(ggprimeInScatter, 1, 0)
+        scs1 = np.sum(weights.T * Ylm, axis=(1, 0))
         #
         # OLD SCATTER SOURCE (FOR CROSS CHECKING)
         #S = np.zeros(self.qin.shape[1])
@@ -61,4 +61,4 @@ slv.writeData(pwdpath + '/output/2Dpintest.h5')
 # Plot
 from spytran.fe.post import Fe2DOutput as fe2Dplt
 plotter = fe2Dplt(pwdpath + '/output/2Dpintest.h5')
-plotter.writeToVTK(fname=pwdpath + '/output/2Dpin')
+plotter.writeXDMF(fname=pwdpath + '/output/2Dpin')
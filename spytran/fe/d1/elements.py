@@ -1,7 +1,7 @@
 import numpy as np
 from copy import deepcopy
 import sys
-from spytran.utils.ordReader import createLegArray
+from spytran.utils.quadrature import legendreTable
 np.set_printoptions(linewidth=200)  # set print to screen opts
 
 
@@ -27,7 +27,10 @@ class d1InteriorElement(object):
         self.sNmu, self.wN = quadSet[0], quadSet[1]                              # quadrature weights
         self.maxLegOrder = kwargs.pop("legOrder", 8)                             # remember to range(maxLegORder + 1)
         self.nG = kwargs.pop("nGroups", 10)                                      # number of energy groups
-        self.legArray = kwargs.pop("legP", createLegArray(self.sNmu, self.maxLegOrder))     # Stores leg polys
+        self.legArray = kwargs.pop("legP", None)                                 # Stores leg polys
+        if self.legArray is None:
+            # shared by all elements, quadSet is the sNords gauss legendre set
+            self.legArray = legendreTable(self.sNords, self.maxLegOrder)
         #
         # Store node IDs in element and node positions
         self.nodeIDs, self.nodeVs = nodes
@@ -131,8 +134,9 @@ class d1InteriorElement(object):
             :return: return notes
             :rtype: return type
         """
-        weights = np.array([np.zeros(self.maxLegOrder + 1)])
-        lw = np.arange(self.maxLegOrder + 1)
+        # skernel is truncated to the material's effective legendre order
+        weights = np.array([np.zeros(skernel.shape[0])])
+        lw = np.arange(skernel.shape[0])
         if depth >= 1:
             #if depth >= 2:
             #    for g in range(self.nG):
@@ -160,10 +164,11 @@ class d1InteriorElement(object):
         operations with 0 _python_ for loops.  all in numpy!
         """
         # legArray[l, ord]
-        fluxM = 0.5 * np.dot(self.wN * self.legArray[:, :], self.centScFlux[:, :].T)
+        legArray = self.legArray[:len(lw)]
+        fluxM = 0.5 * np.dot(self.wN * legArray, self.centScFlux[:, :].T)
         ggprimeInScatter = np.sum(skernel[:, g, :].T * fluxM.T, axis=0)
         weights[0][:] = (2 * lw + 1) * ggprimeInScatter
-        scSource = np.sum(weights.T * self.legArray, axis=0)
+        scSource = np.sum(weights.T * legArray, axis=0)
         return scSource
 
     def _computeFissionSource(self, g, chiNuFission, keff):
@@ -1,10 +1,10 @@
 import numpy as np
-import scipy.sparse as sps
-import scipy.sparse.linalg as spl
 from d1.elements import d1InteriorElement
 from d1.elements import d1BoundaryElement
 from d2.elements import d2InteriorElement
 from d2.elements import d2BoundaryElement
+from spytran.materials.scatterKernel import ScatterKernel
+from spytran.utils.perf import Profiler
 np.set_printoptions(linewidth=200)  # set print to screen opts
 
 
@@ -14,8 +14,10 @@ class SuperMesh(object):
     Contains mappings betwen array/matrix field representation and element class
     representation.
     """
-    def __init__(self, gmshMesh, materialDict, bcDict, srcDict, nG, sNords, quadSet, dim=1):
+    def __init__(self, gmshMesh, materialDict, bcDict, srcDict, nG, sNords, quadSet, dim=1,
+                 legOrder=8, skernelTol=0., perf=None):
         self.nG, self.sNords = nG, sNords
+        self.perf = Profiler(enabled=False) if perf is None else perf  # see utils/perf.py
         self.nNodes = int(np.max(gmshMesh.regions.values()[0]['nodes'][:, 0] + 1))
         self.sysRHS = np.zeros((self.nG, self.sNords, self.nNodes))        # source vector
         self.scFluxField = np.zeros((self.nG, self.sNords, self.nNodes))   # scattered flux field
@@ -26,7 +28,8 @@ class SuperMesh(object):
             if gmshRegion['type'] == 'interior':
                 self.regions[regionID] = RegionMesh(gmshRegion, fluxStor, materialDict[gmshRegion['material']],
                                                     bcDict, srcDict.get(gmshRegion['material'], None),
-                                                    nGroups=self.nG, sNords=self.sNords, quadSet=quadSet, dim=dim)
+                                                    nGroups=self.nG, sNords=self.sNords, quadSet=quadSet, dim=dim,
+                                                    legOrder=legOrder, skernelTol=skernelTol)
             elif gmshRegion['type'] == 'bc':
                 # mark boundary nodes
                 pass
@@ -35,32 +38,43 @@ class SuperMesh(object):
         print("Number of nodes in mesh: " + str(self.nNodes))
 
     def scatter(self, depth, keff):
-        for regionID, region in self.regions.iteritems():
-            region.scatterSrc(depth, keff)
+        with self.perf.span('scatter'):
+            for regionID, region in self.regions.iteritems():
+                region.scatterSrc(depth, keff)
 
     def buildSysRHS(self):
-        self.sysRHS = np.zeros((self.nG, self.sNords, self.nNodes))        # reset source vector
-        for regionID, region in self.regions.iteritems():
-            for g in range(self.nG):
-                for o in range(self.sNords):
-                    self.sysRHS = region.buildRegionRHS(self.sysRHS, g, o)
+        with self.perf.span('buildSysRHS'):
+            self.sysRHS = np.zeros((self.nG, self.sNords, self.nNodes))        # reset source vector
+            self.perf.count('allocBytes', self.sysRHS.nbytes)
+            for regionID, region in self.regions.iteritems():
+                for g in range(self.nG):
+                    for o in range(self.sNords):
+                        self.sysRHS = region.buildRegionRHS(self.sysRHS, g, o)
 
     def buildSysMatrix(self, depth):
+        import scipy.sparse as sps
+        perf = self.perf
         self.sysA = np.empty((self.nG, self.sNords), dtype=sps.lil.lil_matrix)
         self.sysP = np.empty((self.nG, self.sNords), dtype=object)
-        for g in range(self.nG):
-            for o in range(self.sNords):
-                self.sysA[g, o] = self.constructA(g, o)
-                if depth <= 1:
-                    self.computePrecon(g, o)
-                if depth == 1:
-                    self.sysA[g, o] = sps.csc_matrix(self.sysA[g, o])
+        with perf.span('buildSysMatrix'):
+            for g in range(self.nG):
+                for o in range(self.sNords):
+                    with perf.span('constructA'):
+                        self.sysA[g, o] = self.constructA(g, o)
+                    if depth <= 1:
+                        self.computePrecon(g, o)
+                    if depth == 1:
+                        self.sysA[g, o] = sps.csc_matrix(self.sysA[g, o])
+                    perf.gauge('sysA.nnz', self.sysA[g, o].nnz, key=(g, o))
 
     def computePrecon(self, g, o):
+        import scipy.sparse as sps
+        import scipy.sparse.linalg as spl
         M_x = lambda x: spl.spsolve(self.sysA[g, o] * sps.eye(self.nNodes), x)
         self.sysP[g, o] = spl.LinearOperator((self.nNodes, self.nNodes), M_x)
 
     def constructA(self, g, o):
+        import scipy.sparse as sps
         A = sps.lil_matrix((self.nNodes, self.nNodes))
         for regionID, region in self.regions.iteritems():
             A = region.buildRegionA(A, g, o)
@@ -71,22 +85,31 @@ class SuperMesh(object):
         For each angle and energy, solve a system of linear equations
         to update the flux scalar field on the mesh.
         """
+        import scipy.sparse.linalg as spl
+        perf = self.perf
         innerResid, Aresid = 0, 0
         for g in range(self.nG):
             for o in range(self.sNords):
-                self.scFluxField[g, o], Aresid = \
-                    spl.gmres(self.sysA[g, o], self.sysRHS[g, o], tol=tolr, M=self.sysP[g, o])
+                nIters = [0]
+                with perf.span('gmres', key=(g, o)):
+                    self.scFluxField[g, o], Aresid = \
+                        spl.gmres(self.sysA[g, o], self.sysRHS[g, o], tol=tolr, M=self.sysP[g, o],
+                                  callback=_iterCounter(nIters) if perf.enabled else None)
+                perf.count('gmresIters', nIters[0], key=(g, o))
                 if Aresid > 0:
+                    perf.count('gmresFailures', key=(g, o))
                     print("WARNING: Linear system solve failed.  Terminated at gmres iter: " + str(Aresid))
         self.totFluxField += self.scFluxField
-        for regionID, region in self.regions.iteritems():
-            fluxStor = (self.scFluxField, self.totFluxField)
-            region.updateEleFluxes(fluxStor)
+        with perf.span('updateEleFluxes'):
+            for regionID, region in self.regions.iteritems():
+                fluxStor = (self.scFluxField, self.totFluxField)
+                region.updateEleFluxes(fluxStor)
         return np.linalg.norm(self.scFluxField) / np.linalg.norm(self.totFluxField), innerResid
 
     def applyBCs(self, depth):
-        for regionID, region in self.regions.iteritems():
-            self.sysA, self.sysRHS = region.setBCs(self.sysA, self.sysRHS, depth)
+        with self.perf.span('applyBCs'):
+            for regionID, region in self.regions.iteritems():
+                self.sysA, self.sysRHS = region.setBCs(self.sysA, self.sysRHS, depth)
 
     def initFlux(self, scFactor):
         fluxStor = (self.scFluxField, (0.0 * self.totFluxField + 1.0) * scFactor)
@@ -102,6 +125,46 @@ class SuperMesh(object):
     def resetMeshFlux(self):
         self.scFluxField = np.zeros((self.nG, self.sNords, self.nNodes))
         self.totFluxField = np.zeros((self.nG, self.sNords, self.nNodes))
+        self.perf.count('allocBytes', 2 * self.totFluxField.nbytes)
+
+    def regionQuadrature(self):
+        """
+        [(regionID, nodeIDs, nodeWeights, totalXs, nuFission)] of every
+        region, see RegionMesh.nodeQuadrature.
+        """
+        regions = []
+        for regionID, region in sorted(self.regions.iteritems()):
+            nodeIDs, nodeWeights = region.nodeQuadrature()
+            regions.append((regionID, nodeIDs, nodeWeights, region.totalXs, region.nuFission))
+        return regions
+
+    def eleFluxFields(self):
+        """
+        (scFlux, totFlux) fields as last handed to the elements.  Differs
+        from (scFluxField, totFluxField) after resetMeshFlux.
+        """
+        scFlux, totFlux = np.zeros_like(self.scFluxField), np.zeros_like(self.totFluxField)
+        for regionID, region in self.regions.iteritems():
+            for element in region.elements.itervalues():
+                scFlux[:, :, element.nodeIDs] = element.nodeScFlux
+                totFlux[:, :, element.nodeIDs] = element.nodeTotFlux
+        return scFlux, totFlux
+
+    def meshTopology(self):
+        """
+        Node coordinates (nNodes, 3) and cell connectivity (nCells, nVerts),
+        both in flux field node ids.  This is the mesh the output fields
+        live on.
+        """
+        coords = np.zeros((self.nNodes, 3))
+        cells = []
+        for regionID, region in sorted(self.regions.iteritems()):
+            for elementID, element in sorted(region.elements.iteritems()):
+                nodeIDs = np.asarray(element.nodeIDs, dtype=int)
+                nodeVs = np.asarray(element.nodeVs, dtype=float).reshape(len(nodeIDs), -1)
+                coords[nodeIDs, :nodeVs.shape[1]] = nodeVs
+                cells.append(nodeIDs)
+        return coords, np.array(cells, dtype=int)
 
 
 class RegionMesh(object):
@@ -120,7 +183,9 @@ class RegionMesh(object):
         self.nG = kwargs.get("nGroups")
         self.bcDict = bcDict
         self.totalXs = material.macroProp['Ntotal']
-        self.skernel = material.macroProp['Nskernel']
+        self.scatterKernel = ScatterKernel(material.macroProp['Nskernel'], maxLegOrder=kwargs.get("legOrder", 8),
+                                           tol=kwargs.pop("skernelTol", 0.))
+        self.skernel = self.scatterKernel.dense
         if 'chi' in material.macroProp.keys():
             self.nuFission = material.macroProp['Nnufission']
             self.chiNuFission = np.dot(np.array([material.macroProp['chi']]).T,
@@ -134,6 +199,19 @@ class RegionMesh(object):
         self.buildElements(gmshRegion, fluxStor, source, **kwargs)
         self.linkBoundaryElements(gmshRegion)
 
+    def nodeQuadrature(self):
+        """
+        Node ids and weights integrating a nodal field over the region,
+        int phi dV = sum(nodeWeights * phi[nodeIDs]).  Exact for the linear
+        elements.
+        """
+        nodeIDs, nodeWeights = [], []
+        for element in self.elements.itervalues():
+            volume = element.deltaX if self.dim == 1 else element.area
+            nodeIDs.extend(element.nodeIDs)
+            nodeWeights.extend([volume / len(element.nodeIDs)] * len(element.nodeIDs))
+        return np.array(nodeIDs, dtype=int), np.array(nodeWeights)
+
     def buildElements(self, gmshRegion, fluxStor, source, **kwargs):
         """
         Initilize and store interior elements.
@@ -228,3 +306,12 @@ class RegionMesh(object):
                 elif self.dim == 2:
                     fissionSrc += self.nuFission[g] * element.area * element._evalCentTotAngleInt(g)
         return fissionSrc
+
+
+def _iterCounter(nIters):
+    """
+    gmres callback counting the iterations into nIters[0]
+    """
+    def callback(resid):
+        nIters[0] += 1
+    return callback
@@ -1,102 +1,205 @@
+import sys
 import numpy as np
 import h5py
 import spytran.utils.hdf5dump as h5d
-from spytran.plotters import scalarFluxPlot as sfp
+from spytran.utils.xdmfWriter import writeXdmf
 
 
-class Fe1DOutput(object):
-    def __init__(self, dataFile):
-        f = h5py.File(dataFile, 'r')
-        self.nodes = f['nodes']
-        self.ordFlux = f['ordFluxes']
-        self.wN = f['weights']
-        self.nG = f['nGrp'].value
-        self.nNodes = self.ordFlux.shape[2]
-        self.computeAngleIntFlux()
-        self.computeTotFlux()
+class lazyField(object):
+    """
+    Computed on first access by the decorated method, then stored on the
+    instance.
+    """
+    def __init__(self, method):
+        self.method = method
+        self.__doc__ = method.__doc__
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        value = self.method(obj)
+        obj.__dict__[self.method.__name__] = value
+        return value
+
+
+class SolutionOutput(object):
+    """
+    Lazy view of a solution file.  Nothing but the meta data is read when
+    the file is opened.  Derived fields (angleIntFlux, totFlux) are reduced
+    from the stored ordinate fluxes on first access, chunkNodes nodes at a
+    time, so memory is bounded by the chunk size plus the (nG, nNodes)
+    result.  Contiguous ordFluxes datasets are memory mapped, chunked or
+    compressed ones are read one hyperslab at a time.
+
+    Node fields are in the original (gmsh) node order.  Flux rows are the
+    stored energy groups (groups, all nG unless written with groups=), use
+    groupFlux(g) to look a group up by number.
+    """
+    angNorm = 0.5  # angular integration normalization, 0.25 in 2D
+
+    def __init__(self, dataFile, chunkNodes=None):
+        self.dataFile = dataFile
+        self.h5f = h5py.File(dataFile, 'r')
+        self.wN = self.h5f['weights'][...]
+        self.nG = self.h5f['nGrp'][()]
+        # energy group of each stored flux row
+        self.groups = self.h5f['groups'][...] if 'groups' in self.h5f else np.arange(self.nG)
+        self.perm = self.h5f['nodePerm'][...] if 'nodePerm' in self.h5f else None
+        if 'ordFluxes' in self.h5f:
+            fluxShape = self.h5f['ordFluxes'].shape
+            bytesPerNode = fluxShape[0] * fluxShape[1] * self.h5f['ordFluxes'].dtype.itemsize
+        else:
+            fluxShape = self.h5f['scalarFlux'].shape
+            bytesPerNode = fluxShape[0] * self.h5f['scalarFlux'].dtype.itemsize
+        self.nNodes = fluxShape[-1]
+        if chunkNodes is None:
+            chunkNodes = max(1, h5d.chunkBytes // bytesPerNode)
+        self.chunkNodes = chunkNodes
+
+    def close(self):
+        self.h5f.close()
+
+    def _toNodeOrder(self, field):
+        return field if self.perm is None else field[..., self.perm]
+
+    @lazyField
+    def nodes(self):
+        """
+        [[nodeID, nodeX, nodeY, nodeZ], ...] (dg: [[nodeID, centroid, position], ...])
+        """
+        nodes = self.h5f['nodes'][...]
+        if self.perm is not None:
+            nodes = nodes[self.perm]
+            nodes[:, 0] = np.arange(len(self.perm))
+        return nodes
+
+    @lazyField
+    def ordFlux(self):
+        """
+        (len(groups), nOrd, nNodes) ordinate fluxes.  Memory mapped (contiguous) or
+        the h5 dataset (chunked), read into memory if the mesh was renumbered.
+        """
+        if self.perm is not None:
+            return h5d.readNodeFields(self.h5f)[1]
+        dataset = self.h5f['ordFluxes']
+        if dataset.chunks is not None:
+            return dataset
+        return h5d.mmapDataset(dataset)
+
+    def iterFluxChunks(self):
+        """
+        Yields (nodeSlice, (len(groups), nOrd, n) ordinate flux block) in stored node
+        order.
+        """
+        dataset = self.h5f['ordFluxes']
+        source = dataset if dataset.chunks is not None else h5d.mmapDataset(dataset)
+        for start in range(0, self.nNodes, self.chunkNodes):
+            nodeSlice = slice(start, min(start + self.chunkNodes, self.nNodes))
+            yield nodeSlice, np.asarray(source[:, :, nodeSlice])
+
+    @lazyField
+    def angleIntFlux(self):
+        """
+        Angle integrated (scalar) flux, (len(groups), nNodes), row i is
+        energy group groups[i].  Read if stored.
+        """
+        if 'scalarFlux' in self.h5f:
+            return self._toNodeOrder(self.h5f['scalarFlux'][...].astype(np.float64))
+        basis = self.angNorm * self.wN
+        phi = np.empty((self.h5f['ordFluxes'].shape[0], self.nNodes))
+        for nodeSlice, block in self.iterFluxChunks():
+            phi[:, nodeSlice] = np.tensordot(basis, block, axes=(0, 1))
+        return self._toNodeOrder(phi)
+
+    @lazyField
+    def totFlux(self):
+        """
+        Sum over the stored energy groups, (nNodes, ).
+        """
+        return np.sum(self.angleIntFlux, axis=0)
+
+    def groupRow(self, g):
+        """
+        Flux row of energy group g.
+        """
+        rows = np.where(self.groups == g)[0]
+        if not len(rows):
+            sys.exit("FATALITY: Group " + str(g) + " not stored in " + self.dataFile +
+                     ", stored groups: " + str(list(self.groups)))
+        return rows[0]
+
+    def groupFlux(self, g):
+        """
+        Angle integrated flux of energy group g, (nNodes, ).
+        """
+        return self.angleIntFlux[self.groupRow(g)]
 
     def computeAngleIntFlux(self):
         """
         Integrate over angle.  Requires ordinate weights.
         """
-        self.angleIntFlux = np.zeros((self.ordFlux.shape[0], self.ordFlux.shape[2]))
-        for g in range(self.nG):
-            for i in range(self.nNodes):
-                self.angleIntFlux[g, i] = 0.5 * np.sum(self.wN * self.ordFlux[g, :, i])
+        self.__dict__.pop('angleIntFlux', None)
+        self.__dict__.pop('totFlux', None)
+        return self.angleIntFlux
 
     def computeTotFlux(self):
         """
         Sum over all energy groups
         """
-        self.totFlux = np.sum(self.angleIntFlux, axis=0)
+        self.__dict__.pop('totFlux', None)
+        return self.totFlux
+
+
+class Fe1DOutput(SolutionOutput):
+    def nodeX(self):
+        """
+        Node positions for plotting
+        """
+        return self.nodes[:, 1]
+
+    def _plotData(self, field):
+        plotData = np.array([self.nodeX(), field])
+        return plotData[:, np.argsort(plotData[0])]
 
     def genFluxTable(self, fname="1dFEhdfoutput.h5"):
         """
         Create position vs flux table. Human readable / paste into excel
         """
         h5data = {}
-        for g in range(10):
-            plotData = np.array([self.nodes[:, 1], self.angleIntFlux[g]])
-            plotData = plotData[:, np.argsort(plotData[0])]
-            h5data["mesh" + str(g)] = plotData[0]
-            h5data["groupFlx" + str(g)] = plotData[1]
+        order = np.argsort(self.nodeX(), kind='mergesort')
+        for row, g in enumerate(self.groups):
+            h5data["mesh" + str(g)] = self.nodeX()[order]
+            h5data["groupFlx" + str(g)] = self.angleIntFlux[row][order]
         h5d.writeToHdf5(h5data, fname)
 
     def plotScalarFlux(self, g, fname='scflx'):
         """
         Plots 1D scalar flux for grp g
         """
-        plotData = np.array([self.nodes[:, 1], self.angleIntFlux[g]])
-        plotData = plotData[:, np.argsort(plotData[0])]
+        from spytran.plotters import scalarFluxPlot as sfp
+        plotData = self._plotData(self.groupFlux(g))
         sfp.plot1DScalarFlux(plotData[1], plotData[0],
                              label='G' + str(g), fnameOut=fname, dg=False)
 
     def plotTotalFlux(self, fname='totflx'):
-        plotData = np.array([self.nodes[:, 1], self.totFlux])
-        plotData = plotData[:, np.argsort(plotData[0])]
+        from spytran.plotters import scalarFluxPlot as sfp
+        plotData = self._plotData(self.totFlux)
         sfp.plot1DScalarFlux(plotData[1], plotData[0],
                              label='tot', fnameOut=fname, dg=False)
 
 
-class Fe2DOutput(object):
-    def __init__(self, dataFile):
-        f = h5py.File(dataFile, 'r')
-        self.nodes = f['nodes']
-        self.ordFlux = f['ordFluxes']
-        self.wN = f['weights']
-        self.nG = f['nGrp'].value
-        self.nNodes = self.ordFlux.shape[2]
-        self.computeAngleIntFlux()
-        self.computeTotFlux()
+class Fe2DOutput(SolutionOutput):
+    angNorm = 0.25
 
-    def computeAngleIntFlux(self):
+    def writeXDMF(self, fname):
         """
-        Integrate over angle.  Requires ordinate weights.
+        Write fname.xmf, an xdmf descriptor of the solution file readable by
+        ParaView / VisIt.  See utils/xdmfWriter.py.
         """
-        self.angleIntFlux = np.zeros((self.ordFlux.shape[0], self.ordFlux.shape[2]))
-        for g in range(self.nG):
-            for i in range(self.nNodes):
-                self.angleIntFlux[g, i] = 0.25 * np.sum(self.wN * self.ordFlux[g, :, i])
+        return writeXdmf(self.dataFile, fname + '.xmf')
 
-    def computeTotFlux(self):
+    def writeToVTK(self, fname):
         """
-        Sum over all energy groups
+        Deprecated, writes the xdmf descriptor (see writeXDMF).
         """
-        self.totFlux = np.sum(self.angleIntFlux, axis=0)
-
-    def writeToVTK(self, fname):
-        from pyevtk.hl import pointsToVTK
-        pointsToVTK(fname, self.nodes[:, 1], self.nodes[:, 2], self.nodes[:, 3],
-                    data={"grp1": self.angleIntFlux[0, :],
-                          "grp2": self.angleIntFlux[1, :],
-                          "grp3": self.angleIntFlux[2, :],
-                          "grp4": self.angleIntFlux[3, :],
-                          "grp5": self.angleIntFlux[4, :],
-                          "grp6": self.angleIntFlux[5, :],
-                          "grp7": self.angleIntFlux[6, :],
-                          "grp8": self.angleIntFlux[7, :],
-                          "grp9": self.angleIntFlux[8, :],
-                          "grp10": self.angleIntFlux[9, :],
-                          "tot": self.totFlux[:]
-                          }
-                    )
+        return self.writeXDMF(fname)
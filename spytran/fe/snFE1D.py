@@ -2,13 +2,12 @@ import numpy as np
 #import scattSource as scs
 from copy import deepcopy
 # import scattSrc as scs
-import scipy.sparse as sps
-import scipy.sparse.linalg as spl
 import sys
 import utils.hdf5dump as h5d
 from utils.ordReader import gaussLegQuadSet
 from utils.ordReader import createLegArray
 from utils.gmshPreproc import gmsh1DMesh
+from materials.scatterKernel import ScatterKernel
 np.set_printoptions(linewidth=200)  # set print to screen opts
 
 
@@ -135,12 +134,14 @@ class superMesh(object):
                     self.sysRHS = region.buildRegionRHS(self.sysRHS, g, o)
 
     def buildSysMatrix(self):
+        import scipy.sparse as sps
         self.sysA = np.empty((self.nG, self.sNords), dtype=sps.dok.dok_matrix)
         for g in range(self.nG):
             for o in range(self.sNords):
                 self.sysA[g, o] = self.constructA(g, o)
 
     def constructA(self, g, o):
+        import scipy.sparse as sps
         A = sps.eye(self.nNodes, format='csr') * 0.
         A = sps.dok_matrix(A)
         for regionID, region in self.regions.iteritems():
@@ -152,6 +153,8 @@ class superMesh(object):
         For each angle and energy, solve a system of linear equations
         to update the flux scalar field on the mesh.
         """
+        import scipy.sparse as sps
+        import scipy.sparse.linalg as spl
         innerResid = 0
         for g in range(self.nG):
             for o in range(self.sNords):
@@ -183,7 +186,7 @@ class regionMesh(object):
         """
         self.bcDict = bcDict
         self.totalXs = material.macroProp['Ntotal']
-        self.skernel = material.macroProp['Nskernel']
+        self.skernel = ScatterKernel(material.macroProp['Nskernel'], maxLegOrder=kwargs.get("legOrder", 8)).dense
         if 'chi' in material.macroProp.keys():
             self.nuFission = material.macroProp['Nnufission']
             self.chiNuFission = np.dot(np.array([material.macroProp['chi']]).T,
@@ -297,11 +300,15 @@ class InteriorElement(object):
         #
         # Basic data needed for scattering source calcs
         self.sNords = kwargs.pop("sNords", 2)                                    # number of discrete dirs tracked
-        quadSet = kwargs.pop("quadSet", gaussLegQuadSet(self.sNords))            # quadrature set
+        quadSet = kwargs.pop("quadSet", None)                                    # quadrature set
+        if quadSet is None:
+            quadSet = gaussLegQuadSet(self.sNords)
         self.sNmu, self.wN = quadSet[0], quadSet[1]                              # quadrature weights
         self.maxLegOrder = kwargs.pop("legOrder", 8)                             # remember to range(maxLegORder + 1)
         self.nG = kwargs.pop("nGroups", 10)                                      # number of energy groups
-        self.legArray = kwargs.pop("legP", createLegArray(self.sNmu, self.maxLegOrder))     # Stores leg polys
+        self.legArray = kwargs.pop("legP", None)                                 # Stores leg polys
+        if self.legArray is None:
+            self.legArray = createLegArray(self.sNmu, self.maxLegOrder)
         #
         # Store node IDs in element and node positions
         self.nodeIDs, self.nodeVs = nodes
@@ -397,8 +404,9 @@ class InteriorElement(object):
             :return: return notes
             :rtype: return type
         """
-        weights = np.array([np.zeros(self.maxLegOrder + 1)])
-        lw = np.arange(self.maxLegOrder + 1)
+        # skernel is truncated to the material's effective legendre order
+        weights = np.array([np.zeros(skernel.shape[0])])
+        lw = np.arange(skernel.shape[0])
         if depth >= 1:
             if depth >= 2:
                 for g in range(self.nG):
@@ -423,10 +431,11 @@ class InteriorElement(object):
         Impoved version of eval scatter source.  Performs same
         operations with 0 _python_ for loops.  all in numpy!
         """
-        b = 0.5 * np.dot(self.wN * self.legArray[:, :], self.centScFlux[:, :].T)
+        legArray = self.legArray[:len(lw)]
+        b = 0.5 * np.dot(self.wN * legArray, self.centScFlux[:, :].T)
         ggprimeInScatter = np.sum(skernel[:, g, :].T * b.T, axis=0)
         weights[0][:] = (2 * lw + 1) * ggprimeInScatter
-        return np.sum(weights.T * self.legArray, axis=0)
+        return np.sum(weights.T * legArray, axis=0)
 
     def _computeFissionSource(self, g, chiNuFission, keff):
         """
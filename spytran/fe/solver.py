@@ -1,9 +1,12 @@
+import sys
 import numpy as np
 import warnings
 import time
 import spytran.utils.hdf5dump as h5d
 from spytran.utils.ordReader import gaussLegQuadSet
-from spytran.utils.ordReader import D2quadSet
+from spytran.utils.ordReader import sharedD2quadSet
+from spytran.utils.quadrature import fluxMomentBasis, legendreTable
+from spytran.utils.perf import Profiler
 from spytran.utils.gmshPreproc import gmsh1DMesh
 from spytran.utils.gmshPreproc import gmsh2DMesh
 from mesh import SuperMesh
@@ -21,29 +24,52 @@ class SnFeSlv(object):
     Methods can be called when necissary by a controller script.
     """
     def __init__(self, geoFile, materialDict, bcDict, srcDict, nGroups=10,
-                 legOrder=8, sN=4, dim=1):
+                 legOrder=8, sN=4, dim=1, **kwargs):
         """
         Matierial dict in:
             {'material_str': material_class_instance, ...}
         format
+        Optional kwargs:
+            renumber: None, 'rcm' or 'hilbert'.  Bandwidth reducing node
+                renumbering applied after the mesh is read.
+            skernelTol: scattering kernel entries below skernelTol * max(sigma_s0)
+                are dropped (see materials/scatterKernel.py).  Default 0.
+            quadKind: 2D quadrature set, 'levelSym' (sN <= 16, default) or
+                'product' (any even sN), see utils/quadrature.py.
+            perf: utils/perf.Profiler collecting timers and counters.  By
+                default a new, enabled one (self.perf).
+            mesh: gmshMesh used instead of meshing geoFile, e.g. from
+                utils/synthetic.py.  renumber is ignored.
         """
+        self.perf = kwargs.pop("perf", None) or Profiler()
+        gmshMesh = kwargs.pop("mesh", None)
+        renumber = kwargs.pop("renumber", None)
+        self.dim = dim
+        skernelTol = kwargs.pop("skernelTol", 0.)
+        quadKind = kwargs.pop("quadKind", 'levelSym')
         if dim == 1:
             quadSet = gaussLegQuadSet(sN)                      # quadrature set
             self.sNords = sN                                   # number of discrete dirs tracked
             self.wN = quadSet[1]
         elif dim == 2:
-            quadSet = D2quadSet(sN)
+            quadSet = sharedD2quadSet(sN, legOrder, quadKind)
+            self.quadSet = quadSet
             self.sNords, self.wN = quadSet.sNords, quadSet.wN
         self.maxLegOrder = legOrder                             # remember to range(maxLegORder + 1)
         self.nG = nGroups                                       # number of energy groups
         #
-        if dim == 1:
-            gmshMesh = gmsh1DMesh(geoFile=geoFile)  # Run gmsh
-        elif dim == 2:
-            gmshMesh = gmsh2DMesh(geoFile=geoFile)  # Run gmsh
+        if gmshMesh is None:
+            with self.perf.span('gmsh'):
+                if dim == 1:
+                    gmshMesh = gmsh1DMesh(geoFile=geoFile, renumber=renumber)  # Run gmsh
+                elif dim == 2:
+                    gmshMesh = gmsh2DMesh(geoFile=geoFile, renumber=renumber)  # Run gmsh
         self.nodes = gmshMesh.nodes
-        self.superMesh = SuperMesh(gmshMesh, materialDict, bcDict, srcDict,
-                                   nGroups, self.sNords, quadSet, dim)    # build the mesh
+        self.nodePerm = gmshMesh.node_perm  # original node id -> solver node id
+        with self.perf.span('buildMesh'):
+            self.superMesh = SuperMesh(gmshMesh, materialDict, bcDict, srcDict,
+                                       nGroups, self.sNords, quadSet, dim,
+                                       legOrder, skernelTol, self.perf)    # build the mesh
         self.depth = 0  # scattering source iteration depth
         self.keff = 1
         self.buildTransOp()
@@ -59,12 +85,13 @@ class SnFeSlv(object):
                 element.scatter()
         """
         timeStart = time.time()
-        self.superMesh.scatter(self.depth, self.keff)
-        if self.depth == 1:
-            # rebuild transport Op if scattering depth == 1
-            self.buildTransOp()
-        self.buildRHS()  # build RHS after scatter
-        self.applyBCs()  # apply BCs after scatter
+        with self.perf.span('scatterSource'):
+            self.superMesh.scatter(self.depth, self.keff)
+            if self.depth == 1:
+                # rebuild transport Op if scattering depth == 1
+                self.buildTransOp()
+            self.buildRHS()  # build RHS after scatter
+            self.applyBCs()  # apply BCs after scatter
         self.depth += 1
         self.timeScatter = (time.time() - timeStart)
 
@@ -76,6 +103,7 @@ class SnFeSlv(object):
         and angle redistribution.
         """
         self.superMesh.buildSysMatrix(self.depth)
+        self.opDepth = self.depth  # scattering depth the operator was built for
 
     def buildRHS(self):
         self.superMesh.buildSysRHS()
@@ -89,7 +117,8 @@ class SnFeSlv(object):
         Returns flux norm
         """
         timeStart = time.time()
-        self.norm, resid = self.superMesh.sweepFlux(tol)
+        with self.perf.span('solveFlux'):
+            self.norm, resid = self.superMesh.sweepFlux(tol)
         self.timeLinSolver = (time.time() - timeStart)
         return self.norm, (self.timeScatter, self.timeLinSolver)
 
@@ -117,7 +146,8 @@ class SnFeSlv(object):
                 break
         self.depth = 0
         # update keff
-        self.fissionSrc.append(self.superMesh.getFissionSrc())
+        with self.perf.span('fissionSrc'):
+            self.fissionSrc.append(self.superMesh.getFissionSrc())
         kold = self.keff
         self.keff = self.keff * (self.fissionSrc[-1] / self.fissionSrc[-2])
         if np.abs(kold - self.keff) < kTol:
@@ -128,6 +158,46 @@ class SnFeSlv(object):
             kconv = False
         return self.keff, kconv, self.norm
 
+    def getState(self):
+        """
+        Solver state between two iterations, see utils/checkpoint.py.
+        The flux is stored as seen by the elements, the mesh fields are
+        either equal to it or reset to zero (meshFluxReset).
+        """
+        scFlux, totFlux = self.superMesh.eleFluxFields()
+        state = {'keff': self.keff, 'depth': self.depth, 'opDepth': self.opDepth,
+                 'norm': getattr(self, 'norm', 1.0), 'eleScFlux': scFlux, 'eleTotFlux': totFlux,
+                 'meshFluxReset': not np.any(self.superMesh.totFluxField),
+                 'fluxShape': np.array(self.superMesh.totFluxField.shape)}
+        if hasattr(self, 'fissionSrc'):
+            state['fissionSrc'] = np.array(self.fissionSrc)
+        return state
+
+    def setState(self, state):
+        """
+        Restore a state from getState.  The solver must have been set up
+        with the same mesh, materials and options.
+        """
+        if tuple(state['fluxShape']) != self.superMesh.totFluxField.shape:
+            sys.exit("FATALITY: Checkpoint flux shape " + str(tuple(state['fluxShape'])) +
+                     " does not match the solver " + str(self.superMesh.totFluxField.shape))
+        self.keff, self.depth, self.norm = state['keff'], state['depth'], state['norm']
+        if 'fissionSrc' in state:
+            self.fissionSrc = list(state['fissionSrc'])
+        scFlux, totFlux = np.array(state['eleScFlux']), np.array(state['eleTotFlux'])
+        for regionID, region in self.superMesh.regions.iteritems():
+            region.updateEleFluxes((scFlux, totFlux))
+        if state['meshFluxReset']:
+            self.superMesh.resetMeshFlux()
+        else:
+            self.superMesh.scFluxField, self.superMesh.totFluxField = scFlux, totFlux
+        if state['opDepth'] != self.opDepth:
+            # operator as rebuilt by scatterSource at depth 1
+            depth, self.depth = self.depth, state['opDepth']
+            self.buildTransOp()
+            self.applyBCs()
+            self.depth = depth
+
     def writeData(self, outFileName='1Dfeout.h5', **kwargs):
         """
         Write solution state to hdf5 file.
@@ -135,12 +205,48 @@ class SnFeSlv(object):
             - mesh
                 - elements (nodes in element)
                 - node positions
+                - geometry, connectivity: flux field node coordinates and
+                  cells, see utils/xdmfWriter.py
             - flux field
+        Output kwargs (see utils/hdf5dump.SolutionWriter):
+            fields: any of 'ordFluxes' (default), 'scalarFlux', 'fluxMoments',
+                'regionRates'
+            groups: energy groups to write, default all
+            dtype: flux storage type, e.g. np.float32
+            compression, compressionLevel, chunks: hdf5 dataset filters
+        The flux is written one group at a time.
+        With writer (utils/asyncWriter.AsyncWriter) the flux is copied and
+        written on the writer's background thread.
         """
+        writer = kwargs.pop('writer', None)
         # write [[nodeID, nodeX, nodeY, nodeZ],...] vector  (this is gmshMesh.nodes)
         # write [[nodeID, fluxValue]...] vector  (this is the totFluxField)
         # write eigenvalue
-        h5data = {'nodes': self.nodes, 'ordFluxes': self.superMesh.totFluxField,
-                  'keff': self.keff, 'fluxNorm': self.norm, 'weights': self.wN,
+        h5data = {'nodes': self.nodes, 'keff': self.keff, 'fluxNorm': self.norm, 'weights': self.wN,
                   'nGrp': self.nG, 'scrIters': self.depth}
-        h5d.writeToHdf5(h5data, outFileName)
+        # flux field mesh, referenced by the xdmf descriptor (utils/xdmfWriter.py)
+        h5data['geometry'], h5data['connectivity'] = self.superMesh.meshTopology()
+        if self.nodePerm is not None:
+            # lets the post processors map fields back to the original node ids
+            h5data['nodePerm'] = self.nodePerm
+        kwargs.pop('h5_fmt', None)  # dg only
+        fields = kwargs.get('fields', ('ordFluxes', ))
+        if 'fluxMoments' in fields:
+            kwargs.setdefault('momentBasis', self._fluxMomentBasis())
+        if 'regionRates' in fields:
+            kwargs.setdefault('regions', self.superMesh.regionQuadrature())
+        angNorm = 0.5 if self.dim == 1 else 0.25
+        kwargs['scalarBasis'] = angNorm * np.asarray(self.wN)
+        fluxField = self.superMesh.totFluxField
+        if not np.any(fluxField):
+            # between two outer iterations the flux only lives in the elements
+            fluxField = self.superMesh.eleFluxFields()[1]
+        if writer is not None:
+            writer.submitSnapshot(outFileName, h5data, fluxField, **kwargs)
+        else:
+            h5d.writeSolution(outFileName, h5data, fluxField, **kwargs)
+
+    def _fluxMomentBasis(self):
+        if self.dim == 1:
+            return fluxMomentBasis(self.wN, legendreTable(self.sNords, self.maxLegOrder), 1)
+        return fluxMomentBasis(self.wN, self.quadSet.Ylm, 2)
@@ -0,0 +1,155 @@
+#!/usr/bin/python
+#
+# Mixes many compositions of one set of isotopes at once.
+#
+# The isotopes' micro data is stacked into isotope indexed arrays once, every
+# macroscopic property of every composition is then a single contraction over
+# the isotope axis.  Results match mixedMat (up to summation order).
+#
+# Use:
+#   mixer = BatchMixer(['u235', 'u238', 'o16'])
+#   nD = np.array([[e / 3., (1 - e) / 3., 2 / 3.] for e in enrichments])
+#   batch = mixer.mix(nD, densities=10.4)
+#   batch['Ntotal']  # (nCompositions, nG)
+
+import sys
+import numpy as np
+from globalMatLib import matLib
+from materialMixxer import mixedMat
+import selfShield as ssh
+import xsTemperature as txs
+from macroCache import isoFingerprint
+
+
+class BatchMixer(object):
+    '''
+    Stacked micro data of a fixed list of isotopes:
+        total, nufission  (nIso, nG)
+        skernel           (nIso, nLeg, nG, nG), zero padded to the highest order
+        chi, nu           (nIso, nG), zero for isotopes without the data
+        ffactor           (nIso, nG, nDil), ones for isotopes without the data
+        M, A              (nIso,)
+    Multi-temperature isotopes are interpolated to temperature [K], one
+    value for all isotopes or {iso: T}.
+    '''
+    Na = mixedMat.Na
+
+    def __init__(self, isotopes, matLib=matLib, temperature=None):
+        self.isotopes = list(isotopes)
+        try:
+            microDat = [matLib[iso] for iso in self.isotopes]
+        except KeyError:
+            sys.exit("FATALITY: A Requested material was not found in material library.")
+        for i, (iso, data) in enumerate(zip(self.isotopes, microDat)):
+            if 'temperatures' in data:
+                T = temperature.get(iso) if isinstance(temperature, dict) else temperature
+                microDat[i] = txs.atTemperature(data, isoFingerprint(matLib, iso), T)[0]
+        self.M = np.array([data['M'] for data in microDat], dtype=float)
+        self.A = np.array([data['A'] for data in microDat], dtype=float)
+        self.total = np.array([data['total'] for data in microDat])
+        nIso, nG = self.total.shape
+        nLeg = max(data['skernel'].shape[0] for data in microDat)
+        self.skernel = np.zeros((nIso, nLeg, nG, nG))
+        for i, data in enumerate(microDat):
+            self.skernel[i, :data['skernel'].shape[0]] = data['skernel']
+        # optional data, track which isotopes carry it
+        self.has = {}
+        for key in ('nufission', 'chi', 'nu'):
+            self.has[key] = np.array([key in data for data in microDat])
+            table = np.zeros((nIso, nG))
+            for i, data in enumerate(microDat):
+                if key in data:
+                    table[i] = data[key]
+            setattr(self, key, table)
+        self.ffactor = np.ones((nIso, nG, len(ssh.dilutionGrid)))
+        for i, data in enumerate(microDat):
+            if np.shape(data.get('ffactor')) == self.ffactor.shape[1:]:
+                self.ffactor[i] = data['ffactor']
+        # isotopes counted in the fissionable number density
+        self.fissionable = self.has['chi'] & (np.sum(self.chi, axis=1) > 0)
+
+    def mix(self, nD, densities=None, wfFlag=False, props=None, shield=False, **shieldKw):
+        '''
+        nD is a (nCompositions, nIso) number density [#/b-cm] matrix, or weight
+        fractions with wfFlag.  If densities [g/cc] are given (scalar or one per
+        composition) number densities are rescaled to them, as setDensity.
+        props limits the macroscopic xs computed, e.g. ('Ntotal',)
+        With shield the micro xs are self sheilded first, shieldKw are passed
+        to shieldFactors (modBool, resAbsBool dicts, tol, maxIter).
+        Returns a dict of arrays with the compositions on the leading axis:
+            Ntotal, Nnufission, Nskernel, chi, nu, M, A, mu_bar: macroProp
+            nD, af, wf (nCompositions, nIso), density (nCompositions,)
+            f, sig_b (nCompositions, nIso, nG) when shielded
+        '''
+        nD = np.atleast_2d(np.asarray(nD, dtype=float))
+        if wfFlag:
+            # atom fractions are used as number densities, as mixedMat
+            nD = nD / self.M
+            nD = nD / np.sum(nD, axis=1)[:, None]
+        af = nD / np.sum(nD, axis=1)[:, None]
+        mixM = np.dot(af, self.M)
+        if densities is not None:
+            nD = np.asarray(densities, dtype=float).reshape(-1, 1) * af * self.Na / mixM[:, None] / 1.0e24
+        batch = {'nD': nD, 'af': af, 'M': mixM,
+                 'A': np.dot(af, self.A),
+                 'mu_bar': np.dot(af, 2.0 / (3.0 * self.A))}
+        wf = af * self.M
+        batch['wf'] = wf / np.sum(wf, axis=1)[:, None]
+        # sum(M * nD * 1e24 / Na / af) / nIso for every composition
+        batch['density'] = mixM * np.sum(nD, axis=1) * 1.0e24 / self.Na
+        if shield:
+            f, batch['sig_b'] = self.shieldFactors(nD, **shieldKw)
+            batch['f'] = f
+            if props is None or 'Ntotal' in props:
+                batch['Ntotal'] = np.einsum('ci,cig,ig->cg', nD, f, self.total)
+            if self.has['nufission'].any() and (props is None or 'Nnufission' in props):
+                batch['Nnufission'] = np.einsum('ci,cig,ig->cg', nD, f, self.nufission)
+            if props is None or 'Nskernel' in props:
+                # f multiplies the last (source group) axis
+                batch['Nskernel'] = np.einsum('ci,cih,ilgh->clgh', nD, f, self.skernel)
+        else:
+            if props is None or 'Ntotal' in props:
+                batch['Ntotal'] = np.dot(nD, self.total)
+            if self.has['nufission'].any() and (props is None or 'Nnufission' in props):
+                batch['Nnufission'] = np.dot(nD, self.nufission)
+            if props is None or 'Nskernel' in props:
+                batch['Nskernel'] = np.tensordot(nD, self.skernel, axes=(1, 0))
+        # fission spectrum and nu weighted by the fissionable atom fractions
+        fisND = nD * self.fissionable
+        fisSum = np.sum(fisND, axis=1)[:, None]
+        afF = np.divide(fisND, fisSum, out=np.zeros_like(fisND), where=fisSum > 0)
+        for key in ('chi', 'nu'):
+            if self.has[key].any():
+                batch[key] = np.dot(afF, getattr(self, key))
+        return batch
+
+    def shieldFactors(self, nD, modBool={}, resAbsBool={}, tol=1e-6, maxIter=20):
+        '''
+        Self sheilding factors and background xs of every isotope in every
+        composition.  modBool and resAbsBool as mixedMat.selfSheild.
+        '''
+        modMask = [modBool.get(iso, True) for iso in self.isotopes]
+        resMask = [resAbsBool.get(iso, True) for iso in self.isotopes]
+        f, sigb, iters = ssh.shieldFactors(nD, self.total, self.ffactor, modMask, resMask,
+                                           tol=tol, maxIter=maxIter)
+        return f, sigb
+
+    def materials(self, batch):
+        '''
+        One batchMat (usable wherever a mixedMat is) per composition.
+        '''
+        return [batchMat(self, batch, i) for i in range(len(batch['nD']))]
+
+
+class batchMat(object):
+    '''
+    Single composition view of a BatchMixer.mix result.
+    '''
+    macroKeys = ('Ntotal', 'Nnufission', 'Nskernel', 'chi', 'nu', 'M', 'A', 'mu_bar')
+
+    def __init__(self, mixer, batch, i):
+        self.macroProp = dict((key, batch[key][i]) for key in self.macroKeys if key in batch)
+        self.density = batch['density'][i]
+        self.nDdict = dict(zip(mixer.isotopes, batch['nD'][i]))
+        self.af = dict(zip(mixer.isotopes, batch['af'][i]))
+        self.wf = dict(zip(mixer.isotopes, batch['wf'][i]))
@@ -1,13 +1,165 @@
 #!/usr/bin/python
 import os
+import cPickle
 
+# isotope table (M, A, zaid) sources, see loadIsoTable
+isoDictPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'isoDict.txt')
+isoTablePath = os.path.splitext(isoDictPath)[0] + '.pkl'
 
-matLib = {}
-try:
-    import isoDictGen as isoGen
-    matLib = isoGen.genIsoDict()
-except:
-    print("Reading isotopic information.")
-    import json
-    with open(os.path.dirname(os.path.relpath(__file__)) + '/isoDict.txt', 'r') as infile:
-        matLib = json.load(infile)
+
+def loadIsoTable(verbose=False):
+    """
+    Isotope name -> {'M', 'A', 'zaid'} dict.
+
+    Read from the binary table isoDict.pkl when it is newer than
+    isoDict.txt.  Otherwise the table is generated with isoDictGen (needs
+    periodictable) or parsed from isoDict.txt, and isoDict.pkl is
+    (re)written if the directory is writable.
+    """
+    txtTime = os.path.getmtime(isoDictPath) if os.path.exists(isoDictPath) else 0
+    if os.path.exists(isoTablePath) and os.path.getmtime(isoTablePath) >= txtTime:
+        try:
+            with open(isoTablePath, 'rb') as infile:
+                return cPickle.load(infile)
+        except Exception:
+            pass
+    try:
+        import isoDictGen as isoGen
+        isoTable = isoGen.genIsoDict()
+    except ImportError:
+        if verbose:
+            print("Reading isotopic information.")
+        import json
+        with open(isoDictPath, 'r') as infile:
+            isoTable = json.load(infile)
+    try:
+        tmpPath = isoTablePath + '.%d.tmp' % os.getpid()
+        with open(tmpPath, 'wb') as outfile:
+            cPickle.dump(isoTable, outfile, cPickle.HIGHEST_PROTOCOL)
+        os.rename(tmpPath, isoTablePath)
+    except (IOError, OSError):
+        pass
+    return isoTable
+
+
+class MaterialLibrary(dict):
+    """
+    Isotope name -> isotope data dict.
+
+    Isotopes from an HDF5 cross section library (see makeH5XS.py) are
+    registered with addH5Source and only read on first lookup of the isotope.
+    Contiguous datasets are memory mapped copy-on-write: nothing is read
+    until the data is touched, processes using the same library share the
+    page cache and in-place edits never reach the file.
+
+    Each isotope may carry a fingerprint of its xs data (see macroCache.py),
+    used to key cached mixtures.  Call touch(isoName) after modifying
+    isotope data in place.
+
+    baseLoader, if given, is called on first use of the library and returns
+    {isoName: isoData} defaults merged under the existing entries (used to
+    defer reading the isotope table until it is needed).
+    """
+    def __init__(self, *args, **kwargs):
+        self._baseLoader = kwargs.pop('baseLoader', None)
+        super(MaterialLibrary, self).__init__(*args, **kwargs)
+        self._lazySources = {}  # isotope name -> h5 file path
+        self._fingerprints = {}  # isotope name -> xs data fingerprint
+
+    def _loadBase(self):
+        baseLoader, self._baseLoader = self._baseLoader, None
+        for isoName, baseData in baseLoader().iteritems():
+            if dict.__contains__(self, isoName):
+                isoData = dict.__getitem__(self, isoName)
+                for key, value in baseData.iteritems():
+                    isoData.setdefault(key, value)
+            else:
+                dict.__setitem__(self, isoName, baseData)
+
+    def fingerprint(self, isoName):
+        """
+        Fingerprint of the isotope's xs data, None if unknown.
+        """
+        return self._fingerprints.get(isoName)
+
+    def setFingerprint(self, isoName, fingerprint):
+        self._fingerprints[isoName] = fingerprint
+
+    def touch(self, isoName):
+        """
+        Forget the fingerprint of modified isotope data.
+        """
+        self._fingerprints.pop(isoName, None)
+
+    def __setitem__(self, isoName, isoData):
+        self._lazySources.pop(isoName, None)
+        self.touch(isoName)
+        dict.__setitem__(self, isoName, isoData)
+
+    def update(self, *args, **kwargs):
+        # per isotope __setitem__: drops lazy h5 sources and fingerprints.
+        # The base table, if still pending, is merged under these entries.
+        for isoName, isoData in dict(*args, **kwargs).iteritems():
+            self[isoName] = isoData
+
+    def addH5Source(self, h5Path):
+        """
+        Register all isotopes (top level groups) of an HDF5 xs library.
+        Returns the list of registered isotope names.
+        """
+        import h5py
+        h5Path = os.path.abspath(h5Path)
+        with h5py.File(h5Path, 'r') as h5f:
+            isoNames = [str(isoName) for isoName in h5f.keys()]
+        h5Stat = os.stat(h5Path)
+        for isoName in isoNames:
+            self._lazySources[isoName] = h5Path
+            self._fingerprints[isoName] = 'h5:%s:%s:%d:%r' % (h5Path, isoName, h5Stat.st_size,
+                                                             h5Stat.st_mtime)
+            if not dict.__contains__(self, isoName):
+                dict.__setitem__(self, isoName, {})
+        return isoNames
+
+    def isLoaded(self, isoName):
+        return isoName not in self._lazySources
+
+    def __getitem__(self, isoName):
+        if self._baseLoader is not None:
+            self._loadBase()
+        if isoName in self._lazySources:
+            self._loadIsotope(isoName)
+        return dict.__getitem__(self, isoName)
+
+    def get(self, isoName, default=None):
+        if isoName in self:
+            return self[isoName]
+        return default
+
+    def _loadIsotope(self, isoName):
+        import h5py
+        from spytran.utils.hdf5dump import mmapDataset
+        h5Path = self._lazySources.pop(isoName)
+        isoData = dict.__getitem__(self, isoName)
+        with h5py.File(h5Path, 'r') as h5f:
+            for dataName, dataset in h5f[isoName].iteritems():
+                isoData[str(dataName)] = mmapDataset(dataset)
+
+
+def _withBase(method):
+    def wrapped(self, *args, **kwargs):
+        if self._baseLoader is not None:
+            self._loadBase()
+        return method(self, *args, **kwargs)
+    wrapped.__name__, wrapped.__doc__ = method.__name__, method.__doc__
+    return wrapped
+
+
+# every read of the library sees the base table
+for _name in ('__contains__', '__iter__', '__len__', '__eq__', '__ne__', '__repr__', 'has_key',
+              'keys', 'values', 'items', 'iterkeys', 'itervalues', 'iteritems', 'copy',
+              'pop', 'popitem', 'setdefault'):
+    setattr(MaterialLibrary, _name, _withBase(getattr(dict, _name)))
+
+
+# isotope table is read on first use
+matLib = MaterialLibrary(baseLoader=lambda: loadIsoTable(verbose=True))
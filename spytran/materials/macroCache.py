@@ -0,0 +1,156 @@
+#!/usr/bin/python
+#
+# Cache of mixed material macroscopic properties.
+#
+# A mixture is keyed by its composition: the isotope number densities and a
+# fingerprint of each isotope's micro xs data.  The fingerprint identifies
+# the library the data came from (or, for self shielded data, the unshielded
+# fingerprint, the shielding flags and the mixture it was shielded in), so
+# identical mixtures give identical keys across instances, runs and
+# processes.
+#
+# The cache keeps read only copies of the arrays, every mixture with the
+# same key gets its own writable copy (see copyProps), so in place edits of
+# one mixture's macroProp neither fail nor reach the others.
+#
+# Set SPYTRAN_CACHE_DIR to also keep entries on disk.
+
+import os
+import hashlib
+from collections import OrderedDict
+import numpy as np
+
+# micro data that enters the mixed properties
+xsKeys = ('total', 'skernel', 'nufission', 'chi', 'nu', 'ffactor', 'M', 'A', 'temperatures')
+
+
+def xsHash(obj):
+    return hashlib.sha1(repr(obj)).hexdigest()
+
+
+def xsFingerprint(isoData):
+    """
+    Content hash of an isotope's micro xs data.
+    """
+    h = hashlib.sha1()
+    for key in sorted(isoData.keys()):
+        if key not in xsKeys:
+            continue
+        value = np.asarray(isoData[key])
+        h.update(key + str(value.dtype) + str(value.shape))
+        h.update(np.ascontiguousarray(value).view(np.uint8))
+    return h.hexdigest()
+
+
+def isoFingerprint(matLib, isoName):
+    """
+    Library fingerprint of the isotope when known, content hash otherwise.
+    """
+    fingerprint = getattr(matLib, 'fingerprint', None)
+    return (fingerprint and fingerprint(isoName)) or xsFingerprint(matLib[isoName])
+
+
+def copyProps(props):
+    """
+    {name: value} with writable copies of the array values.
+    """
+    return dict((name, np.array(value) if isinstance(value, np.ndarray) else value)
+                for name, value in props.iteritems())
+
+
+def _frozenProps(props):
+    frozen = copyProps(props)
+    for value in frozen.values():
+        if isinstance(value, np.ndarray):
+            value.setflags(write=False)
+    return frozen
+
+
+class MacroCache(object):
+    """
+    Bounded LRU {composition key: mixed properties} cache with an optional
+    disk tier.  Entries are dicts:
+        {'macroProp': {}, 'af': {}, 'afF': {}, 'wf': {}, 'density': float}
+    maxEntries=0 disables the in memory tier.
+    """
+    def __init__(self, maxEntries=256, cacheDir=None):
+        self.maxEntries = maxEntries
+        self.hits, self.misses = 0, 0
+        self._entries = OrderedDict()
+        self.disk = None
+        self.setCacheDir(cacheDir or os.environ.get('SPYTRAN_CACHE_DIR'))
+
+    def setCacheDir(self, cacheDir):
+        """
+        Enable (cacheDir) or disable (None) the disk tier.
+        """
+        if cacheDir:
+            from spytran.utils.diskCache import DiskCache
+            self.disk = DiskCache(cacheDir, prefix='macro_')
+        else:
+            self.disk = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits, self.misses = 0, 0
+
+    def get(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None and self.disk is not None:
+            arrays = self.disk.get(key)
+            if arrays is not None:
+                entry = self._unpack(arrays)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._store(key, entry)
+        return entry
+
+    def put(self, key, entry):
+        """
+        Store a read only copy of entry, entry itself is not modified.
+        """
+        entry = dict(entry, macroProp=_frozenProps(entry['macroProp']))
+        self._store(key, entry)
+        if self.disk is not None:
+            try:
+                self.disk.put(key, self._pack(entry))
+            except (IOError, OSError) as e:
+                print("WARNING: Could not write to macro xs disk cache: " + str(e))
+
+    def _store(self, key, entry):
+        if self.maxEntries <= 0:
+            return
+        self._entries[key] = entry
+        while len(self._entries) > self.maxEntries:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _pack(entry):
+        arrays = {'density': np.asarray(entry['density'])}
+        for group in ('macroProp', 'af', 'afF', 'wf'):
+            for name, value in entry[group].iteritems():
+                arrays[group + '/' + name] = np.asarray(value)
+        return arrays
+
+    @staticmethod
+    def _unpack(arrays):
+        entry = {'macroProp': {}, 'af': {}, 'afF': {}, 'wf': {}}
+        for name, value in arrays.iteritems():
+            if value.ndim == 0:
+                value = value.item()
+            else:
+                value.setflags(write=False)
+            if name == 'density':
+                entry['density'] = value
+            else:
+                group, name = name.split('/', 1)
+                entry[group][name] = value
+        return entry
+
+
+macroCache = MacroCache()
@@ -9,11 +9,35 @@ dir = os.path.dirname(os.path.abspath(__file__))
 # Given a directory, this script will look for all
 # .xs files.  It uses the readXS.py script to parse
 # the .xs files and converts them to a single HDF5 file
+#
+# Use the HDF5 file with materialMixxer.genMaterialDict('xsdefault.h5')
 ###
 
 def loadXS(inpath):
     return rxs.readXSFolder(inpath)
 
+
+def writeH5XS(xsdir, outfile):
+    """
+    Writes {isoName: {dataName: array}} to an HDF5 xs library, one group
+    per isotope.  Datasets are stored contiguous so they can be memory
+    mapped when read back.
+    """
+    h5f = h5py.File(outfile, 'w')
+    for isoName, isoXSdata in xsdir.iteritems():
+        writeH5Isotope(h5f, isoName, isoXSdata)
+    h5f.close()
+
+
+def writeH5Isotope(h5f, isoName, isoXSdata):
+    """
+    Adds one isotope group to an open HDF5 xs library.
+    """
+    grp = h5f.create_group(str(isoName))
+    for dataName, dataXS in isoXSdata.iteritems():
+        grp.create_dataset(str(dataName), data=dataXS)
+
+
 if __name__ == "__main__":
     """
     Converts .XS txt files to hdf5
@@ -32,10 +56,4 @@ if __name__ == "__main__":
     else:
         inpath = os.path.join(dir, "newXS")
 
-    h5f = h5py.File(outfile, 'w')
-    xsdir = loadXS(inpath)
-    for isoName, isoXSdata in xsdir.iteritems():
-        grp = h5f.create_group(str(isoName))
-        for dataName, dataXS in isoXSdata.iteritems():
-            grp.create_dataset(str(dataName), data=dataXS)
-    h5f.close()
+    writeH5XS(loadXS(inpath), outfile)
@@ -1,20 +1,29 @@
 import sys
-import scipy.interpolate as spi
 import numpy as np
 from readXSdatabase import readXSFolder
 from globalMatLib import matLib
-from copy import deepcopy
+from macroCache import macroCache, copyProps, isoFingerprint, xsFingerprint, xsHash
+import selfShield as ssh
+import xsTemperature as txs
+from copy import copy
 
 
 def genMaterialDict(xsFolder='./hw2'):
     '''
-    Updates the global matLib with all the xs data found in the XS directory
+    Updates the global matLib with all the xs data found in the XS directory.
+    xsFolder may also be an HDF5 xs library (see makeH5XS.py), isotopes are
+    then read on first use.
     '''
+    if xsFolder.endswith(('.h5', '.hdf5')):
+        isoNames = matLib.addH5Source(xsFolder)
+        print("Registered " + str(len(isoNames)) + " isotopes from xs library: " + xsFolder)
+        return
     myXsDict = readXSFolder(xsFolder)
     for matName in myXsDict.keys():
         props = myXsDict[matName]
         for prop in props:
             matLib[matName][prop] = myXsDict[matName][prop]
+        matLib.setFingerprint(matName, 'xs:' + xsFingerprint(matLib[matName]))
     print("Done Updating Materials.")
 
 
@@ -24,10 +33,16 @@ class mixedMat(object):
     Computes macroscopic cross sections, diffusion coeffs, ect.
     Input number densities in #/b-cm
     Input cross sections in barns
+
+    Mixed properties are looked up in / stored to the macroCache, keyed by
+    the number densities and the fingerprint of each isotope's micro data.
+
+    Isotopes with multi-temperature tables (see xsTemperature.py) are
+    interpolated to temperature [K]: one value for all isotopes or {iso: T}.
     '''
     Na = 6.02214129e23  # avagadros constant
 
-    def __init__(self, ndDict, wfFlag=False, matLib=matLib):
+    def __init__(self, ndDict, wfFlag=False, matLib=matLib, temperature=None):
         # Initilize mixedMat dicts
         self.macroProp = {}
         self.nDdict = {}
@@ -40,7 +55,12 @@ class mixedMat(object):
         except:
             print("A Requested material was not found in material library. FATALITY.")
             sys.exit()
-        self.microDat = materialData
+        # library data (every tabulated temperature)
+        self.libDat = materialData
+        self.libTags = {k: isoFingerprint(matLib, k) for k in ndDict.keys()}
+        self.temperature = {}
+        self.microDat, self.xsTags = {}, {}
+        self._interpTemperature(temperature)
         # If weight fracs are given, convert to atom frac and proceed as usual
         if wfFlag:
             self.wf = ndDict
@@ -52,12 +72,51 @@ class mixedMat(object):
         self._updateDB()
 
     def _updateDB(self):
+        key = self._compositionKey()
+        entry = macroCache.get(key)
+        if entry is not None:
+            self.macroProp = copyProps(entry['macroProp'])
+            self.af, self.afF, self.wf = dict(entry['af']), dict(entry['afF']), dict(entry['wf'])
+            self.density = entry['density']
+            return
         self.macroProp = {}
         self._computeAtomicFracs()
         self._computeMacroXsec()
         self._computeAvgProps()
         self._computeDensity()
         self._afToWf()
+        macroCache.put(key, {'macroProp': self.macroProp, 'af': dict(self.af), 'afF': dict(self.afF),
+                             'wf': dict(self.wf), 'density': self.density})
+
+    def _interpTemperature(self, temperature):
+        '''
+        Micro data of every isotope at its temperature.
+        '''
+        for material, data in self.libDat.iteritems():
+            if isinstance(temperature, dict):
+                T = temperature.get(material, self.temperature.get(material))
+            else:
+                T = temperature
+            self.microDat[material], self.xsTags[material] = \
+                txs.atTemperature(data, self.libTags[material], T)
+            self.temperature[material] = T
+
+    def setTemperature(self, temperature):
+        '''
+        Re-interpolate the multi-temperature isotopes from the library and
+        update the macroscopic properties.  Cheap for previously seen
+        (composition, temperature) pairs.  Self sheilding is not carried
+        over, sheild again after a temperature change.
+        '''
+        self._interpTemperature(temperature)
+        self._updateDB()
+
+    def _compositionKey(self):
+        '''
+        (isotope, exact number density, xs fingerprint) for every isotope.
+        '''
+        return tuple(sorted((material, float(self.nDdict[material]).hex(), self.xsTags[material])
+                            for material in self.microDat))
 
     def _numberDensityTable(self):
         '''
@@ -124,46 +183,37 @@ class mixedMat(object):
                 else:
                     pass
 
-    def _computeBackgroundXsec(self):
+    def _computeBackgroundXsec(self, tol=1e-6, maxIter=20):
         """
         Must be done after self.macroProp['Ntotal'] is defined.  i.e. after
         the material has been "mixed".
 
-        Computes sig_b_m = sum_n(N_n * sig_tn) / N_m
+        Computes sig_b_m = sum_n(N_n * f_n * sig_tn) / N_m
         background cross section for species m
-        sum over all other isotopes, n.
+        sum over all other isotopes, n, and the self sheilding factor (f)
+        of each isotope, iterated to convergence (see selfShield.py).
         """
-        for i, (material, data) in enumerate(self.microDat.iteritems()):
-            otherMatsTotMacXs = 0
-            for j, (ssmat, data2) in enumerate(self.microDat.iteritems()):
-                if ssmat != material and self.microDat[ssmat]['modBool']:
-                    otherMatsTotMacXs += self.nDdict[ssmat] * self.microDat[ssmat]['total']
-                else:
-                    pass
-            self.microDat[material]['sig_b'] = otherMatsTotMacXs / self.nDdict[material]
-        self._computeSelfSheildFactor()
-
-    def _computeSelfSheildFactor(self, dilutionGrid=np.array([1e5, 1e3, 1e2, 1e1, 1e0, 1e-1])):
-        """
-        Interpolates the self sheilding factor (ffactor) data for each isotope
-        in the mixture based on the isotope's background cross section.
-        """
-        dilutionGrid = np.append(dilutionGrid, 1e-5)
-        for i, (material, data) in enumerate(self.microDat.iteritems()):
-            self.microDat[material]['f'] = np.ones(len(self.microDat[material]['total']))
-            try:
-                if self.microDat[material]['resBool'] is True:
-                    for g, gffactors in enumerate(self.microDat[material]['ffactor']):
-                        gffactors = np.append(gffactors, gffactors[-1])
-                        # interpolate on log-transformed dilution grid
-                        fn_sig_b = spi.interp1d(np.log(dilutionGrid), gffactors, kind='linear', fill_value=1.0, bounds_error=False)
-                        self.microDat[material]['f'][g] = fn_sig_b(np.log(self.microDat[material]['sig_b'][g]))
-                else:
-                    print("Isotope: " + str(material) + " was not self shielded by user request.")
-            except:
+        materials = self.microDat.keys()
+        nG = len(self.microDat[materials[0]]['total'])
+        ffactor = np.ones((len(materials), nG, len(ssh.dilutionGrid)))
+        for i, material in enumerate(materials):
+            data = self.microDat[material]
+            if not data['resBool']:
+                print("Isotope: " + str(material) + " was not self shielded by user request.")
+            elif np.shape(data.get('ffactor')) == ffactor.shape[1:]:
+                ffactor[i] = data['ffactor']
+            else:
                 print("WARNING: No f-factor data availible in XS file. Setting f factor to 1.0 for iso: " + str(material))
+        f, sigb, iters = ssh.shieldFactors(np.array([[self.nDdict[m] for m in materials]]),
+                                           np.array([self.microDat[m]['total'] for m in materials]), ffactor,
+                                           [self.microDat[m]['modBool'] for m in materials],
+                                           [self.microDat[m]['resBool'] for m in materials],
+                                           tol=tol, maxIter=maxIter)
+        for i, material in enumerate(materials):
+            self.microDat[material]['sig_b'] = sigb[0, i]
+            self.microDat[material]['f'] = f[0, i]
 
-    def selfSheild(self, modBool={}, resAbsBool={}):
+    def selfSheild(self, modBool={}, resAbsBool={}, tol=1e-6, maxIter=20):
         """
         Multiply all micro cross sections by ss factor (ffactor) and
         recompute macroscopic cross sections.
@@ -183,19 +233,30 @@ class mixedMat(object):
         Need to figure out how to "undo" self sheilding, for instance, if we
         want to modify a mixed material (which has already been self sheilded) and
         self sheild _again_.
+
+        The background xs and f factors are iterated untill f changes by
+        less than tol, maxIter=1 gives the single pass, unsheilded sigma_0 result.
         """
-        ss_self = deepcopy(self)
+        # micro data dicts are copied, shielded xs replace (never modify) the
+        # shared library arrays
+        ss_self = copy(self)
+        ss_self.microDat = {material: dict(data) for material, data in self.microDat.iteritems()}
+        for attr in ('nD', 'nDdict', 'wf', 'af', 'afF', 'macroProp', 'libDat', 'libTags', 'temperature'):
+            setattr(ss_self, attr, dict(getattr(self, attr)))
         for i, (material, data) in enumerate(ss_self.microDat.iteritems()):
             ss_self.microDat[material]['modBool'] = modBool.pop(material, True)  # defaults to true
             ss_self.microDat[material]['resBool'] = resAbsBool.pop(material, True)
-        ss_self._computeBackgroundXsec()
+        ss_self._computeBackgroundXsec(tol, maxIter)
         for i, (material, data) in enumerate(ss_self.microDat.iteritems()):
-            ss_self.microDat[material]['total'] *= ss_self.microDat[material]['f']
-            ss_self.microDat[material]['skernel'] *= ss_self.microDat[material]['f']
-            try:
-                ss_self.microDat[material]['nufission'] *= ss_self.microDat[material]['f']
-            except:
-                pass
+            data['total'] = data['total'] * data['f']
+            data['skernel'] = data['skernel'] * data['f']
+            if 'nufission' in data:
+                data['nufission'] = data['nufission'] * data['f']
+        # shielded data depends on the composition it was shielded in
+        composition = self._compositionKey()
+        ss_self.xsTags = {material: xsHash((self.xsTags[material], 'ss', data['modBool'],
+                                            data['resBool'], tol, maxIter, composition))
+                          for material, data in ss_self.microDat.iteritems()}
         ss_self._updateDB()
         return ss_self
 
@@ -264,6 +325,10 @@ class mixedMat(object):
                 # We've got a new isotope on our hands!
                 self.nDdict[material] = nDensity
                 self.microDat[material] = other.microDat[material]
+                self.xsTags[material] = other.xsTags[material]
+                self.libDat[material] = other.libDat[material]
+                self.libTags[material] = other.libTags[material]
+                self.temperature[material] = other.temperature[material]
         # update macro property database
         self._updateDB()
         return self
@@ -2,25 +2,29 @@ import numpy as np
 import re
 
 
+# both patterns start with a literal newline, which keeps the regex scan fast
+xsHeaders = re.compile(r'\n(TOTAL|CHI|NUFISSION|SKERNEL|FFACTOR)[^\n]*\n')
+blankLine = re.compile(r'\n[ \t\r]*\n')
+
+
 def readXS(inFileName, tableFormat='dumb'):
     '''
     Populate a dictionary of material properties given a
     file formatted in a basic xs. format.
+
+    Tables start on the line after their header and end at the first blank
+    line.  Each table is converted with a single np.fromstring call.
     '''
     propsDict = {}
-    reFlags = {'total': "TOTAL",
-               'chi': "CHI",
-               'nufission': "NUFISSION",
-               'skernel': "SKERNEL",
-               'ffactor': "FFACTOR"
-               }
-    for key, val in reFlags.iteritems():
-        reFlags[key] = re.compile(val)
-    fileLineList = fileToList(inFileName)
-    for i, line in enumerate(fileLineList):
-        check = checkLine(line, reFlags)
-        if check:
-            propsDict[check[0]] = table2NP(i, fileLineList)
+    with open(inFileName, 'rb') as f:
+        text = '\n' + f.read()
+    headers = list(xsHeaders.finditer(text))
+    for i, header in enumerate(headers):
+        start = header.end()
+        stop = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+        # search from the newline closing the header line to catch empty tables
+        end = blankLine.search(text, start - 1, stop)
+        propsDict[header.group(1).lower()] = block2NP(text[start:end.start() if end else stop])
     # Fix issues with formatting and return
     # This could support different table structures, all you need is
     # a formatting function to take raw ascii table to standard array/matrix
@@ -32,6 +36,22 @@ def readXS(inFileName, tableFormat='dumb'):
     return propsDict
 
 
+def block2NP(block):
+    '''
+    Converts a whitespace delimited ascii table to a 2D numpy array.  The
+    number of columns is taken from the first row.  Falls back to row by
+    row parsing (table2NP) if the rows are ragged.
+    '''
+    firstRow = block.split('\n', 1)[0]
+    nCols = len(firstRow.split())
+    if nCols < 2:
+        return np.array([])
+    table = np.fromstring(block, sep=' ')
+    if table.size % nCols != 0 or table.size // nCols != block.strip().count('\n') + 1:
+        return table2NP(-1, block.splitlines())
+    return table.reshape(-1, nCols)
+
+
 def fixNJOYdata(propsDict):
     '''
     Takes ME338f class formatted data and generates numpy arrays.
@@ -71,8 +91,8 @@ def matrixSkernel(skernelTable, Ngroups):
     """
     NlegMoments = np.shape(skernelTable)[1] - 2
     skernelMatrix = np.zeros((NlegMoments, Ngroups, Ngroups))
-    for row in skernelTable:
-        skernelMatrix[:, int(row[1]) - 1, int(row[0]) - 1] = row[2:]
+    rows, cols = skernelTable[:, 1].astype(int) - 1, skernelTable[:, 0].astype(int) - 1
+    skernelMatrix[:, rows, cols] = skernelTable[:, 2:].T
     skernelMatrix = skernelMatrix[:, ::-1, ::-1]
     return skernelMatrix
 
@@ -88,7 +108,7 @@ def table2NP(i, fileLines):
         if len(npArray) == 1 or len(npArray) == 0:
             break
         else:
-            table.append(np.fromstring(line.strip(), sep=' '))
+            table.append(npArray)
     return np.array(table)
 
 
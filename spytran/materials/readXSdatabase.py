@@ -3,6 +3,7 @@
 #
 import os
 import readXS
+from xsTemperature import stackTemperatures
 
 
 def readXSFolder(folderPath):
@@ -20,7 +21,8 @@ def readXSFolder(folderPath):
             else:
                 pass
     print("Cross section database sucessfully loaded.")
-    return xsTables
+    # <iso>_<T>K.xs tables become one multi-temperature entry
+    return stackTemperatures(xsTables)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,66 @@
+#!/usr/bin/python
+#
+# Truncated and banded scattering kernels.
+#
+# Nskernel is stored dense as (legOrder + 1, nG, nG) with
+# skernel[l, g, g'] the l-th legendre moment of the g' -> g transfer.  Most
+# materials have no upscatter in the fast groups and exactly zero high
+# order moments (zero columns in the .xs SKERNEL tables), so the solvers
+# only evaluate:
+#   - moments up to the highest nonzero one (capped by the solver's order)
+#   - per destination group, the band of source groups with nonzero transfer
+
+import numpy as np
+
+
+def effectiveLegOrder(skernel, tol=0.):
+    """
+    Highest legendre moment with a transfer above tol * max|sigma_s0|.
+    """
+    peak = np.max(np.abs(skernel), axis=(1, 2))
+    nonzero = np.where(peak > tol * peak[0])[0]
+    return int(nonzero[-1]) if len(nonzero) else 0
+
+
+def _band(mask):
+    """
+    [lo, hi) column range holding the True entries of each row, (0, 0) for
+    empty rows.
+    """
+    anyNz = np.any(mask, axis=1)
+    lo = np.where(anyNz, np.argmax(mask, axis=1), 0)
+    hi = np.where(anyNz, mask.shape[1] - np.argmax(mask[:, ::-1], axis=1), 0)
+    return lo.astype(np.int64), hi.astype(np.int64)
+
+
+class ScatterKernel(object):
+    """
+    Scattering kernel truncated to its effective legendre order, with the
+    nonzero group to group band of every destination and source group.
+    dense is the truncated (legOrder + 1, nG, nG) kernel, a view of
+    skernel unless tol > 0: then it is a copy with the entries
+    |sigma| <= tol * max|sigma_s0| zeroed, so every solver (dense or banded
+    loops) sees the same kernel.
+    """
+    def __init__(self, skernel, maxLegOrder=None, tol=0.):
+        skernel = np.asarray(skernel)
+        self.legOrder = effectiveLegOrder(skernel, tol)
+        if maxLegOrder is not None:
+            self.legOrder = min(self.legOrder, maxLegOrder)
+        self.nG = skernel.shape[1]
+        self.dense = skernel[:self.legOrder + 1]
+        keep = np.abs(self.dense) > tol * np.max(np.abs(skernel[0]))
+        if tol > 0:
+            self.dense = np.where(keep, self.dense, 0.)
+        mask = np.any(keep, axis=0)
+        # source group band of each destination group and vice versa
+        self.rowLo, self.rowHi = _band(mask)
+        self.colLo, self.colHi = _band(mask.T)
+        self.upscatter = bool(np.any(np.triu(mask, 1)))
+
+    @property
+    def band(self):
+        """
+        (rowLo, rowHi, colLo, colHi), see scattSource.scatterSource.
+        """
+        return self.rowLo, self.rowHi, self.colLo, self.colHi
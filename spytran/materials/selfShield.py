@@ -0,0 +1,73 @@
+#!/usr/bin/python
+#
+# Bondarenko self shielding.
+#
+# f-factors are tabulated per isotope and group on a grid of background
+# (dilution) cross sections, sigma_0.  The background cross section of
+# isotope m in a mixture
+#
+#   sigma_0,m = sum_{n != m} N_n * f_n * sigma_t,n / N_m
+#
+# depends on the shielded totals of the other isotopes, so sigma_0 and f are
+# iterated to convergence.  Everything is vectorized over materials,
+# isotopes and groups.
+
+import numpy as np
+
+# dilution grid [b] of the ffactor tables (see utils/njoybatchGRP*.sh)
+dilutionGrid = np.array([1e5, 1e3, 1e2, 1e1, 1e0, 1e-1])
+
+
+def interpFfactor(ffactor, sigb, dilutionGrid=dilutionGrid):
+    """
+    Interpolate f-factors linearly in log(sigma_0).
+    ffactor is (..., nDil) on the descending dilutionGrid, sigb broadcasts
+    against ffactor[..., 0].  The last f-factor is held down to 1e-5 b,
+    outside of [1e-5 b, dilutionGrid[0]] f = 1.
+    """
+    xp = np.log(np.append(dilutionGrid, 1e-5))[::-1]
+    fp = np.concatenate((ffactor, ffactor[..., -1:]), axis=-1)[..., ::-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = np.log(sigb)
+    shape = np.broadcast(x, fp[..., 0]).shape
+    x = np.broadcast_to(x, shape)
+    fp = np.broadcast_to(fp, shape + fp.shape[-1:])
+    hi = np.clip(np.searchsorted(xp, x), 1, len(xp) - 1)
+    lo = hi - 1
+    fLo = np.take_along_axis(fp, lo[..., None], axis=-1)[..., 0]
+    fHi = np.take_along_axis(fp, hi[..., None], axis=-1)[..., 0]
+    with np.errstate(invalid='ignore'):
+        f = fLo + (x - xp[lo]) * (fHi - fLo) / (xp[hi] - xp[lo])
+    return np.where((x >= xp[0]) & (x <= xp[-1]), f, 1.0)
+
+
+def shieldFactors(nD, total, ffactor, modMask=None, resMask=None, dilutionGrid=dilutionGrid,
+                  tol=1e-6, maxIter=20):
+    """
+    Self shielding factors of every isotope in every material.
+
+    nD       (nMat, nIso) number densities
+    total    (nIso, nG) unshielded total xs
+    ffactor  (nIso, nG, nDil) f-factor tables (ones for unshielded isotopes)
+    modMask  (nIso,) isotopes contributing to the background xs, default all
+    resMask  (nIso,) isotopes to shield, default all
+
+    maxIter=1 is the classic single pass with unshielded totals in sigma_0.
+    Returns f (nMat, nIso, nG), sigma_0 (nMat, nIso, nG), iterations taken.
+    """
+    nD = np.atleast_2d(np.asarray(nD, dtype=float))
+    nIso = nD.shape[1]
+    modMask = np.ones(nIso, dtype=bool) if modMask is None else np.asarray(modMask, dtype=bool)
+    resMask = np.ones(nIso, dtype=bool) if resMask is None else np.asarray(resMask, dtype=bool)
+    modND = (nD * modMask)[:, :, None]
+    f = np.ones(nD.shape + total.shape[-1:])
+    for i in range(maxIter):
+        rxn = modND * total * f
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sigb = (np.sum(rxn, axis=1)[:, None, :] - rxn) / nD[:, :, None]
+        fNew = np.where(resMask[:, None], interpFfactor(ffactor, sigb, dilutionGrid), 1.0)
+        resid = np.max(np.abs(fNew - f))
+        f = fNew
+        if resid <= tol:
+            break
+    return f, sigb, i + 1
@@ -0,0 +1,116 @@
+#!/usr/bin/python
+#
+# Multi-temperature cross section tables.
+#
+# An isotope evaluated at several temperatures carries a 'temperatures'
+# array [K] and a leading temperature axis on each of its xs tables:
+#   {'temperatures': (nT,), 'total': (nT, nG), 'skernel': (nT, nLeg, nG, nG), ...}
+# Isotopes without 'temperatures' are single temperature (300K) data and are
+# used as is at any temperature.
+#
+# In an .xs directory the tables of one isotope are named <iso>_<T>K.xs,
+# e.g. u238_300K.xs, u238_600K.xs.  A plain <iso>.xs next to them is taken
+# as the 300K table.
+#
+# Tables are interpolated linearly in sqrt(T).  Interpolated isotope data is
+# cached per (library fingerprint, temperature).
+
+import re
+from collections import OrderedDict
+import numpy as np
+from macroCache import xsHash
+
+# tables with a leading temperature axis
+tempKeys = ('total', 'skernel', 'nufission', 'chi', 'nu', 'ffactor')
+defaultTemperature = 300.
+tempNameRe = re.compile(r'^(.+)_(\d+(?:\.\d*)?)[kK]$')
+
+# (fingerprint, T) -> interpolated isotope data
+_interpCache = OrderedDict()
+interpCacheSize = 128
+
+
+def splitTemperature(name):
+    """
+    'u238_600K' -> ('u238', 600.0), 'u238' -> ('u238', None)
+    """
+    match = tempNameRe.match(name)
+    if match:
+        return match.group(1), float(match.group(2))
+    return name, None
+
+
+def stackTemperatures(xsTables):
+    """
+    Merges {<iso>_<T>K: xs data} entries into one multi-temperature entry
+    per isotope.  Other entries are passed through.
+    """
+    byIso = {}
+    for name, data in xsTables.iteritems():
+        iso, T = splitTemperature(name)
+        byIso.setdefault(iso, {})[T] = data
+    stacked = {}
+    for iso, tables in byIso.iteritems():
+        if tables.keys() == [None]:
+            stacked[iso] = tables[None]
+            continue
+        if None in tables:
+            tables[defaultTemperature] = tables.pop(None)
+        temperatures = sorted(tables.keys())
+        isoData = {'temperatures': np.array(temperatures)}
+        for key in set.intersection(*[set(tables[T].keys()) for T in temperatures]):
+            values = [tables[T][key] for T in temperatures]
+            if key in tempKeys:
+                isoData[key] = np.array(values)
+            else:
+                isoData[key] = values[0]
+        for key in set.union(*[set(tables[T].keys()) for T in temperatures]) - set(isoData.keys()):
+            print("WARNING: " + str(key) + " is not tabulated at every temperature for iso: " + str(iso))
+        stacked[iso] = isoData
+    return stacked
+
+
+def interpWeights(temperatures, T):
+    """
+    Bracketing table indices and weight of the upper table, linear in
+    sqrt(T).  T is clamped to the tabulated range.
+    """
+    sqrtT = np.sqrt(temperatures)
+    x = np.sqrt(T)
+    if x < sqrtT[0] or x > sqrtT[-1]:
+        print("WARNING: T=" + str(T) + "K outside of the tabulated range, clamping.")
+        x = np.clip(x, sqrtT[0], sqrtT[-1])
+    if len(sqrtT) == 1:
+        return 0, 0, 0.
+    hi = int(np.clip(np.searchsorted(sqrtT, x), 1, len(sqrtT) - 1))
+    lo = hi - 1
+    return lo, hi, (x - sqrtT[lo]) / (sqrtT[hi] - sqrtT[lo])
+
+
+def atTemperature(isoData, fingerprint, T=None):
+    """
+    Isotope data at temperature T [K] and its fingerprint.
+    Single temperature data is returned unchanged.  T=None picks the lowest
+    tabulated temperature.
+    """
+    if 'temperatures' not in isoData:
+        return isoData, fingerprint
+    temperatures = np.asarray(isoData['temperatures'])
+    T = float(temperatures[0] if T is None else T)
+    key = (fingerprint, T)
+    if key in _interpCache:
+        _interpCache[key] = _interpCache.pop(key)
+        return _interpCache[key], xsHash(key)
+    lo, hi, w = interpWeights(temperatures, T)
+    data = {}
+    for name, value in isoData.iteritems():
+        if name == 'temperatures':
+            continue
+        elif name in tempKeys:
+            data[name] = (1. - w) * value[lo] + w * value[hi]
+        else:
+            data[name] = value
+    _interpCache[key] = data
+    while len(_interpCache) > interpCacheSize:
+        _interpCache.popitem(last=False)
+    return data, xsHash(key)
@@ -17,18 +17,19 @@
 #  kernprof -lv main.py
 #
 
+import sys
+import select
+import traceback
+import multiprocessing
+from multiprocessing.sharedctypes import RawArray
 import numpy as np
 import materials.materialMixxer as mx
+from materials.scatterKernel import ScatterKernel
 import cyth.sn1Dcell as snc1d
-from functools import partial
+import cyth.kernels as kern
+from utils.ordReader import gaussLegQuadSet
+from utils.quadrature import legendreTable
 np.set_printoptions(linewidth=200)  # set print to screen opts
-try:
-    #from cyth.scattSrc import sweepOrd
-    raise
-except:
-    print("WARNING: Cythonized scattering source code does not function.")
-    print("WARNING: Fallback to pure python implementation.")
-    from cyth.scattSource import sweepOrd
 
 
 class Domain(object):
@@ -75,15 +76,17 @@ class SubDomain(object):
     Inner iterations (i.e. sweeps through energy, angle, and space) are performed
     on each subdomain.  Boundary conditions are specified on each subdomain.
 
-    In the case of multi-core: a special subdomain-subdomain boundary condition
-    must be specified to pass information back and forth across subdomains after
-    each inner iteration is performed
+    In the case of multi-core: see decompose().  The sweep tree is split into
+    partitions swept by worker processes, interface angular fluxes are passed
+    between neighboring partitions through shared memory.
     """
     def __init__(self):
         self.regions = []    # contains mesh regions
         self.sweepTree = []  # constains (region, cell) tuples
+        self.sweepRuns = []  # contains (region, cell index array) runs of the sweepTree
         self.depth = 0
         self.keff = 1.0
+        self._workers = []   # (process, pipe) pairs when decomposed
 
     def addRegion(self, mesh1D):
         self.regions.append(mesh1D)
@@ -98,35 +101,34 @@ class SubDomain(object):
         cellDistanceArray = self._computeDistance(minXPos, minXNodeID)  # distance of all cells to the "min X node"
         # sort distance array based on distances to min X cell
         cellDistanceArray = cellDistanceArray[cellDistanceArray[:, 2].argsort()]
-        # cellDistanceArray = np.sort(cellDistanceArray, axis=2)
-        for w, cellD in enumerate(cellDistanceArray):
-            self.sweepTree.append((int(cellD[0]), int(cellD[1])))
+        self.sweepTree = [(int(cellD[0]), int(cellD[1])) for cellD in cellDistanceArray]
+        self.sweepRuns = _buildSweepRuns(self.sweepTree)
 
     def getTotalCellsInDomain(self):
         totCells = 0
         for j, region in enumerate(self.regions):
-            totCells += len(region.cells)
+            totCells += region.nCells
         return totCells
 
     def _computeDistance(self, minXPos, minXNodeID):
-        distArray, w = np.zeros((self.getTotalCellsInDomain(), 3)), 0
+        distArray = []
         for j, region in enumerate(self.regions):
-            for i, cell in enumerate(region.cells):
-                distArray[w, :] = np.array([j, i, abs(minXPos - cell.centroid)])
-                w += 1
-        return distArray
+            regionDist = np.zeros((region.nCells, 3))
+            regionDist[:, 0] = j
+            regionDist[:, 1] = np.arange(region.nCells)
+            regionDist[:, 2] = np.abs(minXPos - region.centroids)
+            distArray.append(regionDist)
+        return np.vstack(distArray)
 
     def _findMinX(self):
         minXPos = 1.e10
         # regions are indexed by j
         # within a region, cells are indexed by i
         for j, region in enumerate(self.regions):
-            for i, cell in enumerate(region.cells):
-                if cell.centroid < minXPos:
-                    minXNodeID = (j, i)
-                    minXPos = cell.centroid
-                else:
-                    pass
+            i = np.argmin(region.centroids)
+            if region.centroids[i] < minXPos:
+                minXNodeID = (j, i)
+                minXPos = region.centroids[i]
         return minXPos, minXNodeID
 
     def setKeff(self, k):
@@ -137,17 +139,107 @@ class SubDomain(object):
     def postSI(self):
         self.depth = 0
 
+    def decompose(self, nParts, mode='pipeline', grpChunks=None):
+        """
+        Partition the subdomain across nParts worker processes.  Call after
+        buildSweepTree().  Each partition is a contiguous piece of the sweep
+        tree holding about the same number of cells.  Flux and source arrays
+        of all regions are moved into shared memory, every worker computes
+        sources and sweeps only its own cells.
+
+        mode:
+            'pipeline': a partition waits for the angular flux leaving its
+                upstream neighbor, one chunk of energy groups at a time, so
+                downstream partitions start on the first chunk while upstream
+                partitions sweep the next.  Results are identical to the serial
+                sweep.
+            'jacobi': block Jacobi in space.  All partitions sweep at once
+                using the interface fluxes of the previous scattering
+                iteration, so flux crossing an interface is picked up one
+                scattering iteration later.  Converges to the serial solution,
+                usually in a few more iterations.
+        grpChunks: number of energy group chunks pipelined (default nParts).
+
+        Call close() to stop the workers.
+        """
+        if mode not in ('pipeline', 'jacobi'):
+            sys.exit("FATALITY: Unknown decomposition mode: " + str(mode) + ". Use 'pipeline' or 'jacobi'.")
+        if not self.sweepRuns:
+            self.buildSweepTree()
+        self.close()
+        for region in self.regions:
+            region._shareStorage()
+        parts = _partitionRuns(self.sweepRuns, nParts)
+        nParts, nG = len(parts), self.regions[0].nG
+        o0, o1 = self.regions[0].sweepCoeffs[1][:2]
+        # interface angular fluxes [buffer, interface, direction, group, ordinate]
+        # interface p sits between partitions p - 1 and p.
+        self._iface = _sharedZeros((2, nParts + 1, 2, nG, o1 - o0))
+        self._ifaceBuf = 0
+        grpChunks = min(grpChunks or nParts, nG)
+        chunks = [slice(g[0], g[-1] + 1) for g in np.array_split(np.arange(nG), grpChunks)]
+        # first partition along each sweep direction that holds a boundary cell
+        hasBC = [any(np.any(np.in1d(np.arange(i0, i1), self.regions[j].bcCells))
+                     for j, i0, i1 in part) for part in parts]
+        bcPart = {1: hasBC.index(True) if any(hasBC) else nParts - 1,
+                  2: nParts - 1 - hasBC[::-1].index(True) if any(hasBC) else 0}
+        sems = {}
+        if mode == 'pipeline':
+            for f in (1, 2):
+                for p in range(1, nParts):
+                    for k in range(len(chunks)):
+                        sems[(f, p, k)] = multiprocessing.Semaphore(0)
+        for p in range(nParts):
+            parentConn, childConn = multiprocessing.Pipe()
+            proc = multiprocessing.Process(target=_decompWorker,
+                                           args=(self, parts, p, mode, chunks, sems, bcPart, childConn))
+            proc.daemon = True
+            proc.start()
+            self._workers.append((proc, parentConn))
+
+    def close(self):
+        """
+        Stop the worker processes started by decompose().  The subdomain
+        may still be swept serially afterwards.
+        """
+        for proc, conn in self._workers:
+            try:
+                conn.send(('stop',))
+            except (IOError, OSError):
+                pass
+        for proc, conn in self._workers:
+            proc.join(5.0)
+            if proc.is_alive():
+                proc.terminate()
+        self._workers = []
+
+    def _sweepDecomposed(self, stopI, overRlx):
+        if self.depth == 0:
+            # no interface flux enters the first scattering iteration
+            self._iface[self._ifaceBuf] = 0.
+        keffs = [region.keff for region in self.regions]
+        for proc, conn in self._workers:
+            conn.send(('sweep', self.depth, overRlx, stopI, keffs, self._ifaceBuf))
+        pending = dict((conn.fileno(), conn) for proc, conn in self._workers)
+        while pending:
+            for fd in select.select(list(pending), [], [])[0]:
+                err = pending.pop(fd).recv()
+                if err is not None:
+                    self.close()
+                    sys.exit("FATALITY: Subdomain worker failed.\n" + err)
+        self._ifaceBuf = 1 - self._ifaceBuf
+        for j, region in enumerate(self.regions):
+            region._checkPositivity()
+        self.depth += 1
+        return self._checkResid()
+
     def sweepSubDomain(self, stopI=2, overRlx=1.0):
+        if self._workers:
+            return self._sweepDecomposed(stopI, overRlx)
         converged, i = False, 0
         for j, region in enumerate(self.regions):
-            sweepOrdRed = partial(sweepOrd, skernel=region.skernel, chiNuFission=region.chiNuFission,
-                                  keff=region.keff, depth=self.depth, overRlx=1.0)
-            map(sweepOrdRed, region.cells)
-            # #### DEPRECIATED ####
-            #for i, cell in enumerate(region.cells):
-                # compute the mth scattering source
-            #    sweepOrd(cell, region.skernel, region.chiNuFission, self.keff, self.depth)
-            # ### DEPRECIATED ####
+            # compute the mth scattering source
+            region._computeSource(self.depth, overRlx)
         while not converged:
             self._sweepDir(1)
             self._sweepDir(2)
@@ -155,6 +247,8 @@ class SubDomain(object):
             if i >= stopI:
                 # max number of space-angle sweeps to perform
                 converged = True
+        for j, region in enumerate(self.regions):
+            region._checkPositivity()
         self.depth += 1     # increment scattering source iter
         return self._addOrdFlux()  # add mth scattered flux to the running total
 
@@ -163,8 +257,10 @@ class SubDomain(object):
         add Nth collided ord flux to running total
         '''
         for j, region in enumerate(self.regions):
-            for i, cell in enumerate(region.cells):
-                cell.sumOrdFlux()
+            region._sumOrdFlux()
+        return self._checkResid()
+
+    def _checkResid(self):
         if self.depth >= 1. and np.mod(self.depth, 5) == 0:
             return self.computeResid()
         else:
@@ -178,67 +274,28 @@ class SubDomain(object):
         f is either 1 or 2 in 1D
         1 is left cell face,  2 is right face
         """
-        lastCellFaceVal = np.zeros((self.regions[0].cells[0].nG,
-                                    self.regions[0].cells[0].sNords))
         if f == 2:
-            sweepTree = reversed(self.sweepTree)
+            sweepRuns = [(self.regions[j], cellIdx[::-1]) for j, cellIdx in reversed(self.sweepRuns)]
         else:
-            sweepTree = self.sweepTree
-        blowoff = False
-        for j, i in sweepTree:
-            cell = self.regions[j].cells[i]
-            if hasattr(cell, 'boundaryCond') and not blowoff:
-                cell.applyBC(self.depth)
-                blowoff = True
-            else:
-                # Interior cell
-                cell.ordFlux[:, f, :] = lastCellFaceVal[:, :]
-            # Only sweep through ordinates that have a component in same direction as
-            # current sweep dir. Filter ords by dot product
-            dotDir = cell.sNmu * cell.faceNormals[f - 1]
-            ordsInSweepDir = np.where(dotDir < 0.)
-            for o in np.arange(cell.sNords)[ordsInSweepDir]:
-                cell.ordFlux[:, 0, o] = (cell.ordFlux[:, f, o] + self.regions[j].deltaX * cell.qin[:, 0, o] / (2. * np.abs(cell.sNmu[o]))) / \
-                    (1. + self.regions[j].totalXs * self.regions[j].deltaX / (2. * np.abs(cell.sNmu[o])))
-                if f == 1:
-                    cell.ordFlux[:, 2, o] = 2. * cell.ordFlux[:, 0, o] - cell.ordFlux[:, f, o]
-                    lastCellFaceVal[:, o] = cell.ordFlux[:, 2, o]
-                elif f == 2:
-                    cell.ordFlux[:, 1, o] = 2. * cell.ordFlux[:, 0, o] - cell.ordFlux[:, f, o]
-                    lastCellFaceVal[:, o] = cell.ordFlux[:, 1, o]
-            if np.any(cell.ordFlux[:, :, :] < 0.0):
-                #print("WARNING: Negative flux detected! Refine mesh in region #:" + str(j))
-                maxStepSize = 2. * np.min(np.abs(cell.sNmu)) * min(1. / self.regions[j].totalXs)
-                #print("Max Step size in 1D: " + str(maxStepSize))
-                # automatically gen refine factor: TODO: auto refine mesh
-                # refineFactor = self.regions[j].deltaX / maxStepSize
-                #raise Exception('coarse', refineFactor)
+            sweepRuns = [(self.regions[j], cellIdx) for j, cellIdx in self.sweepRuns]
+        _sweepRuns(sweepRuns, f, self.depth)
 
     def getSource(self):
-        source = []
-        for j, region in enumerate(self.regions):
-            for i, cell in enumerate(region.cells):
-                source.append(cell.qin)
-        return np.array(source)
+        return np.concatenate([region.qin for region in self.regions])
 
     def getOrdFlux(self):
         """
         getter for all groups and ordiante fluxes
         TODO: interate over sweep tree rather than over dummy lists
         """
-        totOrdFlux = []
-        for j, region in enumerate(self.regions):
-            for i, cell in enumerate(region.cells):
-                totOrdFlux.append(cell.totOrdFlux)
-        return np.array(totOrdFlux)
+        return np.concatenate([region.totOrdFlux for region in self.regions])
 
     def getAbsRate(self):
         absRate = []
         for j, region in enumerate(self.regions):
-            for i, cell in enumerate(region.cells):
-                absRate.append(np.sum(cell.getTotScalarFlux() *
-                                      (region.totalXs - np.sum(region.skernel[0, :, :], axis=0))))
-        return np.array(absRate)
+            absXs = region.totalXs - np.sum(region.skernel[0, :, :], axis=0)
+            absRate.append(np.sum(region.getScalarFlux() * absXs, axis=1))
+        return np.concatenate(absRate)
 
     def fissionSrc(self):
         return np.dot(self.nuFission, self.getCellWidths() * self.getScalarFlux().T)
@@ -252,38 +309,21 @@ class SubDomain(object):
             maskedRegions = [self.regions[i] for i in targetRegions]
         else:
             maskedRegions = self.regions
-        totScalarFlux = []
-        for j, region in enumerate(maskedRegions):
-            for i, cell in enumerate(region.cells):
-                totScalarFlux.append(cell.getTotScalarFlux())
-        totScalarFlux = np.array(totScalarFlux)
+        totScalarFlux = np.concatenate([region.getScalarFlux() for region in maskedRegions])
         #return totScalarFlux / np.sum(totScalarFlux)  # norm flux to 1.
         return totScalarFlux
 
     def computeResid(self):
-        residVec = []
-        for j, region in enumerate(self.regions):
-            for i, cell in enumerate(region.cells):
-                residVec.append(cell.getFluxRatio())
-        residVec = np.array(residVec)
-        resid = np.max(residVec)
+        resid = np.max(np.concatenate([region.getFluxRatio() for region in self.regions]))
         print("Scattering Iteration: " + str(self.depth) +
               ".   Flux Residual= " + str("%.5e" % resid))
         return resid
 
     def getCellWidths(self):
-        deltaXs = []
-        for j, region in enumerate(self.regions):
-            for i, cell in enumerate(region.cells):
-                deltaXs.append(cell.deltaX)
-        return np.array(deltaXs)
+        return np.concatenate([region.getCellWidths() for region in self.regions])
 
     def getCentroids(self):
-        centroids = []
-        for j, region in enumerate(self.regions):
-            for i, cell in enumerate(region.cells):
-                centroids.append(cell.centroid)
-        return np.array(centroids)
+        return np.concatenate([region.getCentroids() for region in self.regions])
 
 
 class Mesh1Dsn(object):
@@ -293,6 +333,24 @@ class Mesh1Dsn(object):
     setup and run only using this class.
     Provides methods to perform scattering and space-angle sweeps on the mesh.
 
+    Angular fluxes and sources of all cells are stored in contiguous
+    (nCells, nGroups, 3, sNords) arrays and updated by the mesh level kernels
+    in cyth.kernels.  Position 0 on the third axis is the cell center,
+    1 the left face and 2 the right face.  The Cell1DSn objects in self.cells
+    operate on views into these arrays.
+
+    The spatial closure is chosen with the scheme kwarg:
+        'dd': diamond difference (default).  Goes negative once cells are
+              more than ~2 mean free paths wide.
+        'sc': step characteristic.  Positive for any cell width.
+        'ld': linear discontinuous.  Carries a linear flux shape in each cell,
+              accurate in optically thick cells.
+
+    The scattering kernel is truncated to the material's highest nonzero
+    legendre moment and evaluated over its nonzero group bands only (see
+    materials/scatterKernel.py).  skernelTol > 0 also drops transfers below
+    skernelTol * max(sigma_s0).
+
     For multi-regoin problems see the subDomain class, which combines multiple
     mesh regions together.
     """
@@ -300,13 +358,19 @@ class Mesh1Dsn(object):
         sN = kwargs.pop("sN", 2)
         nGrps = kwargs.pop("gN", 10)
         legO = kwargs.pop("lN", 8)
+        self.scheme = kwargs.pop("scheme", "dd")
+        if self.scheme not in ('dd', 'sc', 'ld'):
+            sys.exit("FATALITY: Unknown spatial scheme: " + str(self.scheme) + ". Use 'dd', 'sc' or 'ld'.")
         #vSource = kwargs.pop("source", None)
         self.keff = 1.0
         self.deltaX = deltaX
         self.depth = 0  # scattering source iteration
         #
         self.totalXs = material.macroProp['Ntotal']
-        self.skernel = material.macroProp['Nskernel']
+        # only the nonzero legendre moments (up to lN) and group bands
+        self.scatterKernel = ScatterKernel(material.macroProp['Nskernel'], maxLegOrder=legO,
+                                           tol=kwargs.pop("skernelTol", 0.))
+        self.skernel = self.scatterKernel.dense
         if 'chi' in material.macroProp.keys():
             self.nuFission = material.macroProp['Nnufission']
             self.chiNuFission = np.dot(np.array([material.macroProp['chi']]).T,
@@ -316,11 +380,67 @@ class Mesh1Dsn(object):
             self.nuFission = None
             self.chiNuFission = None
             src = kwargs.pop("source", None)
+        self.multiplying = self.chiNuFission is not None
+        #
+        # quadrature, shared by all cells
+        quadSet = gaussLegQuadSet(sN)
+        self.sNords, self.nG, self.maxLegOrder = sN, nGrps, legO
+        self.sNmu, self.wN = quadSet[0], quadSet[1]
+        self.legArray = legendreTable(sN, legO)
+        self._wLeg = self.wN * self.legArray
+        self._initSweepCoeffs()
+        #
+        # mesh wide flux and source storage
+        self.centroids = np.arange(bounds[0], bounds[1], deltaX)
+        self.nCells = len(self.centroids)
+        self.ordFlux = np.ones((self.nCells, nGrps, 3, sN))     # initial flux guess
+        self.totOrdFlux = np.ones((self.nCells, nGrps, 3, sN))
+        self.qin = np.zeros((self.nCells, nGrps, 3, sN))
+        if self.scheme == 'ld':
+            # spatial slope moments of the cell centered flux and source
+            self.ordFluxSlope = np.zeros((self.nCells, nGrps, sN))
+            self.totOrdFluxSlope = np.zeros((self.nCells, nGrps, sN))
+            self.qinSlope = np.zeros((self.nCells, nGrps, sN))
+        self._negFluxWarned = False
         # initilize all cells in the mesh.
         self.cells = []
-        for i, pos in enumerate(np.arange(bounds[0], bounds[1], deltaX)):
+        for i, pos in enumerate(self.centroids):
             #src = self.sourceExapnder(pos, src, vSource)
-            self.cells.append(snc1d.Cell1DSn(pos, deltaX, nGrps, legO, sN, source=src))
+            self.cells.append(snc1d.Cell1DSn(pos, deltaX, nGrps, legO, sN, source=src,
+                                             quadSet=quadSet, legArray=self.legArray,
+                                             storage=(self.ordFlux[i], self.totOrdFlux[i], self.qin[i])))
+        if type(src) is np.ndarray:
+            self.S = src
+        else:
+            self.S = np.zeros((nGrps, 3, sN))
+        self.bcCells = []
+
+    def _initSweepCoeffs(self):
+        """
+        Spatial scheme coefficients for the two sweep directions.
+        Ordinates travelling in the same direction must be contiguous
+        in the quadrature set.
+        """
+        self.sweepCoeffs = {}
+        faceNormals = np.array([-1, 1])
+        sigt = self.totalXs[:, None]
+        for f in (1, 2):
+            ords = np.where(self.sNmu * faceNormals[f - 1] < 0.)[0]
+            o0, o1 = ords[0], ords[-1] + 1
+            if len(ords) != o1 - o0:
+                sys.exit("FATALITY: Ordinates in a sweep direction must be contiguous.")
+            absMu = np.abs(self.sNmu[o0:o1])
+            if self.scheme == 'sc':
+                tau = sigt * self.deltaX / absMu[None, :]
+                coeffs = (np.exp(-tau), tau, 1. / sigt)
+            elif self.scheme == 'ld':
+                a = absMu / self.deltaX
+                det = (a + sigt) * (3. * a + sigt) + 3. * a ** 2
+                coeffs = (a, sigt, det, 1.0 if f == 1 else -1.0)
+            else:
+                twoMu = 2. * absMu
+                coeffs = (twoMu, 1. + sigt * self.deltaX / twoMu[None, :])
+            self.sweepCoeffs[f] = (o0, o1, coeffs)
 
     def sourceExapnder(self, x, src, vSource):
         if src == 'fission':
@@ -342,6 +462,7 @@ class Mesh1Dsn(object):
         """
         for i, bc in boundConds.iteritems():
             self.cells[i].setBC(bc)
+            self.bcCells.append(i % self.nCells)
 
     #@profile
     def sweepMesh(self, stopI=2):
@@ -357,14 +478,8 @@ class Mesh1Dsn(object):
         """
         # Sweep space
         converged, i = False, 0
-        sweepOrdRed = partial(sweepOrd, skernel=self.skernel, chiNuFission=self.chiNuFission,
-                              keff=self.keff, depth=self.depth, overRlx=1.0)
-        map(sweepOrdRed, self.cells)
-        # ### DEPRECIATED ####
-        #for cell in self.cells:
-            # compute the mth scattering source
-        #    cell.sweepOrd(self.skernel, self.chiNuFission, self.keff, self.depth)
-        # ### DEPRECIATED ####
+        # compute the mth scattering source
+        self._computeSource(self.depth)
         while not converged:
             self._sweepDir(1)
             self._sweepDir(2)
@@ -372,15 +487,91 @@ class Mesh1Dsn(object):
             if i >= stopI:
                 # max number of space-angle sweeps to perform
                 converged = True
+        self._checkPositivity()
         self.depth += 1     # increment scattering source iter
         return self._addOrdFlux()  # add mth scattered flux to the running total
 
+    def _computeSource(self, depth, overRlx=1.0, cells=slice(None)):
+        """
+        Scattering source iteration.  Sets the source in every cell, or
+        only in the given slice of cells.
+        m = 0:
+            fixed_source + fission_src
+        m > 0:
+            sum(o, sigma_s(r, g->g', Omega.Omega')_g * qflux^(m-1)_o)
+        """
+        if depth >= 1:
+            scatterSrc = kern.scatterSource(self.ordFlux[cells, :, 0, :], self.skernel,
+                                            self._wLeg, self.legArray, self.scatterKernel.band)
+            if depth >= 2:
+                previousQin = self.qin[cells, :, 0, :]
+                scatterSrc = overRlx * (scatterSrc - previousQin) + previousQin
+            self.qin[cells, :, 0, :] = scatterSrc
+            if self.scheme == 'ld':
+                # scattering is linear in the flux, so the slope moment of the
+                # source follows from the slope moment of the flux
+                scatterSlope = kern.scatterSource(self.ordFluxSlope[cells], self.skernel,
+                                                  self._wLeg, self.legArray, self.scatterKernel.band)
+                if depth >= 2:
+                    previousSlope = self.qinSlope[cells]
+                    scatterSlope = overRlx * (scatterSlope - previousSlope) + previousSlope
+                self.qinSlope[cells] = scatterSlope
+        elif self.multiplying:
+            totScalarFlux = kern.scalarFlux(self.totOrdFlux[cells, :, 0, :], self.wN)
+            self.qin[cells, :, 0, :] = kern.fissionSource(totScalarFlux, self.chiNuFission,
+                                                          1. / self.keff / 8.0)[:, :, None]
+            self.totOrdFlux[cells] = 0.
+            if self.scheme == 'ld':
+                totScalarSlope = kern.scalarFlux(self.totOrdFluxSlope[cells], self.wN)
+                self.qinSlope[cells] = kern.fissionSource(totScalarSlope, self.chiNuFission,
+                                                          1. / self.keff / 8.0)[:, :, None]
+                self.totOrdFluxSlope[cells] = 0.
+        else:
+            self.qin[cells] = self.S
+            self.totOrdFlux[cells] = 0.
+            if self.scheme == 'ld':
+                # fixed sources are flat in each cell
+                self.qinSlope[cells] = 0.
+                self.totOrdFluxSlope[cells] = 0.
+        return self.qin
+
+    def _sumOrdFlux(self, cells=slice(None)):
+        self.totOrdFlux[cells] += self.ordFlux[cells]
+        if self.scheme == 'ld':
+            self.totOrdFluxSlope[cells] += self.ordFluxSlope[cells]
+
+    def _shareStorage(self):
+        """
+        Move the flux and source arrays into shared memory, so that worker
+        processes forked by SubDomain.decompose() update them in place.
+        """
+        names = ['ordFlux', 'totOrdFlux', 'qin']
+        if self.scheme == 'ld':
+            names += ['ordFluxSlope', 'totOrdFluxSlope', 'qinSlope']
+        for name in names:
+            setattr(self, name, _sharedCopy(getattr(self, name)))
+        for i, cell in enumerate(self.cells):
+            cell.ordFlux, cell.totOrdFlux, cell.qin = self.ordFlux[i], self.totOrdFlux[i], self.qin[i]
+
+    def _checkPositivity(self):
+        """
+        Diamond differencing produces negative fluxes in cells that are too
+        wide (sigma_t * dx > 2|mu|).  Warn once per mesh and suggest a cell
+        width or a different spatial scheme.
+        """
+        if self._negFluxWarned or self.scheme != 'dd':
+            return
+        maxStepSize = 2. * np.min(np.abs(self.sNmu)) / np.max(self.totalXs)
+        if self.deltaX > maxStepSize and np.any(self.ordFlux < 0.0):
+            print("WARNING: Negative flux detected in diamond difference sweep.  Refine the mesh to"
+                  " dx < " + str("%.3e" % maxStepSize) + " or use scheme='sc' or 'ld'.")
+            self._negFluxWarned = True
+
     def _addOrdFlux(self):
         '''
         add Nth collided ord flux to running total
         '''
-        for cell in self.cells:
-            cell.sumOrdFlux()
+        self._sumOrdFlux()
         if self.depth >= 1. and np.mod(self.depth, 5) == 0:
             return self.computeResid()
         else:
@@ -398,17 +589,15 @@ class Mesh1Dsn(object):
         self.depth = 0
 
     def _resetOrdFlux(self):
-        for cell in self.cells:
-            cell.resetOrdFlux()
+        self.ordFlux[...] = 0.
+        if self.scheme == 'ld':
+            self.ordFluxSlope[...] = 0.
 
     def getOrdFlux(self):
         """
         getter for all groups and ordiante fluxes
         """
-        totOrdFlux = []
-        for cell in self.cells:
-            totOrdFlux.append(cell.totOrdFlux)
-        return np.array(totOrdFlux)
+        return np.array(self.totOrdFlux)
 
     def fissionSrc(self):
         #fissionSrcVec = []
@@ -422,34 +611,29 @@ class Mesh1Dsn(object):
         """
         getter for all scalar fluxes (angle integrated)
         """
-        totScalarFlux = []
-        for cell in self.cells:
-            totScalarFlux.append(cell.getTotScalarFlux())
-        totScalarFlux = np.array(totScalarFlux)
+        totScalarFlux = kern.scalarFlux(self.totOrdFlux[:, :, 0, :], self.wN)
         #return totScalarFlux / np.sum(totScalarFlux)  # norm flux to 1.
         return totScalarFlux
 
+    def getFluxRatio(self):
+        """
+        Ratio of the last scattered flux to the total flux in each cell.
+        """
+        partialFlux = np.sum(kern.scalarFlux(self.ordFlux[:, :, 0, :], self.wN), axis=1)
+        totFlux = np.sum(kern.scalarFlux(self.totOrdFlux[:, :, 0, :], self.wN), axis=1)
+        return partialFlux / totFlux
+
     def computeResid(self):
-        residVec = []
-        for cell in self.cells:
-            residVec.append(cell.getFluxRatio())
-        residVec = np.array(residVec)
-        resid = np.max(residVec)
+        resid = np.max(self.getFluxRatio())
         print("Scattering Iteration: " + str(self.depth) +
               ".   Flux Residual= " + str("%.5e" % resid))
         return resid
 
     def getCellWidths(self):
-        deltaXs = []
-        for cell in self.cells:
-            deltaXs.append(cell.deltaX)
-        return np.array(deltaXs)
+        return np.ones(self.nCells) * self.deltaX
 
     def getCentroids(self):
-        centroids = []
-        for cell in self.cells:
-            centroids.append(cell.centroid)
-        return np.array(centroids)
+        return np.array(self.centroids)
 
     def setKeff(self, k):
         self.keff = k
@@ -462,35 +646,168 @@ class Mesh1Dsn(object):
         f is either 1 or 2 in 1D
         1 is left cell face,  2 is right face
         """
-        lastCellFaceVal = np.zeros((self.cells[0].nG, self.cells[0].sNords))
+        cellOrder = np.arange(self.nCells)
         if f == 2:
-            cellList = reversed(self.cells)
+            cellOrder = cellOrder[::-1]
+        _sweepRuns([(self, cellOrder)], f, self.depth)
+
+    def _sweepCells(self, cellOrder, f, faceIn, inflow=True, grps=None):
+        """
+        Sweep the ordinates travelling away from face f through the cells
+        in cellOrder.  Returns the angular flux leaving the last cell.
+        When inflow is set, face f only carries the incoming flux of the
+        current sweep direction (the remaining ordinates are zeroed).
+        grps optionally restricts the sweep to a slice of energy groups.
+        """
+        o0, o1, coeffs = self.sweepCoeffs[f]
+        ordFlux, qin = self.ordFlux, self.qin
+        if grps is not None:
+            # group dependent coefficients are the 2D (nG, ...) arrays
+            coeffs = [c[grps] if np.ndim(c) == 2 else c for c in coeffs]
+            ordFlux, qin = ordFlux[:, grps], qin[:, grps]
+        if inflow:
+            ordFlux[cellOrder, :, f, :o0] = 0.
+            ordFlux[cellOrder, :, f, o1:] = 0.
+        if self.scheme == 'sc':
+            return kern.sweepSC(ordFlux, qin, cellOrder, o0, o1, f, faceIn, *coeffs)
+        elif self.scheme == 'ld':
+            ordFluxSlope, qinSlope = self.ordFluxSlope, self.qinSlope
+            if grps is not None:
+                ordFluxSlope, qinSlope = ordFluxSlope[:, grps], qinSlope[:, grps]
+            return kern.sweepLD(ordFlux, ordFluxSlope, qin, qinSlope,
+                                cellOrder, o0, o1, f, faceIn, *coeffs)
+        return kern.sweepDD(ordFlux, qin, cellOrder, o0, o1, f, faceIn,
+                            self.deltaX, *coeffs)
+
+
+def _buildSweepRuns(sweepTree):
+    """
+    Collapse a sweepTree of (region, cell) tuples into runs of consecutive
+    cells belonging to the same region:  [(region, cell index array), ...]
+    """
+    runs = []
+    for j, i in sweepTree:
+        if runs and runs[-1][0] == j and runs[-1][1][-1] == i - 1:
+            runs[-1][1].append(i)
         else:
-            cellList = self.cells
-        blowoff = False
-        for cell in cellList:
-            if hasattr(cell, 'boundaryCond') and not blowoff:
-                cell.applyBC(self.depth)
+            runs.append((j, [i]))
+    return [(j, np.array(cellIdx)) for j, cellIdx in runs]
+
+
+def _sweepRuns(sweepRuns, f, depth, faceIn=None, applyBCs=True, grps=None):
+    """
+    Sweep through space for all ordinates travelling away from face f.
+
+    sweepRuns is a list of (Mesh1Dsn, cell index array) pairs given in sweep
+    order.  The first boundary cell encountered along the sweep applies its
+    boundary condition, every other cell receives the angular flux leaving its
+    upstream neighbor.  faceIn is the angular flux entering the first cell
+    (zero by default).  Returns the angular flux leaving the last cell.
+    """
+    mesh = sweepRuns[0][0]
+    o0, o1 = mesh.sweepCoeffs[f][:2]
+    if faceIn is None:
+        faceIn = np.zeros((mesh.nG, o1 - o0))
+    blowoff = not applyBCs
+    for mesh, cellOrder in sweepRuns:
+        if not blowoff and mesh.bcCells:
+            bcPos = np.where(np.in1d(cellOrder, mesh.bcCells))[0]
+            if len(bcPos) > 0:
+                bcPos = bcPos[0]
+                faceIn = mesh._sweepCells(cellOrder[:bcPos], f, faceIn, grps=grps)
+                bcCell = cellOrder[bcPos]
+                mesh.cells[bcCell].applyBC(depth)
+                faceIn = np.array(mesh.ordFlux[bcCell, grps if grps is not None else slice(None), f, o0:o1])
+                faceIn = mesh._sweepCells(cellOrder[bcPos:bcPos + 1], f, faceIn, inflow=False, grps=grps)
+                cellOrder = cellOrder[bcPos + 1:]
                 blowoff = True
-            else:
-                # Interior cell
-                cell.ordFlux[:, f, :] = lastCellFaceVal[:, :]
-            # Only sweep through ordinates that have a component in same direction as
-            # current sweep dir.
-            dotDir = cell.sNmu * cell.faceNormals[f - 1]
-            ordsInSweepDir = np.where(dotDir < 0.)
-            for o in np.arange(cell.sNords)[ordsInSweepDir]:
-                cell.ordFlux[:, 0, o] = (cell.ordFlux[:, f, o] + self.deltaX * cell.qin[:, 0, o] / (2. * np.abs(cell.sNmu[o]))) / \
-                    (1. + self.totalXs * self.deltaX / (2. * np.abs(cell.sNmu[o])))
-                if f == 1:
-                    cell.ordFlux[:, 2, o] = 2. * cell.ordFlux[:, 0, o] - cell.ordFlux[:, f, o]
-                    lastCellFaceVal[:, o] = cell.ordFlux[:, 2, o]
-                elif f == 2:
-                    cell.ordFlux[:, 1, o] = 2. * cell.ordFlux[:, 0, o] - cell.ordFlux[:, f, o]
-                    lastCellFaceVal[:, o] = cell.ordFlux[:, 1, o]
-            if np.any(cell.ordFlux[:, :, :] < 0.0):
-                #print("WARNING: Negative flux detected! Refine mesh.")
-                maxStepSize = 2. * np.min(np.abs(cell.sNmu)) * min(1. / self.totalXs)
-                #print("Max Step size in 1D: " + str(maxStepSize))
-                # refineFactor = 2.  # TODO: compute refinement factor on the fly
-                #raise Exception('coarse', refineFactor)
+        faceIn = mesh._sweepCells(cellOrder, f, faceIn, grps=grps)
+    return faceIn
+
+
+def _partitionRuns(sweepRuns, nParts):
+    """
+    Split the sweep runs of a SubDomain into at most nParts partitions holding
+    about the same number of cells.  Each partition is a list of
+    (region index, first cell, last cell + 1) pieces in sweep order.
+    """
+    nCells = sum([len(cellIdx) for j, cellIdx in sweepRuns])
+    bounds = np.linspace(0, nCells, min(nParts, nCells) + 1).round().astype(int)
+    parts = [[] for p in range(len(bounds) - 1)]
+    pos = 0
+    for j, cellIdx in sweepRuns:
+        for p in range(len(parts)):
+            lo, hi = max(bounds[p], pos), min(bounds[p + 1], pos + len(cellIdx))
+            if lo < hi:
+                parts[p].append((j, cellIdx[lo - pos], cellIdx[hi - pos - 1] + 1))
+        pos += len(cellIdx)
+    return parts
+
+
+def _sharedZeros(shape):
+    """
+    numpy array of zeros backed by shared memory.  Visible to processes
+    forked after its creation.
+    """
+    return np.frombuffer(RawArray('d', int(np.prod(shape))), dtype=np.float64).reshape(shape)
+
+
+def _sharedCopy(a):
+    shared = _sharedZeros(a.shape)
+    shared[...] = a
+    return shared
+
+
+def _decompWorker(domain, parts, p, mode, chunks, sems, bcPart, conn):
+    """
+    Worker process of a decomposed SubDomain.  Sweeps partition p on request
+    of the parent process until told to stop.
+    """
+    nParts = len(parts)
+    pieces = [(domain.regions[j], slice(i0, i1)) for j, i0, i1 in parts[p]]
+    runs = {1: [(region, np.arange(cells.start, cells.stop)) for region, cells in pieces]}
+    runs[2] = [(region, cellIdx[::-1]) for region, cellIdx in reversed(runs[1])]
+    # position of this partition along each sweep direction, and its
+    # upstream and downstream interfaces
+    sweepPos = {1: p, 2: nParts - 1 - p}
+    upstream, downstream = {1: p, 2: p + 1}, {1: p + 1, 2: p}
+    applyBCs = {1: sweepPos[1] <= bcPart[1], 2: sweepPos[2] <= nParts - 1 - bcPart[2]}
+    o0, o1 = domain.regions[0].sweepCoeffs[1][:2]
+    nG = domain.regions[0].nG
+    iface = domain._iface
+    while True:
+        msg = conn.recv()
+        if msg[0] == 'stop':
+            break
+        depth, overRlx, stopI, keffs, buf = msg[1:]
+        try:
+            for region, keff in zip(domain.regions, keffs):
+                region.keff = keff
+            for region, cells in pieces:
+                region._computeSource(depth, overRlx, cells)
+            for i in range(stopI):
+                for f in (1, 2):
+                    first, last = sweepPos[f] == 0, sweepPos[f] == nParts - 1
+                    up, down = iface[:, upstream[f], f - 1], iface[:, downstream[f], f - 1]
+                    if mode == 'jacobi':
+                        # read the previous scattering iteration, write the next
+                        faceIn = np.zeros((nG, o1 - o0)) if first else np.array(up[buf])
+                        faceOut = _sweepRuns(runs[f], f, depth, faceIn, applyBCs[f])
+                        if not last:
+                            down[1 - buf] = faceOut
+                        continue
+                    for k, grps in enumerate(chunks):
+                        if first:
+                            faceIn = np.zeros((grps.stop - grps.start, o1 - o0))
+                        else:
+                            sems[(f, upstream[f], k)].acquire()
+                            faceIn = np.array(up[0, grps])
+                        faceOut = _sweepRuns(runs[f], f, depth, faceIn, applyBCs[f], grps)
+                        if not last:
+                            down[0, grps] = faceOut
+                            sems[(f, downstream[f], k)].release()
+            for region, cells in pieces:
+                region._sumOrdFlux(cells)
+            conn.send(None)
+        except Exception:
+            conn.send(traceback.format_exc())
@@ -1,25 +1,157 @@
 #!/usr/bin/python
 from __future__ import division
-from fe import solver as feslv
-from dg import dg_solver as dgslv
+import sys
 import numpy as np
 np.set_printoptions(linewidth=200)  # set print to screen opts
 
 
 class SnSolver(object):
     def __init__(self, geoFile, materialDict, bcDict, srcDict, **kwargs):
+        import time
+        from utils.checkpoint import processStartTime
+        # wall time budgets (see trSolve) are counted from startTime [s since
+        # the epoch], default the process start (or now if unknown)
+        self.startTime = kwargs.pop('startTime', None) or processStartTime() or time.time()
         nG = kwargs.pop('nG', 10)
         lOrder = kwargs.pop('lOrder', 8)
         sNords = kwargs.pop('sN', 2)
         dim = kwargs.pop('dim', 1)
         self.space = kwargs.pop('space', 'dg')
+        renumber = kwargs.pop('renumber', None)  # None, 'rcm' or 'hilbert'
+        quadKind = kwargs.pop('quadKind', 'levelSym')  # 2D quadrature: 'levelSym' or 'product'
+        mesh = kwargs.pop('mesh', None)  # gmshMesh to use instead of meshing geoFile
+        # timers and counters (utils/perf.py): True, False or a Profiler
+        # trace=True keeps the span events for writeChromeTrace,
+        # perfMemory=True records the peak RSS per span
+        from utils.perf import Profiler
+        perf = kwargs.pop('perf', True)
+        self.perf = perf if hasattr(perf, 'span') else \
+            Profiler(enabled=bool(perf), trace=kwargs.pop('trace', False),
+                     memory=kwargs.pop('perfMemory', False))
+        # only the selected discretization is imported
         if self.space == 'fe':
-            self.solver = feslv.SnFeSlv(geoFile, materialDict, bcDict, srcDict, nG, lOrder, sNords, dim)
+            from fe import solver as feslv
+            self.solver = feslv.SnFeSlv(geoFile, materialDict, bcDict, srcDict, nG, lOrder, sNords, dim,
+                                        renumber=renumber, quadKind=quadKind, perf=self.perf, mesh=mesh)
         else:
-            self.solver = dgslv.SnDgSlv(geoFile, materialDict, bcDict, srcDict, nG, lOrder, sNords, dim)
+            from dg import dg_solver as dgslv
+            self.solver = dgslv.SnDgSlv(geoFile, materialDict, bcDict, srcDict, nG, lOrder, sNords, dim,
+                                        renumber=renumber, quadKind=quadKind, perf=self.perf, mesh=mesh)
+        self._startIter = None  # set by restart
 
-    def trSolve(self, residTol=0.5e-5):
+    @staticmethod
+    def dryRun(geoFile, materialDict, bcDict=None, srcDict=None, **kwargs):
         """
+        Estimate the memory and time of SnSolver(geoFile, materialDict, ...)
+        with the same keyword arguments (nG, lOrder, sN, dim, space,
+        renumber, quadKind) without assembling anything.  Further kwargs:
+        memLimit [B], nIters and wallTime [s] to check the run against,
+        model (cost model dict, see utils/dryRun.py), mesh (parsed gmshMesh)
+        and show (print the summary, default True).  Returns a
+        utils.dryRun.DryRunEstimate, .fits is False if the run would not fit.
+        """
+        from utils.dryRun import estimate
+        show = kwargs.pop('show', True)
+        est = estimate(geoFile, materialDict, nG=kwargs.pop('nG', 10), lOrder=kwargs.pop('lOrder', 8),
+                       sN=kwargs.pop('sN', 2), dim=kwargs.pop('dim', 1), space=kwargs.pop('space', 'dg'),
+                       **kwargs)
+        if show:
+            print(est.summary())
+        return est
+
+    def _checkpointer(self, kwargs):
+        """
+        Checkpointer from the solve kwargs, None if checkpointing is off.
+        """
+        from utils.checkpoint import Checkpointer
+        fname = kwargs.pop('checkpointFile', None)
+        opts = dict((opt, kwargs.pop(key, None)) for opt, key in
+                    (('everyIters', 'checkpointIters'), ('everySeconds', 'checkpointSeconds'),
+                     ('wallTime', 'wallTime')))
+        if kwargs:
+            sys.exit("FATALITY: Unknown solve options: " + str(sorted(kwargs.keys())))
+        if fname is None:
+            if any(value is not None for value in opts.values()):
+                sys.exit("FATALITY: checkpointFile is required for checkpointing / wallTime")
+            return None
+        return Checkpointer(fname, startTime=self.startTime, **opts)
+
+    def _snapshots(self, kwargs):
+        """
+        (writer, fileName pattern, every n iterations) of the periodic
+        flux snapshots, None if off.
+        """
+        snapshotFile = kwargs.pop('snapshotFile', None)
+        snapshotIters = kwargs.pop('snapshotIters', 1)
+        if snapshotFile is None:
+            return None
+        from utils.asyncWriter import AsyncWriter
+        return AsyncWriter(), snapshotFile, snapshotIters
+
+    def _closeSnapshots(self, snapshots):
+        if snapshots is not None:
+            snapshots[0].close()
+
+    def _iterationDone(self, checkpointer, snapshots, mode, iteration):
+        """
+        Snapshot / checkpoint if due.  Returns True if the wall time budget
+        is used up.
+        """
+        if snapshots is not None and iteration % snapshots[2] == 0:
+            with self.perf.span('snapshot'):
+                self.writeData(snapshots[1] % iteration, writer=snapshots[0])
+        if checkpointer is None:
+            return False
+        write, stop = checkpointer.iterationDone(iteration)
+        if write:
+            with self.perf.span('checkpoint'):
+                state = self.solver.getState()
+                state.update({'mode': mode, 'iteration': iteration})
+                checkpointer.write(state)
+        if stop:
+            print("Wall time budget reached.  Checkpoint written to: " + str(checkpointer.fname))
+        return stop
+
+    def _firstIter(self, default):
+        start, self._startIter = self._startIter, None
+        return default if start is None else start + 1
+
+    def restart(self, checkpointFile, **kwargs):
+        """
+        Reload the state written by kSolve / trSolve to checkpointFile and
+        continue that solve.  The solver must have been constructed with
+        the same inputs.  kwargs are passed on to the solve, checkpoints
+        keep going to checkpointFile unless another file is given.  Returns
+        the solve status, see trSolve.
+        """
+        from utils.checkpoint import loadCheckpoint
+        state = loadCheckpoint(checkpointFile)
+        self.solver.setState(state)
+        self._startIter = state['iteration']
+        print("Restarting " + state['mode'] + " solve after iteration " + str(state['iteration']))
+        kwargs.setdefault('checkpointFile', checkpointFile)
+        if state['mode'] == 'k':
+            return self.kSolve(**kwargs)
+        return self.trSolve(**kwargs)
+
+    def trSolve(self, residTol=0.5e-5, **kwargs):
+        """
+        Fixed source solve.  Returns 'converged', 'notConverged' (iteration
+        limit) or 'wallTime' (stopped by the wall time budget, continue with
+        restart).
+        Checkpoint kwargs (also for kSolve):
+            checkpointFile: checkpoint file, see utils/checkpoint.py
+            checkpointIters: checkpoint every n (source / outer) iterations
+            checkpointSeconds: checkpoint every n seconds
+            wallTime: wall time budget [s] counted from the solver's startTime
+                (process start by default, so mesh and material setup count
+                too).  Checkpoints and stops before the budget is exceeded.
+                Continue with restart(checkpointFile).
+        Snapshot kwargs:
+            snapshotFile: file name pattern, e.g. 'snap_%03d.h5' (% iteration).
+                The flux is written by a background thread while the
+                solve continues (utils/asyncWriter.py).
+            snapshotIters: snapshot every n iterations, default 1
         Pseudo Code non mult solve:
             1. Init problem
             2. Perform scatter
@@ -34,50 +166,107 @@ class SnSolver(object):
             5. Add ith scattered flux to 'tot' flux (tot flux is sum of all scattered fluxes)
             6. Retun to 2.  Repeat untill scattered flux is stationary (measured by L2 norm)
         """
+        snapshots = self._snapshots(kwargs)
+        checkpointer = self._checkpointer(kwargs)
         totScTime, totLsTime = 0, 0
         print("========================================================================")
         print("I -- ||ScFlux||/||TotFlux|| -- Lin Solve Time [s] -- Scattering Time [s]")
         print("========================================================================")
-        for i in range(0, 180):
-            self.solver.scatterSource()
-            norms, times = self.solver.solveFlux()
-            totScTime += times[0]
-            totLsTime += times[1]
-            print("{0: <3}".format(str(i)) + "        " + "{:.4e}".format(norms) + "              " +
-                  "{:.2e}".format(times[1]) + "           " +
-                  "{:.2e}".format(times[0]))
-            if norms < residTol:
-                break
+        try:
+            for i in range(self._firstIter(0), 180):
+                with self.perf.span('sourceIter'):
+                    self.solver.scatterSource()
+                    norms, times = self.solver.solveFlux()
+                totScTime += times[0]
+                totLsTime += times[1]
+                print("{0: <3}".format(str(i)) + "        " + "{:.4e}".format(norms) + "              " +
+                      "{:.2e}".format(times[1]) + "           " +
+                      "{:.2e}".format(times[0]))
+                if norms < residTol:
+                    status = 'converged'
+                    break
+                if self._iterationDone(checkpointer, snapshots, 'fixed', i):
+                    return 'wallTime'
+            else:
+                status = 'notConverged'
+        finally:
+            # queued snapshots are written (and write errors raised) also
+            # when an iteration fails
+            self._closeSnapshots(snapshots)
         print("====================================================================")
         print("    TOTAL SOLVE TIME [S]       " + "{:.2e}".format(totLsTime) + "           " +
               "{:.2e}".format(totScTime))
         print("====================================================================")
+        return status
 
-    def kSolve(self, residTol=0.5e-5, kTol=1e-4, outerIterMax=15):
-        finalIter = False
+    def kSolve(self, residTol=0.5e-5, kTol=1e-4, outerIterMax=15, **kwargs):
+        """
+        k-eigenvalue solve.  See trSolve for the returned status and the
+        checkpoint and snapshot kwargs.
+        """
+        snapshots = self._snapshots(kwargs)
+        checkpointer = self._checkpointer(kwargs)
+        finalIter, converged = False, False
         print("========================================================================")
         print("=                           K-EIGEN SOLVER                             =")
         print("========================================================================")
         print("========================================================================")
         print("I -- ||ScFlux||/||TotFlux|| -- Lin Solve Time [s] -- Scattering Time [s]")
         print("========================================================================")
-        for i in range(1, outerIterMax):
-            if i == outerIterMax - 1:
-                finalIter = True
-            keff, converged, norms = self.solver.kEig(residTol, kTol, finalIter)
-            print("====================================================================")
-            print("Outter iteration: " + str(i) + "  k-eff :" + str(keff))
-            print("====================================================================")
-            if converged:
-                print("Keff convergence reached!")
-                break
-        if i == outerIterMax - 1:
+        try:
+            for i in range(self._firstIter(1), outerIterMax):
+                if i == outerIterMax - 1:
+                    finalIter = True
+                with self.perf.span('outerIter'):
+                    keff, converged, norms = self.solver.kEig(residTol, kTol, finalIter)
+                print("====================================================================")
+                print("Outter iteration: " + str(i) + "  k-eff :" + str(keff))
+                print("====================================================================")
+                if converged:
+                    print("Keff convergence reached!")
+                    break
+                if self._iterationDone(checkpointer, snapshots, 'k', i):
+                    return 'wallTime'
+        finally:
+            self._closeSnapshots(snapshots)
+        if not converged:
             print("Failed to converge k-eigenvalue.")
+            return 'notConverged'
+        return 'converged'
 
-    def writeData(self, outFile, fmt=True):
+    def writeData(self, outFile, fmt=True, **kwargs):
+        """
+        kwargs select and compress the outputs, see SnFeSlv.writeData.
+        writer: utils/asyncWriter.AsyncWriter, write in the background
+        """
         if self.space is not "dg":
             fmt=False
-        self.solver.writeData(outFile, h5_fmt=fmt)
+        with self.perf.span('writeData'):
+            self.solver.writeData(outFile, h5_fmt=fmt, **kwargs)
+
+    def perfReport(self, keyed=False, jsonFile=None, traceFile=None):
+        """
+        Print the timer / counter summary (keyed: per (g, o) breakdown).
+        Optionally also write it as json and the span events (trace=True)
+        as a chrome trace (chrome://tracing, ui.perfetto.dev).
+        """
+        print(self.perf.summary(keyed))
+        if jsonFile is not None:
+            self.perf.writeJSON(jsonFile)
+        if traceFile is not None:
+            self.perf.writeChromeTrace(traceFile)
+
+    def memoryReport(self, show=True):
+        """
+        Bytes held per solver data structure (system matrices, flux fields,
+        per region element data), see utils/memReport.py.  Returns
+        [(name, bytes)], printed as a table if show.
+        """
+        from utils.memReport import solverMemory, formatReport
+        rows = solverMemory(self.solver)
+        if show:
+            print(formatReport(rows))
+        return rows
 
 
 if __name__ == "__main__":
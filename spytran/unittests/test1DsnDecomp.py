@@ -0,0 +1,84 @@
+# To execute unittests ensure your pwd is in ./src
+# exec:
+#   python -m unittest unittests.test1DsnDecomp
+#
+# Decomposed (multi process) SubDomain sweeps against the serial sweep
+
+import unittest
+import numpy as np
+import sn1D as sn
+
+
+class scatMat(object):
+    """
+    Synthetic 3 group, linearly anisotropic scatterer.
+    """
+    def __init__(self, sigt, c):
+        sigt = np.array(sigt)
+        skernel = np.zeros((9, 3, 3))
+        skernel[0] = c * np.array([[0.6, 0.0, 0.0], [0.3, 0.7, 0.1], [0.1, 0.3, 0.9]]) * sigt[None, :]
+        skernel[1] = 0.2 * skernel[0]
+        self.macroProp = {'Ntotal': sigt, 'Nskernel': skernel}
+
+
+def buildDomain(scheme='dd'):
+    srcEnergy = np.array([1.0, 0.0, 0.0])
+    mats = [scatMat([0.5, 0.8, 1.2], 0.9), scatMat([1.0, 1.5, 3.0], 0.5),
+            scatMat([0.4, 0.6, 1.0], 0.95)]
+    domain = sn.SubDomain()
+    x, dx = 0., 0.1
+    for i, mat in enumerate(mats + mats):
+        region = sn.Mesh1Dsn([x, x + 3.], dx, mat, sN=8, gN=3, lN=8, scheme=scheme)
+        x += region.nCells * dx
+        if i == 0:
+            region.setBCs({0: {'fixN': (1, [1.e3, srcEnergy])}})
+        elif i == 5:
+            region.setBCs({-1: {'ref': (2, 0)}})
+        domain.addRegion(region)
+    domain.buildSweepTree()
+    return domain
+
+
+def sweep(domain, nIter, stopI=1):
+    for i in range(nIter):
+        domain.sweepSubDomain(stopI)
+    return domain.getOrdFlux()
+
+
+class test1DsnDecomp(unittest.TestCase):
+
+    def testPartitions(self):
+        domain = buildDomain()
+        parts = sn._partitionRuns(domain.sweepRuns, 4)
+        cells = [(j, i) for part in parts for j, i0, i1 in part for i in range(i0, i1)]
+        self.assertEqual(cells, domain.sweepTree)
+        self.assertTrue(all(abs(sum([i1 - i0 for j, i0, i1 in part]) - len(cells) / 4.) < 1 for part in parts))
+
+    def testPipelineMatchesSerial(self):
+        for scheme in ('dd', 'ld'):
+            ref = sweep(buildDomain(scheme), 12, stopI=2)
+            domain = buildDomain(scheme)
+            domain.decompose(4, 'pipeline', grpChunks=2)
+            try:
+                flux = sweep(domain, 12, stopI=2)
+            finally:
+                domain.close()
+            self.assertTrue(np.array_equal(flux, ref))
+
+    def testJacobiConverges(self):
+        ref = buildDomain()
+        refFlux = sweep(ref, 300)
+        domain = buildDomain()
+        domain.decompose(3, 'jacobi')
+        try:
+            flux = sweep(domain, 300)
+        finally:
+            domain.close()
+        self.assertTrue(np.allclose(flux, refFlux, rtol=1e-6))
+        # the serial sweep can be resumed after the workers are stopped
+        self.assertEqual(domain._workers, [])
+        domain.sweepSubDomain(1)
+
+
+if __name__ == "__main__":
+    unittest.main()
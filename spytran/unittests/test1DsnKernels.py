@@ -0,0 +1,185 @@
+# To execute unittests ensure your pwd is in ./src
+# exec:
+#   python -m unittest unittests.test1DsnKernels
+#
+# Checks the mesh wide (array) kernels against the cell by cell implementation
+
+import unittest
+import numpy as np
+import cyth.sn1Dcell as snc1d
+import cyth.scattSource as kern
+import cyth.kernels as kernels
+import sn1D as sn
+try:
+    import cyth.scattSrc as ckern
+except ImportError:
+    ckern = None
+
+
+class test1DsnKernels(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(7)
+        self.nC, self.nG, self.lO, self.sN = 6, 4, 3, 8
+        self.ordFlux = rng.rand(self.nC, self.nG, 3, self.sN)
+        self.totOrdFlux = rng.rand(self.nC, self.nG, 3, self.sN)
+        self.qin = np.zeros((self.nC, self.nG, 3, self.sN))
+        self.skernel = rng.rand(self.lO + 1, self.nG, self.nG)
+        self.cells = [snc1d.Cell1DSn(float(i), 1.0, self.nG, self.lO, self.sN,
+                                     storage=(self.ordFlux[i], self.totOrdFlux[i], self.qin[i]))
+                      for i in range(self.nC)]
+
+    def testScalarFlux(self):
+        wN = self.cells[0].wN
+        phi = kern.scalarFlux(self.totOrdFlux[:, :, 0, :], wN)
+        for i, cell in enumerate(self.cells):
+            self.assertTrue(np.allclose(phi[i], cell.getTotScalarFlux(), rtol=1e-14))
+
+    def testScatterSource(self):
+        cell0 = self.cells[0]
+        q = kern.scatterSource(self.ordFlux[:, :, 0, :], self.skernel,
+                               cell0.wN * cell0.legArray, cell0.legArray)
+        for i, cell in enumerate(self.cells):
+            for g in range(self.nG):
+                self.assertTrue(np.allclose(q[i, g], cell._evalScatterSource(g, self.skernel),
+                                            rtol=1e-12))
+
+    def testSweepDD(self):
+        cell0 = self.cells[0]
+        sigt = np.linspace(0.5, 2.0, self.nG)
+        o0, o1 = 0, self.sN // 2  # mu > 0
+        dx = 0.3
+        twoMu = 2. * np.abs(cell0.sNmu[o0:o1])
+        denom = 1. + sigt[:, None] * dx / twoMu
+        self.qin[:, :, 0, :] = 1.
+        ref = np.array(self.ordFlux)
+        faceIn = np.ones((self.nG, o1 - o0))
+        out = kern.sweepDD(self.ordFlux, self.qin, np.arange(self.nC), o0, o1, 1,
+                           np.array(faceIn), dx, twoMu, denom)
+        for i in range(self.nC):
+            psi = (faceIn + dx * 1. / twoMu) / denom
+            faceIn = 2. * psi - faceIn
+            ref[i, :, 0, o0:o1] = psi
+        self.assertTrue(np.allclose(out, faceIn, rtol=1e-14))
+        self.assertTrue(np.allclose(self.ordFlux[:, :, 0, o0:o1], ref[:, :, 0, o0:o1], rtol=1e-14))
+        # storage is shared with the cells
+        self.assertTrue(np.all(self.cells[2].ordFlux == self.ordFlux[2]))
+
+
+class slabMat(object):
+    """
+    Single group pure absorber.
+    """
+    def __init__(self, sigt):
+        self.macroProp = {'Ntotal': np.array([sigt]), 'Nskernel': np.zeros((9, 1, 1))}
+
+
+class test1DsnSchemes(unittest.TestCase):
+
+    def setUp(self):
+        cell = snc1d.Cell1DSn(0., 1.0, 1, 8, 8)
+        self.mu = cell.sNmu[:4]  # mu > 0
+
+    def testSCAttenuation(self):
+        # step characteristic attenuation is exact, whatever the cell width
+        nC, sigt, dx = 5, 2.0, 3.0
+        ordFlux, qin = np.zeros((nC, 1, 3, 8)), np.zeros((nC, 1, 3, 8))
+        tau = sigt * dx / self.mu[None, :]
+        out = kern.sweepSC(ordFlux, qin, np.arange(nC), 0, 4, 1, np.ones((1, 4)),
+                           np.exp(-tau), tau, np.array([[1. / sigt]]))
+        self.assertTrue(np.allclose(out, np.exp(-nC * tau), rtol=1e-12))
+        self.assertTrue(np.all(ordFlux[:, :, :, :4] > 0.))
+
+    def testLDBalance(self):
+        # every cell satisfies the zeroth and first moment equations
+        nC, sigt, dx = 4, 1.5, 2.0
+        rng = np.random.RandomState(3)
+        ordFlux, qin = np.zeros((nC, 1, 3, 8)), rng.rand(nC, 1, 3, 8)
+        slope, qSlope = np.zeros((nC, 1, 8)), rng.rand(nC, 1, 8)
+        a = np.abs(self.mu) / dx
+        sig = np.array([[sigt]])
+        det = (a + sig) * (3. * a + sig) + 3. * a ** 2
+        cellOrder = np.arange(nC)[::-1]  # sweep right to left with mu < 0
+        kern.sweepLD(ordFlux, slope, qin, qSlope, cellOrder, 4, 8, 2, np.ones((1, 4)),
+                     a[::-1], sig, det[:, ::-1], -1.0)
+        psiIn, psiOut = ordFlux[:, :, 2, 4:], ordFlux[:, :, 1, 4:]
+        psiA, psiX = ordFlux[:, :, 0, 4:], -slope[:, :, 4:]
+        aa = a[::-1]
+        self.assertTrue(np.allclose(aa * (psiOut - psiIn) + sigt * psiA, qin[:, :, 0, 4:]))
+        self.assertTrue(np.allclose(3. * aa * (psiOut + psiIn - 2. * psiA) + sigt * psiX,
+                                    -qSlope[:, :, 4:]))
+        self.assertTrue(np.allclose(psiOut, psiA + psiX))
+
+    def slabFlux(self, scheme, dx):
+        # 10 mfp thick absorber with a unit flat source and vacuum boundaries
+        src = np.zeros((1, 3, 8))
+        src[0, 0, :] = 1.0
+        mesh = sn.Mesh1Dsn([0., 10.], dx, slabMat(1.0), sN=8, gN=1, source=src, scheme=scheme)
+        mesh.setBCs({0: {'vac': (1, 0)}, -1: {'vac': (2, 0)}})
+        mesh.sweepMesh(1)
+        return mesh.getScalarFlux()[:, 0]
+
+    def testThickCells(self):
+        # 2 mfp cells.  The flux can not exceed the infinite medium value of 1
+        ref = self.slabFlux('dd', 0.01).reshape(5, 200).mean(axis=1)
+        self.assertTrue(np.any(self.slabFlux('dd', 2.0) > 1.))
+        for scheme, tol in (('sc', 1e-5), ('ld', 1e-2)):
+            coarse = self.slabFlux(scheme, 2.0)
+            self.assertTrue(np.all((coarse > 0.) & (coarse < 1.)))
+            self.assertTrue(np.max(np.abs(coarse - ref)) < tol)
+
+
+@unittest.skipIf(ckern is None, "compiled kernels (cyth/setup.py) not built")
+class test1DsnCompiledKernels(unittest.TestCase):
+    """
+    The compiled kernels must reproduce the python kernels bit for bit.
+    """
+    def setUp(self):
+        rng = np.random.RandomState(11)
+        self.nC, self.nG, self.lO, self.sN = 9, 5, 4, 8
+        self.ordFlux = rng.rand(self.nC, self.nG, 3, self.sN)
+        self.qin = rng.rand(self.nC, self.nG, 3, self.sN)
+        self.skernel = rng.rand(self.lO + 1, self.nG, self.nG)
+        cell = snc1d.Cell1DSn(0., 1.0, self.nG, self.lO, self.sN)
+        self.wN, self.legArray = cell.wN, cell.legArray
+
+    def testSelected(self):
+        self.assertTrue(kernels.compiled)
+
+    def testScalarFlux(self):
+        psi = self.ordFlux[:, :, 0, :]
+        self.assertTrue(np.array_equal(kern.scalarFlux(psi, self.wN),
+                                       ckern.scalarFlux(psi, self.wN)))
+
+    def testScatterSource(self):
+        psi = self.ordFlux[:, :, 0, :]
+        wLeg = self.wN * self.legArray
+        for nLeg in (1, self.lO + 1):
+            self.assertTrue(np.array_equal(
+                kern.scatterSource(psi, self.skernel[:nLeg], wLeg, self.legArray),
+                ckern.scatterSource(psi, self.skernel[:nLeg], wLeg, self.legArray)))
+
+    def testFissionSource(self):
+        phi = kern.scalarFlux(self.ordFlux[:, :, 0, :], self.wN)
+        chiNuFission = np.outer(np.linspace(0.1, 1., self.nG), np.linspace(2., 0.5, self.nG))
+        self.assertTrue(np.array_equal(kern.fissionSource(phi, chiNuFission, 1. / 1.2 / 8.),
+                                       ckern.fissionSource(phi, chiNuFission, 1. / 1.2 / 8.)))
+
+    def testSweepDD(self):
+        sigt = np.linspace(0.5, 2.0, self.nG)
+        twoMu = 2. * np.abs(self.legArray[1])
+        denom = 1. + sigt[:, None] * 0.3 / twoMu
+        for f, o0, o1, cellOrder in ((1, 0, self.sN // 2, np.arange(self.nC)),
+                                     (2, self.sN // 2, self.sN, np.arange(self.nC)[::-1])):
+            faceIn = np.ones((self.nG, o1 - o0))
+            pyFlux, cFlux = np.array(self.ordFlux), np.array(self.ordFlux)
+            pyOut = kern.sweepDD(pyFlux, self.qin, cellOrder, o0, o1, f, faceIn, 0.3,
+                                 twoMu[o0:o1], denom[:, o0:o1])
+            cOut = ckern.sweepDD(cFlux, self.qin, cellOrder, o0, o1, f, faceIn, 0.3,
+                                 twoMu[o0:o1], denom[:, o0:o1])
+            self.assertTrue(np.array_equal(pyOut, cOut))
+            self.assertTrue(np.array_equal(pyFlux, cFlux))
+
+
+if __name__ == "__main__":
+    unittest.main()
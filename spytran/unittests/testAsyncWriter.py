@@ -0,0 +1,68 @@
+# To execute unittests ensure your pwd is in ./src
+# exec:
+#   python -m unittest unittests.testAsyncWriter
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import numpy as np
+import h5py
+from utils.asyncWriter import AsyncWriter
+
+
+class testAsyncWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def testSnapshots(self):
+        flux = np.zeros((3, 4, 20))
+        meta = {'keff': np.array(1.0), 'weights': np.ones(4)}
+        with AsyncWriter() as writer:
+            for i in range(6):
+                flux[...] = i
+                meta['keff'][...] = i
+                writer.submitSnapshot(os.path.join(self.tmpDir, 'snap_%d.h5' % i), meta, flux)
+            # solver arrays are reused right away, at most maxPending buffers
+            self.assertTrue(writer._nBuffers[(flux.shape, flux.dtype.str)] <= writer.maxPending)
+        self.assertEqual(writer.nWritten, 6)
+        for i in range(6):
+            with h5py.File(os.path.join(self.tmpDir, 'snap_%d.h5' % i), 'r') as f:
+                self.assertTrue(np.all(f['ordFluxes'][...] == i))
+                self.assertEqual(f['keff'][()], i)
+
+    def testBackpressure(self):
+        gate, done = threading.Event(), []
+
+        def slowWrite(i):
+            gate.wait()
+            done.append(i)
+        writer = AsyncWriter(maxPending=1)
+        writer.submit(slowWrite, 0)
+        writer.submit(slowWrite, 1)  # queued, the queue is now full
+        blocked = threading.Thread(target=writer.submit, args=(slowWrite, 2))
+        blocked.start()
+        blocked.join(0.2)
+        self.assertTrue(blocked.is_alive())
+        gate.set()
+        blocked.join()
+        writer.close()
+        self.assertEqual(done, [0, 1, 2])
+
+    def testErrors(self):
+        def failingWrite():
+            raise IOError("disk full")
+        writer = AsyncWriter()
+        writer.submit(failingWrite)
+        self.assertRaises(RuntimeError, writer.flush)
+        writer.submit(lambda: None)
+        writer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import numpy as np
+import materials.readXSdatabase as rxs
+import materials.materialMixxer as mx
+from materials.globalMatLib import MaterialLibrary, matLib
+from materials.batchMix import BatchMixer
+
+
+class testBatchMix(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.lib = MaterialLibrary((isoName, dict(isoData)) for isoName, isoData in matLib.iteritems())
+        for isoName, isoData in rxs.readXSFolder('./materials/newXS').iteritems():
+            cls.lib[isoName].update(isoData)
+        cls.isotopes = ['u235', 'u238', 'o16', 'h1']
+
+    def compositions(self):
+        enrich = np.linspace(0.01, 0.2, 5)
+        return np.array([[e / 3., (1. - e) / 3., 2. / 3., 0.1 * e] for e in enrich])
+
+    def assertMatches(self, mat, batch, i):
+        for prop, value in mat.macroProp.iteritems():
+            self.assertTrue(np.allclose(batch[prop][i], value, rtol=1e-12, atol=0), prop)
+        self.assertTrue(np.isclose(batch['density'][i], mat.density, rtol=1e-12))
+        for j, iso in enumerate(self.isotopes):
+            self.assertTrue(np.isclose(batch['wf'][i, j], mat.wf[iso], rtol=1e-12))
+
+    def testMix(self):
+        mixer = BatchMixer(self.isotopes, matLib=self.lib)
+        nD = self.compositions()
+        batch = mixer.mix(nD)
+        self.assertEqual(batch['Nskernel'].shape, (5,) + self.lib['u235']['skernel'].shape)
+        for i, row in enumerate(nD):
+            mat = mx.mixedMat(dict(zip(self.isotopes, row)), matLib=self.lib)
+            self.assertMatches(mat, batch, i)
+
+    def testDensities(self):
+        mixer = BatchMixer(self.isotopes, matLib=self.lib)
+        densities = np.linspace(9., 11., 5)
+        batch = mixer.mix(self.compositions(), densities=densities)
+        self.assertTrue(np.allclose(batch['density'], densities, rtol=1e-12))
+        for i, (row, density) in enumerate(zip(self.compositions(), densities)):
+            mat = mx.mixedMat(dict(zip(self.isotopes, row)), matLib=self.lib)
+            mat.setDensity(density)
+            self.assertMatches(mat, batch, i)
+        mats = mixer.materials(batch)
+        self.assertTrue(np.array_equal(mats[2].macroProp['Ntotal'], batch['Ntotal'][2]))
+
+    def testWeightFractions(self):
+        mixer = BatchMixer(['h1', 'o16'], matLib=self.lib)
+        batch = mixer.mix([[0.111, 0.889]], wfFlag=True)
+        mat = mx.mixedMat({'h1': 0.111, 'o16': 0.889}, wfFlag=True, matLib=self.lib)
+        self.assertTrue(np.allclose(batch['Ntotal'][0], mat.macroProp['Ntotal'], rtol=1e-12))
+        self.assertFalse('chi' in batch)
+
+
+if __name__ == "__main__":
+    unittest.main()
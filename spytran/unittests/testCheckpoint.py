@@ -0,0 +1,207 @@
+# To execute unittests ensure your pwd is in ./src
+# exec:
+#   python -m unittest unittests.testCheckpoint
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from utils.checkpoint import Checkpointer, saveCheckpoint, loadCheckpoint, processStartTime
+from utils.perf import Profiler
+from utils.synthetic import slabMesh1D, SynthMaterial
+from spyTran import SnSolver
+
+
+class fakeSolver(object):
+    """
+    Power iteration on a small matrix, kEig / getState / setState only.
+    """
+    def __init__(self):
+        self.A = np.array([[2., 1.], [1., 3.]])
+        self.flux, self.keff, self.nIters = np.ones(2), 1., 0
+
+    def kEig(self, residTol, kTol, finalIter):
+        self.nIters += 1
+        flux = np.dot(self.A, self.flux)
+        keffOld, self.keff = self.keff, np.linalg.norm(flux) / np.linalg.norm(self.flux)
+        self.flux = flux / np.linalg.norm(flux)
+        return self.keff, abs(self.keff - keffOld) < kTol, 0.
+
+    def getState(self):
+        return {'flux': self.flux, 'keff': self.keff}
+
+    def setState(self, state):
+        self.flux, self.keff = state['flux'], state['keff']
+
+
+def fakeSnSolver():
+    slv = SnSolver.__new__(SnSolver)
+    slv.solver, slv._startIter, slv.perf = fakeSolver(), None, Profiler()
+    slv.startTime = time.time()
+    return slv
+
+
+def slabSolver(space, mode):
+    """
+    Small gmsh free 1D problem, fixed source in mat_1 or all fissile.
+    """
+    nG, sN = 3, 4
+    materials = {'mat_1': SynthMaterial(nG, 2, fissile=mode == 'k'), 'mat_2': SynthMaterial(nG, 2, fissile=True)}
+    srcDict = {'mat_1': np.ones((nG, sN)) if mode == 'fixed' else None, 'mat_2': None}
+    return SnSolver(None, materials, {'left': 'vac', 'right': 'ref'}, srcDict, nG=nG, lOrder=2, sN=sN,
+                    space=space, mesh=slabMesh1D(16, 2), perf=False)
+
+
+class quiet(object):
+    def __enter__(self):
+        self.stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+
+    def __exit__(self, *args):
+        sys.stdout.close()
+        sys.stdout = self.stdout
+
+
+class fakeClock(object):
+    def __init__(self):
+        self.t = 0.
+
+    def __call__(self):
+        return self.t
+
+
+class testCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.fname = os.path.join(self.tmpDir, 'chk.h5')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def testAtomicWrite(self):
+        state = {'flux': np.arange(6.).reshape(2, 3), 'keff': 1.2, 'mode': 'k', 'reset': True}
+        saveCheckpoint(self.fname, state)
+        saveCheckpoint(self.fname, dict(state, keff=1.3))
+        self.assertEqual(os.listdir(self.tmpDir), ['chk.h5'])
+        loaded = loadCheckpoint(self.fname)
+        self.assertEqual(loaded['keff'], 1.3)
+        self.assertEqual(loaded['mode'], 'k')
+        self.assertTrue(loaded['reset'] is True)
+        self.assertTrue(np.array_equal(loaded['flux'], state['flux']))
+        # a failed write keeps the previous checkpoint
+        self.assertRaises(TypeError, saveCheckpoint, self.fname, {'bad': object()})
+        self.assertEqual(os.listdir(self.tmpDir), ['chk.h5'])
+        self.assertEqual(loadCheckpoint(self.fname)['keff'], 1.3)
+
+    def testPolicy(self):
+        clock = fakeClock()
+        chk = Checkpointer(self.fname, everyIters=3, everySeconds=10., wallTime=100., clock=clock)
+        decisions = []
+        for i in range(1, 40):
+            clock.t += 4.
+            write, stop = chk.iterationDone(i)
+            if write:
+                chk.write({'i': i})
+            decisions.append((i, write, stop))
+            if stop:
+                break
+        written = [i for i, write, stop in decisions if write]
+        self.assertEqual(written[:4], [3, 6, 9, 12])
+        # 4 s iterations: stop when 1.5 * 4 s no longer fits, at 96 s
+        self.assertEqual(decisions[-1], (24, True, True))
+        clock.t = 0.
+        chk = Checkpointer(self.fname, everySeconds=10., clock=clock)
+        clock.t = 11.
+        self.assertEqual(chk.iterationDone(1), (True, False))
+        # budget counted from the job start: 90 s of setup before the solve
+        clock.t = 90.
+        chk = Checkpointer(self.fname, wallTime=99., clock=clock, startTime=0.)
+        clock.t += 4.
+        self.assertEqual(chk.iterationDone(1), (True, True))
+
+    def testStartTime(self):
+        start = processStartTime()
+        if start is not None:
+            self.assertTrue(time.time() - 3600. < start <= time.time() + 1.)
+        with quiet():
+            slv = slabSolver('fe', 'fixed')
+            self.assertEqual(slv.trSolve(checkpointFile=self.fname, wallTime=time.time() - slv.startTime),
+                             'wallTime')
+
+    def testRestart(self):
+        ref = fakeSnSolver()
+        ref.kSolve(kTol=1e-12, outerIterMax=30)
+        slv = fakeSnSolver()
+        slv.kSolve(kTol=1e-12, outerIterMax=5, checkpointFile=self.fname, checkpointIters=2)
+        self.assertEqual(loadCheckpoint(self.fname)['iteration'], 4)
+        restarted = fakeSnSolver()
+        restarted.restart(self.fname, kTol=1e-12, outerIterMax=30)
+        self.assertEqual(restarted.solver.keff, ref.solver.keff)
+        self.assertEqual(restarted.solver.nIters + 4, ref.solver.nIters)
+
+    def checkSolverRestart(self, space, mode, solveArgs, chkIters):
+        """
+        Uninterrupted solve vs restart from its last checkpoint, bit for bit.
+        """
+        with quiet():
+            ref = slabSolver(space, mode)
+            solve = ref.kSolve if mode == 'k' else ref.trSolve
+            self.assertEqual(solve(checkpointFile=self.fname, checkpointIters=chkIters, **solveArgs),
+                             'converged')
+            state = loadCheckpoint(self.fname)
+            restarted = slabSolver(space, mode)
+            self.assertEqual(restarted.restart(self.fname, **solveArgs), 'converged')
+        self.assertGreater(state['iteration'], 1)
+        self.assertEqual(restarted.solver.keff, ref.solver.keff)
+        for field in ('scFluxField', 'totFluxField'):
+            self.assertTrue(np.array_equal(getattr(restarted.solver.superMesh, field),
+                                           getattr(ref.solver.superMesh, field)), field)
+        return state
+
+    def testSolverRestartFixed(self):
+        for space in ('fe', 'dg'):
+            state = self.checkSolverRestart(space, 'fixed', {'residTol': 1e-6}, 4)
+            # the operator was rebuilt at depth 1, not the one of setup
+            self.assertEqual(state['opDepth'], 1)
+            self.assertFalse(state['meshFluxReset'])
+
+    def testSolverRestartK(self):
+        for space in ('fe', 'dg'):
+            state = self.checkSolverRestart(space, 'k', {'residTol': 1e-4, 'kTol': 1e-3, 'outerIterMax': 30}, 2)
+            # the mesh fluxes are reset after an outer iteration
+            self.assertTrue(state['meshFluxReset'])
+
+    def testSnapshotsOnError(self):
+        written = []
+
+        def slowWrite(fname):
+            time.sleep(0.05)
+            written.append(fname)
+
+        def writeData(outFile, h5_fmt=True, writer=None):
+            writer.submit(slowWrite, outFile)
+        slv = fakeSnSolver()
+        slv.space, slv.solver.writeData = 'fe', writeData
+        kEig = slv.solver.kEig
+
+        def failingKEig(*args):
+            if slv.solver.nIters == 3:
+                raise ValueError("diverged")
+            return kEig(*args)
+        slv.solver.kEig = failingKEig
+        with quiet():
+            self.assertRaises(ValueError, slv.kSolve, kTol=1e-12, snapshotFile='snap_%d.h5')
+        # queued snapshots are written before the error propagates
+        self.assertEqual(written, ['snap_1.h5', 'snap_2.h5', 'snap_3.h5'])
+
+    def testSolveStatus(self):
+        with quiet():
+            self.assertEqual(fakeSnSolver().kSolve(kTol=1e-12, outerIterMax=3), 'notConverged')
+            self.assertEqual(fakeSnSolver().kSolve(kTol=1e-3, outerIterMax=30), 'converged')
+
+
+if __name__ == "__main__":
+    unittest.main()
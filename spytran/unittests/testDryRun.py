@@ -0,0 +1,152 @@
+# To execute unittests ensure your pwd is in ./src
+# exec:
+#   python -m unittest unittests.testDryRun
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from utils.gmshPreproc import gmshMesh
+from utils.perf import Profiler
+from utils import dryRun
+
+geo = """Point(1) = {0.0, 0.0, 0, 1.0};
+Point(2) = {5.0, 0.0, 0, 1.0};
+Point(3) = {10.0, 0.0, 0, 1.0};
+Line(1) = {1, 2};
+Line(2) = {2, 3};
+Physical Line(100) = {1};   // mat=fuel
+Physical Line(200) = {2};   // mat=mod
+Physical Point(10) = {1};  // bc=vac
+Physical Point(20) = {3};  // bc=ref
+"""
+
+
+def writeINP(fname, nEle=10):
+    """
+    gmsh style .inp output of a uniform 1D mesh, two regions.
+    """
+    lines = ["*Heading", " test.msh", "*Node"]
+    lines += ["%d, %f, 0, 0" % (i + 1, float(i)) for i in range(nEle + 1)]
+    lines += ["******* E L E M E N T S *************", "*Element, type=T3D2, ELSET=Line1"]
+    lines += ["%d, %d, %d" % (nEle + 2 + i, i + 1, i + 2) for i in range(nEle)]
+    half = nEle // 2
+    lines += ["*ELSET,ELSET=PhysicalLine100", ", ".join(str(nEle + 2 + i) for i in range(half)) + ","]
+    lines += ["*ELSET,ELSET=PhysicalLine200", ", ".join(str(nEle + 2 + i) for i in range(half, nEle)) + ","]
+    lines += ["*ELSET,ELSET=PhysicalPoint10", "1,", "*ELSET,ELSET=PhysicalPoint20", "%d," % (nEle + 1)]
+    with open(fname, 'w') as outfile:
+        outfile.write("\n".join(lines) + "\n")
+
+
+def gridMesh2D(n):
+    """
+    Triangulated n x n node square, one region, no gmsh.
+    """
+    mesh = gmshMesh.__new__(gmshMesh)
+    mesh.dim, mesh.renumber = 2, None
+    mesh.node_perm, mesh.dg_node_perm = None, None
+    x, y = np.meshgrid(np.arange(n, dtype=float), np.arange(n, dtype=float))
+    mesh.nodes = np.zeros((n * n, 4))
+    mesh.nodes[:, 0], mesh.nodes[:, 1], mesh.nodes[:, 2] = np.arange(n * n), x.ravel(), y.ravel()
+    ids = np.arange(n * n).reshape(n, n)
+    tris = []
+    for i in range(n - 1):
+        for j in range(n - 1):
+            tris.append([ids[i, j], ids[i + 1, j], ids[i, j + 1]])
+            tris.append([ids[i + 1, j + 1], ids[i, j + 1], ids[i + 1, j]])
+    mesh.elements = np.hstack((np.arange(len(tris))[:, None] + n * n, np.array(tris)))
+    mesh.regions = {1: {'elementIDs': mesh.elements[:, 0], 'type': 'interior', 'material': 'fuel'}}
+    mesh.regionNodes()
+    mesh.markRegionBCs()
+    return mesh
+
+
+class _Material(object):
+    def __init__(self, nG, nL=9):
+        skernel = np.zeros((nL, nG, nG))
+        skernel[0] = np.tril(np.ones((nG, nG)))
+        skernel[1] = 0.1 * skernel[0]
+        self.macroProp = {'Nskernel': skernel}
+
+
+class testDryRun(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.geoFile = os.path.join(self.tmpDir, 'slab.geo')
+        with open(self.geoFile, 'w') as outfile:
+            outfile.write(geo)
+        writeINP(self.geoFile + '.inp')
+        self.materials = {'fuel': _Material(4), 'mod': _Material(4)}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def testMeshCache(self):
+        mesh = dryRun.loadMesh(self.geoFile, dim=1)
+        self.assertTrue(mesh.cachedINP())
+        self.assertEqual(sorted(mesh.regions), [10, 20, 100, 200])
+        self.assertEqual(len(mesh.regions[100]['elements']), 5)
+
+    def testCounts1D(self):
+        mesh = dryRun.loadMesh(self.geoFile, dim=1)
+        fe = dryRun.meshCounts(mesh, 'fe')
+        self.assertEqual((fe['nElements'], fe['nDOF'], fe['nnz']), (10, 11, 31))
+        self.assertEqual((fe['envelope'], fe['luFill'], fe['boundaryElements']), (10, 31, 2))
+        dg = dryRun.meshCounts(mesh, 'dg')
+        self.assertEqual((dg['nDOF'], dg['nInteriorFaces'], dg['nnz']), (20, 9, 49))
+        # regions are numbered in dict order like enable_connectivity does,
+        # the junction may couple the first and last element
+        self.assertGreaterEqual(dg['envelope'], 4 * 9 + 10)
+
+    def testCounts2D(self):
+        mesh = gridMesh2D(5)
+        fe = dryRun.meshCounts(mesh, 'fe')
+        # 32 triangles, 56 edges of which 40 interior
+        self.assertEqual((fe['nElements'], fe['nDOF'], fe['nnz']), (32, 25, 25 + 2 * 56))
+        dg = dryRun.meshCounts(mesh, 'dg')
+        self.assertEqual((dg['nDOF'], dg['nInteriorFaces'], dg['nnz']), (96, 40, 32 * 9 + 40 * 2))
+
+    def testEstimate(self):
+        est = dryRun.estimate(self.geoFile, self.materials, nG=4, lOrder=3, sN=4, dim=1, space='dg',
+                              memLimit=2 ** 40)
+        self.assertTrue(est.fits)
+        self.assertEqual(est.memory['fluxFields'], 4 * 4 * 4 * 20 * 8)
+        self.assertEqual(est.peakBytes, sum(est.memory.values()))
+        self.assertTrue(est.iterTime > 0 and est.setupTime > 0)
+        self.assertTrue('per source iteration' in est.summary())
+        # more groups and ordinates cost more
+        big = dryRun.estimate(self.geoFile, {'fuel': _Material(8), 'mod': _Material(8)}, nG=8, lOrder=3,
+                              sN=8, dim=1, space='dg', memLimit=2 ** 40)
+        self.assertGreater(big.iterTime, est.iterTime)
+        self.assertGreater(big.memory['sysA'], est.memory['sysA'])
+
+    def testFlags(self):
+        est = dryRun.estimate(self.geoFile, self.materials, nG=4, sN=4, space='fe', memLimit=2 ** 20)
+        self.assertFalse(est.fits)
+        self.assertTrue('exceeds' in est.flags[0])
+        est = dryRun.estimate(self.geoFile, {'fuel': _Material(3)}, nG=4, sN=4, memLimit=2 ** 40,
+                              nIters=10, wallTime=1e-9)
+        self.assertFalse(est.fits)
+        self.assertEqual(len(est.flags), 3)
+
+    def testCalibrate(self):
+        est = dryRun.estimate(self.geoFile, self.materials, nG=4, sN=4, space='fe', memLimit=2 ** 40)
+        perf = Profiler()
+        perf._addTime('sourceIter/scatterSource/scatter', None, 10 * est.time['scatter'])
+        perf._addTime('sourceIter/solveFlux', None, 2 * est.time['solve'])
+        perf._addTime('sourceIter/solveFlux', None, 2 * est.time['solve'])
+        model = dryRun.calibrate(est, perf)
+        self.assertAlmostEqual(model['scatterCall'], 10 * est.model['scatterCall'])
+        self.assertAlmostEqual(model['luFillTime'], 2 * est.model['luFillTime'])
+        self.assertEqual(model['rhsCall'], est.model['rhsCall'])
+        fname = os.path.join(self.tmpDir, 'model.json')
+        dryRun.saveModel(model, fname)
+        again = dryRun.estimate(self.geoFile, self.materials, nG=4, sN=4, space='fe', memLimit=2 ** 40,
+                                model=dryRun.loadModel(fname))
+        self.assertAlmostEqual(again.time['scatter'], 10 * est.time['scatter'])
+
+
+if __name__ == "__main__":
+    unittest.main()
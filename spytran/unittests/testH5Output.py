@@ -0,0 +1,77 @@
+# To execute unittests ensure your pwd is in ./src
+# exec:
+#   python -m unittest unittests.testH5Output
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import h5py
+import utils.hdf5dump as h5d
+from utils.quadrature import fluxMomentBasis, gaussLegendre, legendreTable
+
+
+class testH5Output(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(5)
+        self.nG, self.sN, self.nNodes = 4, 8, 50
+        self.flux = rng.rand(self.nG, self.sN, self.nNodes)
+        self.wN = gaussLegendre(self.sN)[1]
+        self.meta = {'nodes': rng.rand(self.nNodes, 4), 'keff': 1.1, 'weights': self.wN, 'nGrp': self.nG}
+        self.tmpDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def testDefaultLayout(self):
+        ref, out = os.path.join(self.tmpDir, 'ref.h5'), os.path.join(self.tmpDir, 'out.h5')
+        h5d.writeToHdf5(dict(self.meta, ordFluxes=self.flux), ref)
+        h5d.writeSolution(out, self.meta, self.flux)
+        with h5py.File(ref, 'r') as f0, h5py.File(out, 'r') as f1:
+            self.assertEqual(sorted(f0.keys()), sorted(f1.keys()))
+            for name in f0.keys():
+                self.assertEqual(f0[name].dtype, f1[name].dtype)
+                self.assertTrue(np.array_equal(f0[name][...], f1[name][...]))
+            self.assertTrue(f1['ordFluxes'].chunks is None)
+
+    def testSelectedOutputs(self):
+        out = os.path.join(self.tmpDir, 'out.h5')
+        groups = [3, 1]
+        basis = fluxMomentBasis(self.wN, legendreTable(self.sN, 3), 1)
+        nodeIDs, nodeWeights = np.arange(10, 20), np.full(10, 0.5)
+        regions = [(7, nodeIDs, nodeWeights, np.arange(1., 5.), np.zeros(4))]
+        h5d.writeSolution(out, self.meta, self.flux, groups=groups, dtype=np.float32,
+                          compression='gzip', fields=('scalarFlux', 'fluxMoments', 'regionRates'),
+                          scalarBasis=0.5 * self.wN, momentBasis=basis, regions=regions)
+        phi = 0.5 * np.einsum('n,gnx->gx', self.wN, self.flux)
+        with h5py.File(out, 'r') as f:
+            self.assertFalse('ordFluxes' in f)
+            self.assertTrue(np.array_equal(f['groups'][...], groups))
+            self.assertEqual(f['scalarFlux'].dtype, np.float32)
+            self.assertEqual(f['scalarFlux'].compression, 'gzip')
+            self.assertEqual(f['scalarFlux'].chunks, (1, self.nNodes))
+            self.assertTrue(np.allclose(f['scalarFlux'][...], phi[groups], rtol=1e-6))
+            # the 0th legendre moment is the scalar flux
+            self.assertTrue(np.allclose(f['fluxMoments'][:, 0], phi[groups], rtol=1e-6))
+            self.assertEqual(f['fluxMoments'].shape, (2, 4, self.nNodes))
+            rates = f['regionRates/7']
+            self.assertAlmostEqual(rates['volume'][()], 5.)
+            flux = 0.5 * np.sum(phi[groups][:, nodeIDs], axis=1)
+            self.assertTrue(np.allclose(rates['flux'][...], flux, rtol=1e-10))
+            self.assertTrue(np.allclose(rates['total'][...], flux * np.array([4., 2.]), rtol=1e-10))
+
+    def testStreaming(self):
+        out = os.path.join(self.tmpDir, 'out.h5')
+        writer = h5d.SolutionWriter(out, self.flux.shape, chunks=True)
+        for g in reversed(range(self.nG)):
+            writer.writeGroup(g, self.flux[g])
+        writer.close()
+        with h5py.File(out, 'r') as f:
+            self.assertEqual(f['ordFluxes'].chunks, (1, self.sN, self.nNodes))
+            self.assertTrue(np.array_equal(f['ordFluxes'][...], self.flux))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+# To execute unittests ensure your pwd is in ./src
+# exec:
+#   python -m unittest unittests.testImportTime
+#
+# Import time budget: importing the solvers must not pull in the heavy
+# optional modules or read the isotope table.
+
+import os
+import sys
+import json
+import subprocess
+import unittest
+from materials.globalMatLib import MaterialLibrary, loadIsoTable, isoDictPath
+
+srcDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# seconds on top of "import numpy", generous for slow CI machines
+importBudget = 1.0
+heavyModules = ('h5py', 'matplotlib', 'pylab', 'scipy.sparse.linalg', 'scipy.misc',
+                'scipy.interpolate', 'periodictable')
+
+probe = """
+import sys, time, json
+import numpy
+t0 = time.time()
+import %s as mod
+dt = time.time() - t0
+from %s import matLib
+sys.stdout.write(json.dumps({'dt': dt, 'modules': sorted(sys.modules.keys()),
+                             'matLibLoaded': matLib._baseLoader is None}))
+"""
+
+
+def runProbe(module, matLibModule):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([srcDir, os.path.dirname(srcDir)])
+    env['MPLBACKEND'] = 'Agg'
+    out = subprocess.check_output([sys.executable, '-c', probe % (module, matLibModule)],
+                                  cwd=srcDir, env=env)
+    return json.loads(out)
+
+
+class testImportTime(unittest.TestCase):
+
+    def checkProbe(self, module, matLibModule):
+        res = runProbe(module, matLibModule)
+        for heavy in heavyModules:
+            self.assertFalse(heavy in res['modules'], heavy + ' imported by ' + module)
+        self.assertFalse(res['matLibLoaded'])
+        self.assertLess(res['dt'], importBudget)
+
+    def testSpyTran(self):
+        self.checkProbe('spytran.spyTran', 'spytran.materials.globalMatLib')
+
+    def testSn1D(self):
+        self.checkProbe('sn1D', 'materials.globalMatLib')
+
+    def testIsoTable(self):
+        isoTable = loadIsoTable()
+        self.assertTrue(len(isoTable) > 1000)
+        self.assertEqual(isoTable, loadIsoTable())  # binary table round trip
+        if 'periodictable' not in sys.modules:
+            with open(isoDictPath, 'r') as infile:
+                self.assertEqual(isoTable, json.load(infile))
+
+    def testLazyBase(self):
+        lib = MaterialLibrary(baseLoader=lambda: {'h1': {'M': 1.0, 'A': 1}, 'o16': {'M': 16.0, 'A': 8}})
+        lib.update({'h1': {'M': 1.1, 'total': [1.]}})
+        self.assertFalse(lib._baseLoader is None)
+        self.assertTrue('o16' in lib)
+        self.assertEqual(lib['h1'], {'M': 1.1, 'A': 1, 'total': [1.]})
+        self.assertEqual(sorted(lib.keys()), ['h1', 'o16'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+import shutil
+import tempfile
+import numpy as np
+import materials.materialMixxer as mx
+import materials.readXSdatabase as rxs
+from materials.globalMatLib import MaterialLibrary, matLib
+from materials.macroCache import MacroCache, macroCache
+
+
+class testMacroCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.lib = MaterialLibrary((isoName, dict(isoData)) for isoName, isoData in matLib.iteritems())
+        for isoName, isoData in rxs.readXSFolder('./materials/newXS').iteritems():
+            cls.lib[isoName].update(isoData)
+
+    def setUp(self):
+        macroCache.clear()
+
+    def tearDown(self):
+        macroCache.maxEntries = 256
+        macroCache.setCacheDir(None)
+        macroCache.clear()
+
+    def fuel(self, density=10.4):
+        mat = mx.mixedMat({'u235': 0.03, 'u238': 0.97 * 1. / 3., 'o16': 2. / 3.}, matLib=self.lib)
+        mat.setDensity(density)
+        return mat
+
+    def uncached(self, fn):
+        maxEntries, macroCache.maxEntries = macroCache.maxEntries, 0
+        try:
+            return fn()
+        finally:
+            macroCache.maxEntries = maxEntries
+
+    def assertSameMat(self, mat, ref):
+        self.assertEqual(sorted(mat.macroProp.keys()), sorted(ref.macroProp.keys()))
+        for prop, value in ref.macroProp.iteritems():
+            self.assertTrue(np.array_equal(mat.macroProp[prop], value), prop)
+        self.assertEqual(mat.density, ref.density)
+        self.assertEqual(mat.wf, ref.wf)
+
+    def testHit(self):
+        ref = self.uncached(self.fuel)
+        first = self.fuel()
+        hits = macroCache.hits
+        mat = self.fuel()
+        self.assertEqual(macroCache.hits, hits + 2)
+        self.assertSameMat(mat, ref)
+        # every mixture owns its arrays, the cached ones are read only
+        mat.macroProp['Ntotal'] *= 2.
+        self.assertSameMat(self.fuel(), ref)
+        self.assertTrue(np.array_equal(mat.macroProp['Ntotal'], 2. * ref.macroProp['Ntotal']))
+        self.assertTrue(all(value.flags.writeable for value in first.macroProp.values()
+                            if isinstance(value, np.ndarray)))
+        entry = macroCache.get(mat._compositionKey())
+        self.assertFalse(entry['macroProp']['Nskernel'].flags.writeable)
+        # a new density is a new composition
+        self.assertFalse(np.array_equal(self.fuel(9.0).macroProp['Ntotal'], ref.macroProp['Ntotal']))
+
+    def testSelfShield(self):
+        u238 = np.array(self.lib['u238']['total'])
+        ref = self.uncached(lambda: self.fuel().selfSheild())
+        ss = self.fuel().selfSheild()
+        self.assertSameMat(ss, ref)
+        self.assertSameMat(self.fuel().selfSheild(), ref)
+        # library and unshielded mixture are left alone
+        self.assertTrue(np.array_equal(self.lib['u238']['total'], u238))
+        self.assertSameMat(self.fuel(), self.uncached(self.fuel))
+        self.assertFalse(np.array_equal(ss.macroProp['Ntotal'], self.fuel().macroProp['Ntotal']))
+
+    def testLibraryChange(self):
+        mat = self.fuel()
+        lib = MaterialLibrary((isoName, dict(isoData)) for isoName, isoData in self.lib.iteritems())
+        lib['u235']['total'] = 2. * lib['u235']['total']
+        lib.touch('u235')
+        mat2 = mx.mixedMat({'u235': 0.03, 'u238': 0.97 * 1. / 3., 'o16': 2. / 3.}, matLib=lib)
+        mat2.setDensity(10.4)
+        self.assertFalse(np.array_equal(mat.macroProp['Ntotal'], mat2.macroProp['Ntotal']))
+
+    def testLRU(self):
+        cache = MacroCache(maxEntries=2)
+        for key in 'abc':
+            cache.put(key, {'macroProp': {}, 'af': {}, 'afF': {}, 'wf': {}, 'density': 1.})
+        self.assertEqual(len(cache), 2)
+        self.assertTrue(cache.get('a') is None)
+        self.assertTrue(cache.get('c') is not None)
+
+    def testDisk(self):
+        cacheDir = tempfile.mkdtemp()
+        try:
+            macroCache.setCacheDir(cacheDir)
+            ref = self.fuel()
+            # a fresh process only sees the disk tier
+            macroCache.clear()
+            macroCache.maxEntries = 0
+            mat = self.fuel()
+            self.assertEqual(macroCache.misses, 0)
+            self.assertSameMat(mat, ref)
+        finally:
+            shutil.rmtree(cacheDir)
+
+
+if __name__ == "__main__":
+    unittest.main()
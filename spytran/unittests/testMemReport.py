@@ -0,0 +1,109 @@
+# To execute unittests ensure your pwd is in ./src
+# exec:
+#   python -m unittest unittests.testMemReport
+
+import os
+import sys
+import json
+import unittest
+import subprocess
+import numpy as np
+import scipy.sparse as sps
+from utils.memReport import deepSizeOf, solverMemory, formatReport
+from utils.perf import Profiler
+
+srcDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+spanProbe = """
+import sys, json
+import numpy as np
+from utils.perf import Profiler
+from utils.memReport import peakRSS, currentRSS
+perf = Profiler(memory=True)
+# enough to raise the process peak by at least 64 MiB
+nBytes = max(peakRSS() - (currentRSS() or 0), 0) + 2 ** 27
+with perf.span('solve'):
+    with perf.span('alloc'):
+        a = np.ones(nBytes // 8)
+    del a
+res = dict((path, stat) for path, stat in perf.memStats.items())
+res['summary'] = 'peak [MiB]' in perf.summary()
+sys.stdout.write(json.dumps(res))
+"""
+
+
+class _Obj(object):
+    pass
+
+
+class testMemReport(unittest.TestCase):
+
+    def fakeSolver(self, nG=2, nOrd=4, nNodes=100):
+        slv, mesh = _Obj(), _Obj()
+        slv.superMesh, slv.wN, slv.nodes = mesh, np.ones(nOrd), np.zeros((nNodes, 3))
+        A = sps.diags([np.ones(nNodes - 1), np.ones(nNodes)], [-1, 0])
+        mesh.sysA = np.empty((nG, nOrd), dtype=object)
+        for g in range(nG):
+            for o in range(nOrd):
+                mesh.sysA[g, o] = A.tolil() if g == 0 else A.tocsc()
+        mesh.sysRHS = np.zeros((nG, nOrd, nNodes))
+        mesh.scFluxField = np.zeros((nG, nOrd, nNodes))
+        mesh.totFluxField = mesh.scFluxField  # shared, counted once
+        region = _Obj()
+        region.skernel = np.zeros((nG, nG, 9))
+        region.elements, region.belements = {}, {}
+        for i in range(nNodes - 1):
+            ele = _Obj()
+            ele.nodeScFlux = np.zeros((nG, nOrd, 2))
+            ele.fieldView = mesh.scFluxField[:, :, i:i + 2]
+            region.elements[i] = ele
+        mesh.regions = {0: region}
+        return slv
+
+    def testDeepSizeOf(self):
+        a = np.zeros(1000)
+        self.assertEqual(deepSizeOf(a), 8000)
+        # views count the data of their base once
+        seen = set()
+        self.assertEqual(deepSizeOf([a[:10], a[10:]], seen), 8000 + sys.getsizeof([a, a]))
+        self.assertEqual(deepSizeOf(a, seen), 0)
+        csc = sps.identity(50, format='csc')
+        self.assertGreaterEqual(deepSizeOf(csc), csc.data.nbytes + csc.indices.nbytes + csc.indptr.nbytes)
+        self.assertGreater(deepSizeOf(csc.tolil()), 50 * 8)
+
+    def testSolverMemory(self):
+        rows = dict(solverMemory(self.fakeSolver()))
+        self.assertEqual(rows['sysRHS'], 2 * 4 * 100 * 8)
+        self.assertEqual(rows['scFluxField'], 2 * 4 * 100 * 8)
+        self.assertEqual(rows['totFluxField'], 0)
+        # lil rows are python lists, several times the csc footprint
+        self.assertGreater(rows['sysA'], 4 * (199 * 12 + 101 * 4))
+        # element flux copies, views of the mesh field add no data
+        self.assertGreater(rows['region 0/elements'], 99 * 2 * 4 * 2 * 8)
+        self.assertLess(rows['region 0/elements'], 99 * 2 * 4 * 2 * 8 + 99 * 2000)
+        self.assertEqual(rows['region 0/scatterKernel'], 2 * 2 * 9 * 8)
+        self.assertTrue('process peak RSS' in formatReport(rows.items()))
+
+    def testReportSubtotals(self):
+        rows = [('sysA', 2 ** 20), ('region 0/elements', 2 ** 20), ('region 1/elements', 2 ** 21),
+                ('region 0/other', 2 ** 21), ('other', 2 ** 20)]
+        lines = [line.split() for line in formatReport(rows).splitlines()]
+        names = [' '.join(line[:-2]) for line in lines[1:6]]
+        self.assertEqual(names[:3], ['sysA', 'region 0/elements', 'region 0/other'])
+        subtotals = dict((' '.join(line[:-2]), float(line[-2])) for line in lines if line[-3:-2] == ['total'])
+        self.assertEqual(subtotals, {'region 0 total': 3., 'region 1 total': 2.})
+        self.assertTrue(['total', '7.000'] in lines)
+
+    def testPeakRSSPerSpan(self):
+        # in a fresh interpreter: the peak is close to the current RSS, so
+        # the allocation below does not depend on what earlier tests used
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join([srcDir, os.path.dirname(srcDir)])
+        res = json.loads(subprocess.check_output([sys.executable, '-c', spanProbe], cwd=srcDir, env=env))
+        self.assertGreater(res['solve/alloc'][1], 2 ** 26)
+        self.assertGreaterEqual(res['solve'][0], res['solve/alloc'][0])
+        self.assertTrue(res['summary'])
+        self.assertEqual(Profiler().memStats, {})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import numpy as np
+from utils.gmshPreproc import gmshMesh
+from utils import meshOrder as mo
+
+
+def scrambled1DMesh(nEle, renumber, seed=42):
+    """
+    Build a 1D gmshMesh by hand (no gmsh) with randomly labeled nodes.
+    """
+    rng = np.random.RandomState(seed)
+    labels = rng.permutation(nEle + 1)
+    mesh = gmshMesh.__new__(gmshMesh)
+    mesh.dim = 1
+    mesh.renumber = renumber
+    mesh.node_perm, mesh.dg_node_perm = None, None
+    mesh.nodes = np.zeros((nEle + 1, 4))
+    mesh.nodes[:, 0] = np.arange(nEle + 1)
+    mesh.nodes[labels, 1] = np.linspace(0., 10., nEle + 1)
+    mesh.elements = np.array([[nEle + 1 + i, labels[i], labels[i + 1]] for i in range(nEle)])
+    mesh.regions = {1: {'elementIDs': mesh.elements[:, 0], 'type': 'interior', 'material': 'mat'},
+                    2: {'elementIDs': np.array([labels[0]]), 'type': 'bc', 'bc': 'vac'},
+                    3: {'elementIDs': np.array([labels[-1]]), 'type': 'bc', 'bc': 'ref'}}
+    if renumber:
+        mesh.renumber_nodes(renumber)
+    mesh.regionNodes()
+    mesh.markRegionBCs()
+    return mesh
+
+
+class testMeshOrder(unittest.TestCase):
+
+    def testRCMBandwidth(self):
+        n = 12
+        ids = np.random.RandomState(3).permutation(n * n).reshape(n, n)
+        tris = []
+        for i in range(n - 1):
+            for j in range(n - 1):
+                tris.append([ids[i, j], ids[i + 1, j], ids[i, j + 1]])
+                tris.append([ids[i + 1, j + 1], ids[i + 1, j], ids[i, j + 1]])
+        adj = mo.node_adjacency(np.array(tris), n * n)
+        order = mo.rcm_order(adj)
+        self.assertEqual(sorted(order), range(n * n))
+        reordered = adj[order][:, order]
+        self.assertTrue(mo.bandwidth(reordered) <= 2 * n)
+        self.assertTrue(mo.bandwidth(reordered) < mo.bandwidth(adj) / 4)
+
+    def testHilbertLocality(self):
+        n = 32
+        x, y = np.meshgrid(np.arange(n), np.arange(n))
+        pts = np.vstack((x.ravel(), y.ravel())).T.astype(float)
+        shuffle = np.random.RandomState(0).permutation(n * n)
+        order = mo.hilbert_order(pts[shuffle])
+        self.assertEqual(sorted(order), range(n * n))
+        steps = np.linalg.norm(np.diff(pts[shuffle][order], axis=0), axis=1)
+        # consecutive points on a Hilbert curve through a grid are neighbors
+        self.assertTrue(np.allclose(steps, 1.0))
+        # 1D points are just sorted
+        xs = np.random.RandomState(1).rand(20)
+        self.assertTrue(np.all(np.diff(xs[mo.hilbert_order(xs)]) >= 0))
+
+    def testCGRenumber(self):
+        ref = scrambled1DMesh(40, None)
+        mesh = scrambled1DMesh(40, 'rcm')
+        perm = mesh.node_perm
+        adj = mo.node_adjacency(mesh.elements[:, 1:], len(mesh.nodes))
+        self.assertEqual(mo.bandwidth(adj), 1)
+        self.assertTrue(np.all(mesh.nodes[perm, 1] == ref.nodes[:, 1]))
+        self.assertTrue(np.all(mesh.nodes[:, 0] == np.arange(len(mesh.nodes))))
+        # boundary conditions follow their nodes
+        for bc in ('vac', 'ref'):
+            refIDs = ref.regions[1]['bcElms'][bc].values()[0]
+            newIDs = mesh.regions[1]['bcElms'][bc].values()[0]
+            self.assertTrue(np.all(perm[refIDs] == newIDs))
+
+    def testDGRenumber(self):
+        ref = scrambled1DMesh(40, None)
+        ref.enable_connectivity()
+        mesh = scrambled1DMesh(40, 'hilbert')
+        mesh.enable_connectivity()
+        perm = mesh.dg_node_perm
+        self.assertEqual(sorted(perm), range(ref.total_dg_nodes))
+        self.assertTrue(np.all(mesh.global_nodes[perm, 1] == ref.global_nodes[:, 1]))
+        # dg nodes are numbered left to right after ordering the elements
+        self.assertTrue(np.all(np.diff(mesh.global_nodes[:, 1]) >= 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
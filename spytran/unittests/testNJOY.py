@@ -0,0 +1,81 @@
+# To execute unittests ensure your pwd is in ./src
+# exec:
+#   python -m unittest unittests.testNJOY
+#
+# NJOY output conversion, through the .xs text file and straight to HDF5
+
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+import h5py
+import materials.readXS as rx
+import utils.njoyParse as njp
+import utils.njoy2h5 as n2h
+
+
+def njoyTable(header, rows):
+    lines = [' for mf  %s and mt%s ' % header, '', ' group  constants', '']
+    lines += ['  ' + '  '.join(str(v) for v in row) for row in rows]
+    return '\n'.join(lines) + '\n\n\n'
+
+
+def writeNJOYout(fname, nG=3, lord=1, seed=0):
+    """
+    Minimal njoy-like output: total (2 dilutions), scattering kernel,
+    fission and nu tables.
+    """
+    rng = np.random.RandomState(seed)
+    total, skernel = [], []
+    for g in range(1, nG + 1):
+        sigInf = 1. + rng.rand()
+        total.append([g, 0, '%.6e' % sigInf, '%.6e' % (0.9 * sigInf), '%.6e' % (0.8 * sigInf)])
+        total.append([g, 1, '%.6e' % sigInf, '%.6e' % sigInf, '%.6e' % sigInf])
+        for gp in range(g, nG + 1):
+            for l in range(lord + 1):
+                skernel.append([g, gp, l, '%.6e' % (rng.rand() / (l + 1))])
+    fission = [[g, '%.6e' % rng.rand()] for g in range(1, nG + 1)]
+    nu = [[g, '%.6e' % (2. + rng.rand())] for g in range(1, nG + 1)]
+    with open(fname, 'w') as f:
+        f.write(njoyTable((' 3', '  1'), total))
+        f.write(njoyTable((' 6', '  2'), skernel))
+        f.write(njoyTable((' 3', ' 18'), fission))
+        f.write(njoyTable((' 3', '452'), nu))
+
+
+class testNJOY(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        for seed, name in enumerate(('U235', 'C0')):
+            writeNJOYout(os.path.join(self.tmpDir, name), seed=seed)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def testDirect(self):
+        # straight conversion matches the .xs text path up to its rounding
+        njoyOut = os.path.join(self.tmpDir, 'U235')
+        njp.readNJOY(njoyOut, njoyOut + '.xs')
+        ref = rx.readXS(njoyOut + '.xs')
+        xsData = njp.njoy2XS(njp.parseNJOY(njoyOut))
+        self.assertEqual(sorted(ref.keys()), sorted(xsData.keys()))
+        for key in ref:
+            self.assertEqual(ref[key].shape, xsData[key].shape)
+            self.assertTrue(np.allclose(ref[key], xsData[key], rtol=1e-4, atol=0), key)
+
+    def testBuildLibrary(self):
+        inFiles = n2h.findInputs(self.tmpDir)
+        self.assertEqual(len(inFiles), 2)
+        h5Path = os.path.join(self.tmpDir, 'lib.h5')
+        self.assertEqual(n2h.buildLibrary(inFiles, h5Path, nProcs=2, verbose=False), [])
+        with h5py.File(h5Path, 'r') as h5f:
+            self.assertEqual(sorted(h5f.keys()), ['c12', 'u235'])
+            ref = njp.njoy2XS(njp.parseNJOY(os.path.join(self.tmpDir, 'C0')))
+            for key, data in ref.iteritems():
+                self.assertTrue(np.array_equal(h5f['c12'][key][...], data))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+# To execute unittests ensure your pwd is in ./src
+# exec:
+#   python -m unittest unittests.testPerf
+
+import os
+import json
+import time
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import scipy.sparse as sps
+from utils.perf import Profiler
+from spytran.fe.mesh import SuperMesh
+
+
+class testPerf(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def testSpans(self):
+        perf = Profiler(trace=True)
+        with perf.span('solve'):
+            for g in range(2):
+                for o in range(3):
+                    with perf.span('gmres', key=(g, o)):
+                        pass
+                    perf.count('gmresIters', g + o, key=(g, o))
+        perf.gauge('nnz', 10, key=(0, 0))
+        perf.gauge('nnz', 12, key=(1, 0))
+        totals = perf.totals()
+        self.assertEqual(sorted(totals), ['solve', 'solve/gmres'])
+        self.assertEqual(totals['solve/gmres'][0], 6)
+        self.assertEqual(len(perf.totals(keyed=True)), 7)
+        self.assertEqual(perf.counters[('gmresIters', (1, 2))], 3)
+        summary = perf.summary()
+        self.assertTrue('counter: gmresIters' in summary and '  gmres' in summary)
+        self.assertTrue('gauge: nnz' in summary and ' 22' in summary)
+        perf.writeJSON(os.path.join(self.tmpDir, 'perf.json'))
+        perf.writeChromeTrace(os.path.join(self.tmpDir, 'trace.json'))
+        with open(os.path.join(self.tmpDir, 'trace.json')) as infile:
+            events = json.load(infile)['traceEvents']
+        self.assertEqual(len(events), 7)
+        self.assertTrue(all(event['ph'] == 'X' and event['dur'] >= 0 for event in events))
+
+    def testDisabled(self):
+        perf = Profiler(enabled=False)
+        with perf.span('a'):
+            perf.count('n')
+        self.assertEqual((perf.timers, perf.counters), ({}, {}))
+
+    def testOverhead(self):
+        perf = Profiler()
+        tStart = time.time()
+        for i in range(20000):
+            with perf.span('a', key=(i % 4, 0)):
+                pass
+        # a few microseconds per span
+        self.assertLess(time.time() - tStart, 1.0)
+
+    def testSweepCounters(self):
+        # gmres iterations per (g, o) of a bare super mesh
+        mesh = SuperMesh.__new__(SuperMesh)
+        mesh.nG, mesh.sNords, nNodes = 2, 2, 30
+        mesh.perf, mesh.regions = Profiler(), {}
+        A = sps.diags([-np.ones(nNodes - 1), 3. * np.ones(nNodes), -np.ones(nNodes - 1)], [-1, 0, 1]).tocsc()
+        mesh.sysA = np.empty((2, 2), dtype=object)
+        mesh.sysP = np.empty((2, 2), dtype=object)
+        for g in range(2):
+            for o in range(2):
+                mesh.sysA[g, o] = A
+        mesh.sysRHS = np.ones((2, 2, nNodes))
+        mesh.scFluxField = np.zeros((2, 2, nNodes))
+        mesh.totFluxField = np.ones((2, 2, nNodes))
+        mesh.sweepFlux(1e-10)
+        self.assertTrue(np.allclose(A.dot(mesh.scFluxField[1, 1]), 1.))
+        self.assertTrue(all(mesh.perf.counters[('gmresIters', (g, o))] > 0 for g in range(2) for o in range(2)))
+        self.assertEqual(mesh.perf.totals()['gmres'][0], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
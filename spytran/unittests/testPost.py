@@ -0,0 +1,101 @@
+# To execute unittests ensure your pwd is in ./src
+# exec:
+#   python -m unittest unittests.testPost
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import h5py
+import utils.hdf5dump as h5d
+from spytran.fe.post import Fe1DOutput, Fe2DOutput
+from spytran.dg.dg_post import Fe1DOutput as Dg1DOutput
+
+
+class testPost(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(9)
+        self.nG, self.sN, self.nNodes = 12, 6, 101
+        self.flux = rng.rand(self.nG, self.sN, self.nNodes)
+        self.wN = rng.rand(self.sN)
+        self.perm = rng.permutation(self.nNodes)
+        nodes = np.zeros((self.nNodes, 7))
+        nodes[:, 0] = np.arange(self.nNodes)
+        nodes[:, 1] = np.repeat(np.arange(self.nNodes // 2 + 1), 2)[:self.nNodes] + 0.5
+        nodes[:, 4] = rng.rand(self.nNodes) * 10.
+        self.meta = {'nodes': nodes, 'weights': self.wN, 'nGrp': self.nG}
+        self.tmpDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def refAngleInt(self, angNorm, perm=None):
+        # element by element reference
+        phi = np.zeros((self.nG, self.nNodes))
+        for g in range(self.nG):
+            for i in range(self.nNodes):
+                phi[g, i] = angNorm * np.sum(self.wN * self.flux[g, :, i])
+        return phi if perm is None else phi[:, perm]
+
+    def testChunkedReduction(self):
+        out = os.path.join(self.tmpDir, 'sol.h5')
+        for kwargs in ({}, {'compression': 'gzip'}):
+            h5d.writeSolution(out, self.meta, self.flux, **kwargs)
+            for cls, angNorm in ((Fe1DOutput, 0.5), (Fe2DOutput, 0.25)):
+                post = cls(out, chunkNodes=7)
+                self.assertFalse('angleIntFlux' in post.__dict__)
+                self.assertTrue(np.allclose(post.angleIntFlux, self.refAngleInt(angNorm), rtol=1e-13))
+                self.assertTrue(np.allclose(post.totFlux, self.refAngleInt(angNorm).sum(axis=0), rtol=1e-13))
+                post.close()
+
+    def testRenumbered(self):
+        out = os.path.join(self.tmpDir, 'sol.h5')
+        h5d.writeSolution(out, dict(self.meta, nodePerm=self.perm), self.flux)
+        post = Fe1DOutput(out)
+        self.assertTrue(np.allclose(post.angleIntFlux, self.refAngleInt(0.5, self.perm), rtol=1e-13))
+        self.assertTrue(np.array_equal(post.ordFlux, self.flux[:, :, self.perm]))
+        self.assertTrue(np.array_equal(post.nodes[:, 0], np.arange(self.nNodes)))
+        post.close()
+
+    def testScalarFluxFile(self):
+        out = os.path.join(self.tmpDir, 'sol.h5')
+        h5d.writeSolution(out, self.meta, self.flux, fields=('scalarFlux', ), scalarBasis=0.5 * self.wN)
+        post = Fe1DOutput(out)
+        self.assertTrue(np.allclose(post.angleIntFlux, self.refAngleInt(0.5), rtol=1e-13))
+        post.close()
+
+    def testFluxTable(self):
+        out, table = os.path.join(self.tmpDir, 'sol.h5'), os.path.join(self.tmpDir, 'table.h5')
+        h5d.writeSolution(out, self.meta, self.flux)
+        post = Dg1DOutput(out)
+        nodes = np.array(post.nodes)
+        post.genFluxTable(table)
+        # dg node positions are nudged without touching the node table
+        self.assertTrue(np.array_equal(post.nodes, nodes))
+        with h5py.File(table, 'r') as f:
+            self.assertEqual(len(f.keys()), 2 * self.nG)
+            order = np.argsort(f['mesh11'][...])
+            self.assertTrue(np.array_equal(order, np.arange(self.nNodes)))
+        post.close()
+
+    def testGroupSubset(self):
+        out, table = os.path.join(self.tmpDir, 'sol.h5'), os.path.join(self.tmpDir, 'table.h5')
+        h5d.writeSolution(out, self.meta, self.flux, groups=[3, 1])
+        post = Fe1DOutput(out)
+        self.assertEqual(list(post.groups), [3, 1])
+        self.assertEqual(post.angleIntFlux.shape, (2, self.nNodes))
+        self.assertTrue(np.allclose(post.groupFlux(3), self.refAngleInt(0.5)[3], rtol=1e-13))
+        self.assertTrue(np.allclose(post.groupFlux(1), self.refAngleInt(0.5)[1], rtol=1e-13))
+        self.assertRaises(SystemExit, post.groupFlux, 0)
+        post.genFluxTable(table)
+        with h5py.File(table, 'r') as f:
+            self.assertEqual(sorted(f.keys()), ['groupFlx1', 'groupFlx3', 'mesh1', 'mesh3'])
+            order = np.argsort(post.nodeX(), kind='mergesort')
+            self.assertTrue(np.allclose(f['groupFlx3'][...], self.refAngleInt(0.5)[3][order]))
+        post.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
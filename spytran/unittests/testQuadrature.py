@@ -0,0 +1,75 @@
+# To execute unittests ensure your pwd is in ./src
+# exec:
+#   python -m unittest unittests.testQuadrature
+
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import scipy.special as spc
+from utils import quadrature as qd
+from utils.ordReader import D2quadSet, sharedD2quadSet
+
+
+class testQuadrature(unittest.TestCase):
+
+    def testTables(self):
+        rng = np.random.RandomState(3)
+        mu, omega = rng.uniform(-1, 1, 7), rng.uniform(0, 2 * np.pi, 7)
+        P = qd.legendreArray(mu, 5)
+        Ylm = qd.sphericalHarmonics(mu, omega, 5)
+        for l in range(6):
+            self.assertTrue(np.array_equal(P[l], spc.eval_legendre(l, mu)))
+            for m in range(6):
+                if m > l:
+                    self.assertTrue(np.all(Ylm[m, l] == 0.))
+                    continue
+                C = (2 * l + 1) * spc.factorial(l - m) / spc.factorial(l + m)
+                ref = np.sqrt(C) * spc.lpmv(m, l, mu) * np.cos(m * omega)
+                self.assertTrue(np.allclose(Ylm[m, l], ref, rtol=1e-12, atol=1e-14))
+
+    def testLevelSymmetric(self):
+        # tabulated LQn sets
+        tables = {4: ([0.3500212, 0.8688903], [1 / 3.]),
+                  6: ([0.2666355, 0.6815076, 0.9261808], [0.1761263, 0.1572071]),
+                  8: ([0.2182179, 0.5773503, 0.7867958, 0.9511897], [0.1209877, 0.0907407, 0.0925926])}
+        for sN, (muRef, wRef) in tables.items():
+            mu, pairs, w = qd.levelSymmetric(sN)
+            self.assertTrue(np.allclose(mu, muRef, atol=2e-7))
+            self.assertTrue(np.allclose(np.unique(np.round(w, 7)), np.unique(wRef), atol=2e-7))
+
+    def testMoments(self):
+        # <mu^2a eta^2b> over the upper hemisphere
+        def dfact(n):
+            return float(np.prod(np.arange(n, 0, -2))) if n > 0 else 1.
+        for kind, orders in (('levelSym', (4, 8, 12, 16)), ('product', (4, 8, 20))):
+            for sN in orders:
+                q = D2quadSet(sN, 4, kind)
+                self.assertEqual(q.sNords, len(q.wN))
+                self.assertTrue(np.all(q.wN > 0))
+                for a in range(sN // 2 - 1):
+                    ref = 4 * dfact(2 * a - 1) / dfact(2 * a + 3)
+                    self.assertAlmostEqual(np.sum(q.wN * q.mus ** (2 * a) * q.etas ** 2), ref, 12)
+
+    def testCache(self):
+        self.assertTrue(qd.legendreTable(8, 4) is qd.legendreTable(8, 4))
+        self.assertFalse(qd.legendreTable(8, 4).flags.writeable)
+        self.assertTrue(sharedD2quadSet(4) is sharedD2quadSet(4))
+        cacheDir = tempfile.mkdtemp()
+        memCache = dict(qd._memCache)
+        try:
+            qd.setCacheDir(cacheDir)
+            qd._memCache.clear()
+            ref = np.array(qd.legendreTable(6, 3))
+            qd._memCache.clear()
+            self.assertTrue(np.array_equal(qd.legendreTable(6, 3), ref))
+            self.assertTrue(qd.diskCache.get(('legendre', None, 6, 3, 1)) is not None)
+        finally:
+            qd.setCacheDir(None)
+            qd._memCache.clear()
+            qd._memCache.update(memCache)
+            shutil.rmtree(cacheDir)
+
+
+if __name__ == "__main__":
+    unittest.main()
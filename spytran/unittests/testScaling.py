@@ -0,0 +1,107 @@
+# To execute unittests ensure your pwd is in ./src
+# exec:
+#   python -m unittest unittests.testScaling
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from utils.perf import Profiler
+from utils import scaling
+
+small = {'sN': 2, 'nG': 2, 'lOrder': 1, 'size': 20}
+
+
+class testScaling(unittest.TestCase):
+
+    def testFit(self):
+        x = np.array([10., 20., 40., 80.])
+        p, c, r2 = scaling.fitExponent(x, 3. * x ** 1.5)
+        self.assertAlmostEqual(p, 1.5)
+        self.assertAlmostEqual(c, 3.)
+        self.assertAlmostEqual(r2, 1.)
+        # zero times (phase not run) are dropped
+        self.assertEqual(scaling.fitExponent(x, [0., 0., 0., 1.]), None)
+        self.assertEqual(scaling.fitExponent([5, 5], [1., 2.]), None)
+
+    def testPhaseTotals(self):
+        perf = Profiler()
+        perf._addTime('buildSysMatrix', None, 1.)
+        perf._addTime('buildSysMatrix/constructA', None, 0.5)
+        perf._addTime('sourceIter', None, 4.)
+        perf._addTime('sourceIter/scatterSource/buildSysMatrix', None, 2.)
+        perf._addTime('sourceIter/solveFlux/gmres', (0, 1), 1.)
+        perf._addTime('sourceIter/solveFlux/gmres', (1, 1), 1.)
+        totals = scaling.phaseTotals(perf)
+        self.assertEqual(totals['buildSysMatrix'], 3.)
+        self.assertEqual(totals['gmres'], 2.)
+        self.assertFalse('sourceIter' in totals or 'constructA' in totals)
+
+    def testStudy(self):
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+        try:
+            study = scaling.scalingStudy('size', [20, 40], variants=[{'space': 'fe'}, {'space': 'dg'}],
+                                         isolate=False, sN=2, nG=2, lOrder=1)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        fe, dg = study.records['space=fe'], study.records['space=dg']
+        self.assertEqual([r['nElements'] for r in fe], [20, 40])
+        self.assertTrue(all(r['iterations'] > 0 and r['residual'] < 1e-5 for r in fe + dg))
+        self.assertTrue(all(r['phases']['connectivity'] > 0 for r in dg))
+        fits = study.fits()
+        self.assertEqual(fits['space=fe']['connectivity'], None)
+        self.assertTrue(fits['space=dg']['scatter'][0] > 0)
+        report = study.report()
+        self.assertTrue('space=dg' in report and 'buildSysMatrix' in report)
+        tmpDir = tempfile.mkdtemp()
+        try:
+            fname = os.path.join(tmpDir, 'study.json')
+            study.writeJSON(fname)
+            again = scaling.ScalingStudy.readJSON(fname)
+            self.assertEqual(again.fits()['space=fe']['wall'], fits['space=fe']['wall'])
+        finally:
+            shutil.rmtree(tmpDir)
+
+    def testRepeat(self):
+        runs = {1: [{'wall': 2.}, {'error': ['killed']}, {'wall': 1.}], 2: [{'error': ['a']}, {'error': ['b']}]}
+        runCase = scaling.runCase
+        scaling.runCase = lambda case: dict(runs[case['size']].pop(0), iterations=1)
+        try:
+            study = scaling.ScalingStudy('size', [1], {'sN': 2}, [{}])
+            study.run(isolate=False, repeat=3, show=False)
+            self.assertEqual(study.records.values()[0], [{'wall': 1., 'iterations': 1}])
+            # failed only when every repeat failed
+            study.values = [2]
+            study.run(isolate=False, repeat=2, show=False)
+            self.assertEqual(study.records.values()[0][0]['error'], ['b'])
+        finally:
+            scaling.runCase = runCase
+
+    def testNoProc(self):
+        currentRSS = scaling.currentRSS
+        scaling.currentRSS = lambda: None
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+        try:
+            record = scaling.runCase(small)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+            scaling.currentRSS = currentRSS
+        self.assertTrue(record['memory'] >= 0)
+
+    def testIsolated(self):
+        record = scaling.runIsolated(dict(small, space='dg'))
+        self.assertFalse('error' in record)
+        self.assertEqual(record['case']['space'], 'dg')
+        self.assertTrue(record['memory'] >= 0 and record['peakRSS'] > 0)
+        failed = scaling.runIsolated(dict(small, dim=3))
+        self.assertTrue('error' in failed)
+
+
+if __name__ == "__main__":
+    unittest.main()
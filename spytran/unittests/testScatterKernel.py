@@ -0,0 +1,83 @@
+# To execute unittests ensure your pwd is in ./src
+# exec:
+#   python -m unittest unittests.testScatterKernel
+#
+# Checks the truncated / banded scattering kernel against the dense one
+
+import unittest
+import numpy as np
+import cyth.sn1Dcell as snc1d
+import cyth.scattSource as kern
+from materials.scatterKernel import ScatterKernel, effectiveLegOrder
+try:
+    import cyth.scattSrc as ckern
+except ImportError:
+    ckern = None
+
+
+class testScatterKernel(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(11)
+        self.nC, self.nG, self.lO, self.sN = 5, 6, 5, 8
+        # downscatter only, plus upscatter into the last two groups, with
+        # exactly zero P4 and P5 moments
+        self.skernel = np.tril(rng.rand(self.lO + 1, self.nG, self.nG))
+        self.skernel[:, 4:, 5] = rng.rand(self.lO + 1, 2)
+        self.skernel[:, 0, 3] = 0.
+        self.skernel[4:] = 0.
+        self.psi = rng.rand(self.nC, self.nG, self.sN)
+        self.cell = snc1d.Cell1DSn(0., 1.0, self.nG, self.lO, self.sN)
+
+    def testTruncation(self):
+        self.assertEqual(effectiveLegOrder(self.skernel), 3)
+        sk = ScatterKernel(self.skernel)
+        self.assertEqual(sk.legOrder, 3)
+        self.assertEqual(sk.dense.shape, (4, self.nG, self.nG))
+        self.assertEqual(ScatterKernel(self.skernel, maxLegOrder=1).legOrder, 1)
+        # tiny moments are dropped with a tolerance
+        self.skernel[3] *= 1e-9
+        self.assertEqual(ScatterKernel(self.skernel, tol=1e-6).legOrder, 2)
+
+    def testBands(self):
+        sk = ScatterKernel(self.skernel)
+        self.assertTrue(np.array_equal(sk.rowLo, [0, 0, 0, 0, 0, 0]))
+        self.assertTrue(np.array_equal(sk.rowHi, [1, 2, 3, 4, 6, 6]))
+        self.assertTrue(np.array_equal(sk.colLo, [0, 1, 2, 3, 4, 4]))
+        self.assertTrue(sk.upscatter)
+        self.assertFalse(ScatterKernel(np.tril(self.skernel)).upscatter)
+
+    def testScatterSource(self):
+        sk = ScatterKernel(self.skernel)
+        wLeg, legArray = self.cell.wN * self.cell.legArray, self.cell.legArray
+        ref = kern.scatterSource(self.psi, self.skernel, wLeg, legArray)
+        q = kern.scatterSource(self.psi, sk.dense, wLeg, legArray, sk.band)
+        self.assertTrue(np.allclose(q, ref, rtol=1e-13))
+        if ckern is not None:
+            q = ckern.scatterSource(self.psi, sk.dense, wLeg, legArray, sk.band)
+            self.assertTrue(np.allclose(q, ref, rtol=1e-13))
+
+    def testTolerance(self):
+        # a small transfer inside the row band of group 0 but outside the
+        # column band of group 1: dropped by both kernels alike
+        skernel = np.zeros((2, 4, 4))
+        skernel[0] = np.tril(np.ones((4, 4)))
+        skernel[1] = 0.5 * skernel[0]
+        skernel[:, 0, 1] = 1e-4
+        sk = ScatterKernel(skernel, tol=1e-3)
+        self.assertFalse(sk.upscatter)
+        self.assertTrue(np.array_equal(sk.dense, np.tril(skernel)))
+        self.assertEqual(skernel[0, 0, 1], 1e-4)  # input untouched
+        psi = self.psi[:, :4]
+        cell = snc1d.Cell1DSn(0., 1.0, 4, 1, self.sN)
+        wLeg, legArray = cell.wN * cell.legArray, cell.legArray
+        ref = kern.scatterSource(psi, np.tril(skernel), wLeg, legArray)
+        q = kern.scatterSource(psi, sk.dense, wLeg, legArray, sk.band)
+        self.assertTrue(np.allclose(q, ref, rtol=1e-13))
+        if ckern is not None:
+            q = ckern.scatterSource(psi, sk.dense, wLeg, legArray, sk.band)
+            self.assertTrue(np.allclose(q, ref, rtol=1e-13))
+
+
+if __name__ == "__main__":
+    unittest.main()
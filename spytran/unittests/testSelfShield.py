@@ -0,0 +1,58 @@
+import unittest
+import numpy as np
+import scipy.interpolate as spi
+import materials.readXSdatabase as rxs
+import materials.materialMixxer as mx
+import materials.selfShield as ssh
+from materials.globalMatLib import MaterialLibrary, matLib
+from materials.batchMix import BatchMixer
+
+
+class testSelfShield(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.lib = MaterialLibrary((isoName, dict(isoData)) for isoName, isoData in matLib.iteritems())
+        for isoName, isoData in rxs.readXSFolder('./materials/newXS').iteritems():
+            cls.lib[isoName].update(isoData)
+        cls.fuel = {'u235': 0.01, 'u238': 0.3, 'o16': 0.64, 'h1': 0.2}
+
+    def testInterp(self):
+        # same as one interp1d per group, including the fill value
+        ffactor = self.lib['u238']['ffactor']
+        sigb = np.logspace(-7, 7, 15)
+        f = ssh.interpFfactor(ffactor[:, None, :], sigb[None, :])
+        grid = np.log(np.append(ssh.dilutionGrid, 1e-5))
+        for g, gffactors in enumerate(ffactor):
+            fn = spi.interp1d(grid, np.append(gffactors, gffactors[-1]), kind='linear',
+                              fill_value=1.0, bounds_error=False)
+            self.assertTrue(np.allclose(f[g], fn(np.log(sigb)), rtol=1e-12))
+
+    def testIterated(self):
+        mat = mx.mixedMat(self.fuel, matLib=self.lib)
+        single = mat.selfSheild(maxIter=1)
+        ss = mat.selfSheild(tol=1e-10)
+        # sigma_0 is consistent with the shielded totals of the other isotopes
+        rxn = dict((iso, ss.nDdict[iso] * ss.microDat[iso]['total']) for iso in self.fuel)
+        for iso in self.fuel:
+            sigb = (sum(rxn.values()) - rxn[iso]) / ss.nDdict[iso]
+            self.assertTrue(np.allclose(ss.microDat[iso]['sig_b'], sigb, rtol=1e-8))
+        self.assertFalse(np.allclose(ss.macroProp['Ntotal'], single.macroProp['Ntotal'], rtol=1e-6))
+
+    def testBatch(self):
+        isotopes = sorted(self.fuel.keys())
+        mixer = BatchMixer(isotopes, matLib=self.lib)
+        nD = np.array([[self.fuel[iso] * scale for iso in isotopes] for scale in (0.5, 1., 2.)])
+        modBool, resAbsBool = {'u235': False}, {'o16': False, 'h1': False}
+        batch = mixer.mix(nD, shield=True, modBool=modBool, resAbsBool=resAbsBool)
+        for i, row in enumerate(nD):
+            ss = mx.mixedMat(dict(zip(isotopes, row)), matLib=self.lib).selfSheild(dict(modBool),
+                                                                                  dict(resAbsBool))
+            for prop in ('Ntotal', 'Nnufission', 'Nskernel'):
+                self.assertTrue(np.allclose(batch[prop][i], ss.macroProp[prop], rtol=1e-10), prop)
+            for j, iso in enumerate(isotopes):
+                self.assertTrue(np.allclose(batch['f'][i, j], ss.microDat[iso]['f'], rtol=1e-10))
+
+
+if __name__ == "__main__":
+    unittest.main()
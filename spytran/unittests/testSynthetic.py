@@ -0,0 +1,56 @@
+# To execute unittests ensure your pwd is in ./src
+# exec:
+#   python -m unittest unittests.testSynthetic
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from utils.synthetic import slabMesh1D, squareMesh2D, SynthMaterial, writeXSFile
+from materials.readXS import readXS
+from materials.scatterKernel import ScatterKernel
+
+
+class testSynthetic(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def testSlab(self):
+        mesh = slabMesh1D(20, nRegions=3)
+        interior = [r for r in mesh.regions.values() if r['type'] == 'interior']
+        self.assertEqual(sum(len(r['elements']) for r in interior), 20)
+        self.assertEqual(sorted(r['material'] for r in interior), ['mat_1', 'mat_2', 'mat_3'])
+        # both boundary nodes are linked to an element of an end region
+        bcs = [bc for r in interior for bc, eles in r['bcElms'].items() if eles]
+        self.assertEqual(sorted(bcs), ['left', 'right'])
+
+    def testSquare(self):
+        mesh = squareMesh2D(6, nRegions=2)
+        interior = [r for r in mesh.regions.values() if r['type'] == 'interior']
+        self.assertEqual(sum(len(r['elements']) for r in interior), 2 * 5 ** 2)
+        bcNodes = dict((r['bc'], r['nodeIDs']) for r in mesh.regions.values() if r['type'] == 'bc')
+        self.assertTrue(np.all(mesh.nodes[bcNodes['top'], 2] == 10.))
+        self.assertTrue(np.all(mesh.nodes[bcNodes['left'], 1] == 0.))
+        renumbered = squareMesh2D(6, nRegions=2, renumber='rcm')
+        self.assertEqual(sorted(renumbered.node_perm), range(36))
+
+    def testMaterialAndXSFile(self):
+        mat = SynthMaterial(8, 3, c=0.6, fissile=True)
+        skernel = mat.macroProp['Nskernel']
+        self.assertTrue(np.allclose(np.sum(skernel[0], axis=0), 0.6 * mat.macroProp['Ntotal']))
+        self.assertFalse(ScatterKernel(skernel).upscatter)
+        fname = os.path.join(self.tmpDir, 'synth.xs')
+        writeXSFile(fname, 8, 3)
+        xs = readXS(fname)
+        mat = SynthMaterial(8, 3, fissile=True)
+        for key, prop in (('total', 'Ntotal'), ('skernel', 'Nskernel'), ('chi', 'chi'), ('nufission', 'Nnufission')):
+            self.assertTrue(np.allclose(xs[key], mat.macroProp[prop], rtol=1e-3, atol=1e-6), key)
+
+
+if __name__ == "__main__":
+    unittest.main()
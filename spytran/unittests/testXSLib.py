@@ -0,0 +1,125 @@
+import unittest
+import os
+import shutil
+import tempfile
+import glob
+import numpy as np
+import materials.readXS as rx
+import materials.materialMixxer as mx
+import materials.readXSdatabase as rxs
+from materials.globalMatLib import MaterialLibrary, matLib
+from materials.makeH5XS import writeH5XS
+
+
+class testXSLib(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpDir = tempfile.mkdtemp()
+        cls.h5Path = os.path.join(cls.tmpDir, 'newXS.h5')
+        cls.xsdir = rxs.readXSFolder('./materials/newXS')
+        writeH5XS(cls.xsdir, cls.h5Path)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpDir)
+
+    def newLib(self):
+        lib = MaterialLibrary((isoName, dict(isoData)) for isoName, isoData in matLib.iteritems())
+        lib.addH5Source(self.h5Path)
+        return lib
+
+    def testLazyLoad(self):
+        lib = self.newLib()
+        self.assertFalse(lib.isLoaded('u235'))
+        self.assertTrue('u235' in lib)
+        u235 = lib['u235']
+        self.assertTrue(lib.isLoaded('u235'))
+        self.assertFalse(lib.isLoaded('c12'))
+        # isotopic data is kept, xs data is memory mapped
+        self.assertTrue('M' in u235)
+        self.assertTrue(isinstance(u235['skernel'], np.memmap))
+        for dataName, data in self.xsdir['u235'].iteritems():
+            self.assertTrue(np.array_equal(u235[dataName], data))
+
+    def testUpdate(self):
+        lib = self.newLib()
+        self.assertTrue(lib.fingerprint('u235') is not None)
+        lib.update({'u235': {'total': np.ones(3)}}, b10={'total': np.zeros(3)})
+        # replaces the h5 registered isotope, no lazy load over it
+        self.assertTrue(lib.isLoaded('u235'))
+        self.assertTrue(np.array_equal(lib['u235']['total'], np.ones(3)))
+        self.assertEqual(lib.fingerprint('u235'), None)
+        self.assertEqual(lib.fingerprint('b10'), None)
+        base = MaterialLibrary(baseLoader=lambda: {'c12': {'M': 12.}, 'h1': {'M': 1.}})
+        base.update(c12={'total': np.ones(2)})
+        self.assertEqual(sorted(base.keys()), ['c12', 'h1'])
+        self.assertEqual(sorted(base['c12'].keys()), ['M', 'total'])
+
+    def testMixedMat(self):
+        txtLib = MaterialLibrary((isoName, dict(isoData)) for isoName, isoData in matLib.iteritems())
+        for isoName, isoData in self.xsdir.iteritems():
+            txtLib[isoName].update(isoData)
+        h5Lib = self.newLib()
+        mats = []
+        for lib in (txtLib, h5Lib):
+            mat = mx.mixedMat({'c12': 0.99, 'b10': 0.01}, matLib=lib)
+            mat.setDensity(1.9)
+            mats.append(mat)
+        for prop in ('Ntotal', 'Nskernel'):
+            self.assertTrue(np.allclose(mats[0].macroProp[prop], mats[1].macroProp[prop], rtol=1e-14))
+        self.assertFalse(h5Lib.isLoaded('c12') and h5Lib.isLoaded('u238'))
+
+    def testCopyOnWrite(self):
+        lib = self.newLib()
+        lib['h1']['total'] *= 2.0
+        fresh = self.newLib()
+        self.assertTrue(np.array_equal(fresh['h1']['total'], self.xsdir['h1']['total']))
+
+
+class testXSParse(unittest.TestCase):
+
+    def lineByLine(self, fname):
+        """
+        Reference parse: regex check and table2NP on every line.
+        """
+        reFlags = dict((key, rx.re.compile(key.upper())) for key in
+                       ('total', 'chi', 'nufission', 'skernel', 'ffactor'))
+        lines = rx.fileToList(fname)
+        propsDict = {}
+        for i, line in enumerate(lines):
+            check = rx.checkLine(line, reFlags)
+            if check:
+                propsDict[check[0]] = rx.table2NP(i, lines)
+        skernel = propsDict.pop('skernel')
+        propsDict = rx.fixNJOYdata(propsDict)
+        nG = len(propsDict['total'])
+        skernelMatrix = np.zeros((skernel.shape[1] - 2, nG, nG))
+        for row in skernel:
+            skernelMatrix[:, int(row[1]) - 1, int(row[0]) - 1] = row[2:]
+        propsDict['skernel'] = skernelMatrix[:, ::-1, ::-1]
+        return propsDict
+
+    def testParity(self):
+        xsFiles = glob.glob('./materials/*/*.xs')
+        self.assertTrue(len(xsFiles) > 0)
+        for xsFile in xsFiles:
+            ref, props = self.lineByLine(xsFile), rx.readXS(xsFile)
+            self.assertEqual(sorted(ref.keys()), sorted(props.keys()))
+            for key in ref:
+                self.assertTrue(np.array_equal(ref[key], props[key]), xsFile + ' ' + key)
+
+    def testRaggedTable(self):
+        fd, fname = tempfile.mkstemp(suffix='.xs')
+        with os.fdopen(fd, 'w') as f:
+            f.write("TOTAL\r\n 1 2.0\r\n 2 3.0 4.0\r\n\r\nCHI\n\n 1 1.0\n")
+        try:
+            props = rx.readXS(fname, tableFormat=None)
+        finally:
+            os.remove(fname)
+        self.assertEqual(len(props['total']), 2)
+        self.assertEqual(len(props['chi']), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
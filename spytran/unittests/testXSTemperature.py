@@ -0,0 +1,92 @@
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+import materials.readXSdatabase as rxs
+import materials.materialMixxer as mx
+import materials.xsTemperature as txs
+from materials.globalMatLib import MaterialLibrary, matLib
+from materials.macroCache import macroCache
+from materials.batchMix import BatchMixer
+
+
+class testXSTemperature(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # u238 tables at 300K (library) and 1200K (scaled copy)
+        cls.tmpDir = tempfile.mkdtemp()
+        shutil.copy('./materials/newXS/u238.xs', os.path.join(cls.tmpDir, 'u238_300K.xs'))
+        shutil.copy('./materials/newXS/o16.xs', os.path.join(cls.tmpDir, 'o16.xs'))
+        with open('./materials/newXS/u238.xs') as f:
+            lines = f.read().split('\n')
+        with open(os.path.join(cls.tmpDir, 'u238_1200K.xs'), 'w') as f:
+            nIdx = 1
+            for line in lines:
+                cols = line.split()
+                if cols and cols[0] == 'SKERNEL':
+                    nIdx = 2
+                if len(cols) > nIdx and cols[0].isdigit():
+                    line = '  '.join(cols[:nIdx] + ['%.6e' % (1.2 * float(c)) for c in cols[nIdx:]])
+                f.write(line + '\n')
+        cls.xsdir = rxs.readXSFolder(cls.tmpDir)
+        cls.lib = MaterialLibrary((isoName, dict(isoData)) for isoName, isoData in matLib.iteritems())
+        for isoName, isoData in cls.xsdir.iteritems():
+            cls.lib[isoName].update(isoData)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpDir)
+
+    def testStack(self):
+        self.assertEqual(sorted(self.xsdir.keys()), ['o16', 'u238'])
+        u238 = self.xsdir['u238']
+        self.assertTrue(np.array_equal(u238['temperatures'], [300., 1200.]))
+        self.assertEqual(u238['skernel'].shape[0], 2)
+        self.assertFalse('temperatures' in self.xsdir['o16'])
+        self.assertEqual(txs.splitTemperature('pu239_2.5e3K'), ('pu239_2.5e3K', None))
+
+    def testSqrtT(self):
+        u238 = self.xsdir['u238']
+        data, tag = txs.atTemperature(u238, 'u238', 675.)
+        # sqrt(675) is half way between sqrt(300) and sqrt(1200)
+        self.assertTrue(np.allclose(data['total'], 1.1 * u238['total'][0], rtol=1e-5))
+        self.assertTrue(txs.atTemperature(u238, 'u238', 675.)[0] is data)
+        self.assertNotEqual(tag, txs.atTemperature(u238, 'u238', 900.)[1])
+
+    def testMixedMat(self):
+        macroCache.clear()
+        mat = mx.mixedMat({'u238': 1. / 3., 'o16': 2. / 3.}, matLib=self.lib, temperature=300.)
+        mat.setDensity(10.4)
+        cold = mat.macroProp['Ntotal']
+        mat.setTemperature(1200.)
+        hot = mat.macroProp['Ntotal']
+        self.assertFalse(np.allclose(hot, cold))
+        hits = macroCache.hits
+        mat.setTemperature(300.)
+        self.assertEqual(macroCache.hits, hits + 1)
+        self.assertTrue(np.array_equal(mat.macroProp['Ntotal'], cold))
+        batch = BatchMixer(['u238', 'o16'], matLib=self.lib, temperature=1200.).mix(
+            [[mat.nDdict['u238'], mat.nDdict['o16']]])
+        self.assertTrue(np.allclose(batch['Ntotal'][0], hot, rtol=1e-12))
+
+    def testTemperatureGrid(self):
+        # same tables on another temperature grid: neither the interpolated
+        # data nor the mixtures may be shared
+        macroCache.clear()
+        wide = MaterialLibrary((isoName, dict(self.lib[isoName])) for isoName in ('u238', 'o16'))
+        wide['u238']['temperatures'] = np.array([300., 2700.])
+        mats = []
+        for lib in (self.lib, wide):
+            mat = mx.mixedMat({'u238': 1. / 3., 'o16': 2. / 3.}, matLib=lib, temperature=675.)
+            mat.setDensity(10.4)
+            mats.append(mat.macroProp['Ntotal'])
+        self.assertFalse(np.allclose(mats[0], mats[1]))
+        data = txs.atTemperature(wide['u238'], mx.xsFingerprint(wide['u238']), 675.)[0]
+        # sqrt(675) is a quarter of the way from sqrt(300) to sqrt(2700)
+        self.assertTrue(np.allclose(data['total'], 1.05 * self.xsdir['u238']['total'][0], rtol=1e-5))
+
+
+if __name__ == "__main__":
+    unittest.main()
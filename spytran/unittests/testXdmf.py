@@ -0,0 +1,77 @@
+# To execute unittests ensure your pwd is in ./src
+# exec:
+#   python -m unittest unittests.testXdmf
+
+import os
+import shutil
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+import numpy as np
+import h5py
+import utils.hdf5dump as h5d
+from utils.xdmfWriter import writeXdmf
+
+
+class testXdmf(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(7)
+        # two dg triangles, cell local nodes
+        self.geometry = np.array([[0., 0., 0.], [1., 0., 0.], [0., 1., 0.],
+                                  [1., 0., 0.], [1., 1., 0.], [0., 1., 0.]])
+        self.cells = np.array([[0, 1, 2], [3, 4, 5]])
+        self.nG, self.nOrd = 3, 4
+        self.wN = np.ones(self.nOrd)
+        self.flux = rng.rand(self.nG, self.nOrd, len(self.geometry))
+        self.meta = {'nodes': self.geometry, 'weights': self.wN, 'nGrp': self.nG,
+                     'geometry': self.geometry, 'connectivity': self.cells}
+        self.tmpDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def readXdmf(self, xmfFile):
+        grid = ET.parse(xmfFile).getroot().find('Domain/Grid')
+        attrs = dict((attr.get('Name'), attr) for attr in grid.findall('Attribute'))
+        return grid, attrs
+
+    def loadItem(self, item):
+        fname, path = item.text.strip().split(':')
+        with h5py.File(os.path.join(self.tmpDir, fname), 'r') as f:
+            return f[path][...]
+
+    def testOrdFluxes(self):
+        out = os.path.join(self.tmpDir, 'sol.h5')
+        h5d.writeSolution(out, self.meta, self.flux)
+        xmfFile = writeXdmf(out)
+        grid, attrs = self.readXdmf(xmfFile)
+        topo = grid.find('Topology')
+        self.assertEqual(topo.get('TopologyType'), 'Triangle')
+        self.assertEqual(topo.get('NumberOfElements'), '2')
+        self.assertEqual(topo.find('DataItem').text.strip(), 'sol.h5:/connectivity')
+        self.assertTrue(np.array_equal(self.loadItem(topo.find('DataItem')), self.cells))
+        self.assertTrue(np.array_equal(self.loadItem(grid.find('Geometry/DataItem')), self.geometry))
+        self.assertEqual(sorted(attrs), ['grp1', 'grp2', 'grp3', 'tot'])
+        phi = 0.25 * np.einsum('n,gnx->gx', self.wN, self.flux)
+        for g in range(self.nG):
+            slab = attrs['grp' + str(g + 1)].find('DataItem')
+            self.assertEqual(slab.get('ItemType'), 'HyperSlab')
+            select, data = slab.findall('DataItem')
+            self.assertEqual(select.text.split()[0], str(g))
+            self.assertTrue(np.allclose(self.loadItem(data)[g], phi[g], rtol=1e-12))
+        self.assertTrue(np.allclose(self.loadItem(attrs['tot'].find('DataItem')), phi.sum(axis=0)))
+
+    def testScalarFlux(self):
+        # stored scalar flux is referenced in place
+        out = os.path.join(self.tmpDir, 'sol.h5')
+        h5d.writeSolution(out, self.meta, self.flux, fields=('scalarFlux', ), groups=[2, 0],
+                          scalarBasis=0.25 * self.wN)
+        grid, attrs = self.readXdmf(writeXdmf(out, os.path.join(self.tmpDir, 'view.xmf')))
+        self.assertEqual(sorted(attrs), ['grp1', 'grp3', 'tot'])
+        data = attrs['grp1'].find('DataItem').findall('DataItem')[1]
+        self.assertEqual(data.text.strip(), 'sol.h5:/scalarFlux')
+
+
+if __name__ == "__main__":
+    unittest.main()
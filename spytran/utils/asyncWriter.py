@@ -0,0 +1,138 @@
+#!/usr/bin/python
+#
+# Background output thread.
+#
+# Writes (solution files, snapshots) are queued and run on one worker
+# thread while the solver keeps iterating.  h5py and numpy release the GIL
+# for the actual file io and copies.
+#
+# Flux fields handed to submitSnapshot are copied into one of maxPending
+# reusable buffers per field shape before the call returns, so the solver
+# may overwrite its arrays right away.  When all buffers are in flight the
+# caller blocks until a write finishes (backpressure): at most maxPending
+# snapshots are ever held in memory.
+
+import sys
+import threading
+import Queue
+import numpy as np
+
+
+class AsyncWriter(object):
+    """
+    Runs write calls on a background thread.  Use as a context manager or
+    call close(), which waits for all pending writes.  An exception raised
+    by a write is re-raised (as RuntimeError) by the next submit, flush or
+    close.
+    """
+    def __init__(self, maxPending=2):
+        self.maxPending = maxPending
+        self._queue = Queue.Queue(maxsize=maxPending)
+        self._buffers = {}  # (shape, dtype) -> Queue of free buffers
+        self._nBuffers = {}
+        self._lock = threading.Lock()
+        self._error = None
+        self.waitTime = 0.  # time [s] submit calls were blocked by backpressure
+        self.nWritten = 0
+        self._thread = threading.Thread(target=self._run, name='spytranAsyncWriter')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, tb):
+        self.close()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                func, args, kwargs = item
+                try:
+                    func(*args, **kwargs)
+                    self.nWritten += 1
+                except Exception:
+                    if self._error is None:
+                        self._error = sys.exc_info()[1]
+            finally:
+                self._queue.task_done()
+
+    def _checkError(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError("Background write failed: " + repr(error))
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Queue func(*args, **kwargs).  Arguments must not be modified until
+        the call ran, see submitSnapshot for flux fields.
+        """
+        import time
+        self._checkError()
+        if not self._thread.is_alive():
+            sys.exit("FATALITY: AsyncWriter is closed")
+        tStart = time.time()
+        self._queue.put((func, args, kwargs))
+        self.waitTime += time.time() - tStart
+
+    def _acquire(self, field):
+        """
+        Free buffer shaped like field, blocks while all are in flight.
+        """
+        import time
+        key = (field.shape, field.dtype.str)
+        with self._lock:
+            if key not in self._buffers:
+                self._buffers[key], self._nBuffers[key] = Queue.Queue(), 0
+            free = self._buffers[key]
+            if free.empty() and self._nBuffers[key] < self.maxPending:
+                self._nBuffers[key] += 1
+                return np.empty_like(field)
+        tStart = time.time()
+        buf = free.get()
+        self.waitTime += time.time() - tStart
+        return buf
+
+    def _writeSnapshot(self, buf, write, args, kwargs):
+        try:
+            write(*(args + (buf, )), **kwargs)
+        finally:
+            self._buffers[(buf.shape, buf.dtype.str)].put(buf)
+
+    def submitSnapshot(self, fnameout, meta, fluxField, write=None, **kwargs):
+        """
+        Queue write(fnameout, meta, copyOfFluxField, **kwargs), by default
+        hdf5dump.writeSolution.  fluxField and the meta arrays are copied
+        before returning.
+        """
+        if write is None:
+            from hdf5dump import writeSolution as write
+        self._checkError()
+        buf = self._acquire(fluxField)
+        np.copyto(buf, fluxField)
+        meta = dict((name, np.array(value, copy=True)) for name, value in meta.iteritems())
+        try:
+            self.submit(self._writeSnapshot, buf, write, (fnameout, meta), kwargs)
+        except:
+            self._buffers[(buf.shape, buf.dtype.str)].put(buf)
+            raise
+
+    def flush(self):
+        """
+        Wait for all queued writes.
+        """
+        self._queue.join()
+        self._checkError()
+
+    def close(self):
+        """
+        Flush and stop the worker thread.
+        """
+        if self._thread.is_alive():
+            self._queue.join()
+            self._queue.put(None)
+            self._thread.join()
+        self._checkError()
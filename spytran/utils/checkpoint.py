@@ -0,0 +1,117 @@
+#!/usr/bin/python
+#
+# Solver checkpoints.
+#
+# A checkpoint is a flat hdf5 file of the solver state ({name: array}, see
+# SnFeSlv.getState).  It is written to a temporary file in the same
+# directory and renamed over the previous checkpoint, so a job killed while
+# writing always leaves the last complete checkpoint behind.
+
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+
+
+def saveCheckpoint(fname, state):
+    """
+    Atomically write {name: array} to fname.
+    """
+    import h5py
+    fname = os.path.abspath(fname)
+    fd, tmpName = tempfile.mkstemp(prefix=os.path.basename(fname) + '.', suffix='.tmp',
+                                   dir=os.path.dirname(fname))
+    os.close(fd)
+    try:
+        h5f = h5py.File(tmpName, 'w')
+        try:
+            for name, value in state.iteritems():
+                h5f.create_dataset(name, data=value)
+        finally:
+            h5f.close()
+        with open(tmpName, 'rb+') as tmpFile:
+            os.fsync(tmpFile.fileno())
+        os.rename(tmpName, fname)
+    except:
+        if os.path.exists(tmpName):
+            os.remove(tmpName)
+        raise
+
+
+def loadCheckpoint(fname):
+    """
+    {name: array} from a checkpoint file.  Scalars are returned as python
+    scalars.
+    """
+    import h5py
+    if not os.path.isfile(fname):
+        sys.exit("FATALITY: Checkpoint file " + str(fname) + " not found")
+    state = {}
+    with h5py.File(fname, 'r') as h5f:
+        for name, dataset in h5f.iteritems():
+            value = dataset[()]
+            state[name] = value.item() if np.ndim(value) == 0 and hasattr(value, 'item') else value
+    return state
+
+
+def processStartTime():
+    """
+    Start time of this process [s since the epoch], None if unknown (no
+    /proc).  Resolution of the boot time, one second.
+    """
+    try:
+        with open('/proc/self/stat') as infile:
+            # fields after the command name, starttime is field 22
+            fields = infile.read().rsplit(')', 1)[1].split()
+        with open('/proc/stat') as infile:
+            bootTime = [int(line.split()[1]) for line in infile if line.startswith('btime')][0]
+        return bootTime + int(fields[19]) / float(os.sysconf('SC_CLK_TCK'))
+    except (IOError, OSError, IndexError, ValueError):
+        return None
+
+
+class Checkpointer(object):
+    """
+    Decides when to write a checkpoint.
+        fname: checkpoint file
+        everyIters: checkpoint every everyIters iterations (outer iterations
+            of kSolve, source iterations of trSolve)
+        everySeconds: checkpoint when everySeconds have passed since the
+            last checkpoint
+        wallTime: wall time budget [s] counted from startTime.  When the
+            next iteration is not expected to finish within the budget
+            (longest iteration so far times safety) a checkpoint is written
+            and the solve stops.
+        startTime: clock() time the budget started, e.g. the job start,
+            default the construction time
+    """
+    def __init__(self, fname, everyIters=None, everySeconds=None, wallTime=None, safety=1.5,
+                 clock=time.time, startTime=None):
+        self.fname = fname
+        self.everyIters, self.everySeconds = everyIters, everySeconds
+        self.wallTime, self.safety = wallTime, safety
+        self.clock = clock
+        self.tLastWrite = self.tLastIter = clock()
+        self.tStart = self.tLastIter if startTime is None else startTime
+        self.maxIterTime = 0.
+        self.nWritten = 0
+
+    def iterationDone(self, iteration):
+        """
+        Call after each completed iteration.  Returns (writeCheckpoint, stop).
+        """
+        now = self.clock()
+        self.maxIterTime = max(self.maxIterTime, now - self.tLastIter)
+        self.tLastIter = now
+        stop = self.wallTime is not None and \
+            now - self.tStart + self.safety * self.maxIterTime > self.wallTime
+        write = stop or \
+            (self.everyIters is not None and iteration % self.everyIters == 0) or \
+            (self.everySeconds is not None and now - self.tLastWrite >= self.everySeconds)
+        return write, stop
+
+    def write(self, state):
+        saveCheckpoint(self.fname, state)
+        self.tLastWrite = self.clock()
+        self.nWritten += 1
@@ -41,3 +41,6 @@ mv ./njoyOut/*.xs ./$xsdir/.
 mv ./$xsdir/C0.xs ./$xsdir/c12.xs
 cd ./$xsdir
 rename -f 'y/A-Z/a-z/' ./*
+
+### Or build an HDF5 library straight from the njoy outputs, in parallel
+# python2 njoy2h5.py -i ./njoyOut -o $xsdir.h5
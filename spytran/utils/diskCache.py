@@ -0,0 +1,63 @@
+#!/usr/bin/python
+#
+# Directory of .npz files keyed by any repr-able key.
+#
+# Files are written to a temporary name and renamed into place, so
+# concurrent runs and worker processes may share one cache directory.
+
+import os
+import hashlib
+import tempfile
+import numpy as np
+
+
+class DiskCache(object):
+    """
+    Persistent {key: {name: array}} store.  Entries are never evicted,
+    delete the directory (or call clear) to reclaim the space.
+    """
+    def __init__(self, cacheDir, prefix=''):
+        self.cacheDir = os.path.abspath(cacheDir)
+        self.prefix = prefix
+        if not os.path.isdir(self.cacheDir):
+            try:
+                os.makedirs(self.cacheDir)
+            except OSError:
+                # created by another process in the mean time
+                if not os.path.isdir(self.cacheDir):
+                    raise
+
+    def _path(self, key):
+        return os.path.join(self.cacheDir, self.prefix + hashlib.sha1(repr(key)).hexdigest() + '.npz')
+
+    def get(self, key):
+        """
+        Returns the stored dict of arrays, None on a miss.
+        """
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as npz:
+                if str(npz['__key__']) != repr(key):
+                    return None
+                return dict((name, npz[name]) for name in npz.files if name != '__key__')
+        except Exception:
+            print("WARNING: Ignoring unreadable cache file " + path)
+            return None
+
+    def put(self, key, arrays):
+        fd, tmpPath = tempfile.mkstemp(dir=self.cacheDir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, __key__=np.array(repr(key)), **arrays)
+            os.rename(tmpPath, self._path(key))
+        except Exception:
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+            raise
+
+    def clear(self):
+        for fname in os.listdir(self.cacheDir):
+            if fname.startswith(self.prefix) and fname.endswith('.npz'):
+                os.remove(os.path.join(self.cacheDir, fname))
@@ -0,0 +1,300 @@
+#!/usr/bin/python
+#
+# Dry-run cost and memory estimates.
+#
+# estimate() reads the mesh and the material scattering kernels, counts
+# degrees of freedom, operator nonzeros, LU envelope and field sizes for
+# the requested space / sN / nG / lOrder and turns them into a predicted
+# peak memory and time per source iteration.  Nothing is assembled.  The
+# mesh is read from the .inp file next to the .geo file when it is newer
+# than the .geo (the mesh cache); gmsh only runs otherwise.
+#
+# Times and python object sizes come from the per unit coefficients of a
+# cost model (defaultModel).  The defaults are rough; calibrate() rescales
+# them from the perf timers (utils/perf.py) and memory report
+# (utils/memReport.py) of a finished run, saveModel / loadModel keep the
+# result for the machine at hand.
+
+import os
+import json
+import numpy as np
+
+# seconds per unit of work and bytes per python object
+defaultModel = {
+    'eleBuild': 2e-4,         # [s] per element, building the region meshes
+    'connectivity': 2e-7,     # [s] per element^2, dg enable_connectivity
+    'asmCall': 4e-5,          # [s] per element and (g, o), buildSysMatrix
+    'rhsCall': 3e-6,          # [s] per element and (g, o), buildSysRHS
+    'bcCall': 2e-5,           # [s] per boundary element and (g, o), applyBCs
+    'scatterCall': 2e-5,      # [s] per element and group, scatter source
+    'scatterFlop': 2e-9,      # [s] per element * nOrd * nG^2 * (L + 1)
+    'solveCall': 2e-4,        # [s] per (g, o) gmres solve
+    'luFillTime': 1e-7,       # [s] per LU factor entry and (g, o)
+    'elementBytes': 4000.,    # [B] per element object, excl. flux arrays
+    'dgElementBytes': 6000.,  # [B] per gmsh dg element dict
+    'lilBytesPerNnz': 64.,    # [B] per nonzero of a lil_matrix
+    'lilBytesPerRow': 200.,   # [B] per row of a lil_matrix
+    'baseBytes': 80e6,        # [B] interpreter, numpy, scipy, quadrature
+}
+
+# solver span (utils/perf.py) timing each phase and the model coefficients it calibrates
+_phaseSpans = {'buildMesh': ('buildMesh', ('eleBuild', )),
+               'connectivity': ('connectivity', ('connectivity', )),
+               'assemble': ('buildSysMatrix', ('asmCall', )),
+               'rhs': ('buildSysRHS', ('rhsCall', )),
+               'bcs': ('applyBCs', ('bcCall', )),
+               'scatter': ('scatter', ('scatterCall', 'scatterFlop')),
+               'solve': ('solveFlux', ('solveCall', 'luFillTime'))}
+
+_gmresRestart = 20
+
+
+def loadMesh(geoFile, dim=1, renumber=None):
+    """
+    gmshMesh of geoFile, from the cached .inp file if it is up to date.
+    """
+    from gmshPreproc import gmshMesh
+    mesh = gmshMesh(geoFile=geoFile, renumber=renumber)
+    if mesh.cachedINP():
+        mesh.loadINP(dim)
+    else:
+        mesh.runGMSH(dim)
+    return mesh
+
+
+def meshCounts(mesh, space='dg'):
+    """
+    Size of the spatial system of one (g, o) for a parsed gmshMesh:
+    elements, nodes per element, degrees of freedom, nonzeros of the
+    transport operator, its envelope (profile) and the LU fill bound
+    nDOF + 2 * envelope of a factorization without reordering.
+    """
+    interior = [(regionID, region) for regionID, region in mesh.regions.iteritems()
+                if region['type'] == 'interior' and 'elements' in region]
+    elements = np.concatenate([np.hstack((np.full((len(region['elements']), 1), regionID, dtype=int),
+                                          region['elements'].astype(int)))
+                               for regionID, region in interior])
+    counts = {'regionElements': dict((regionID, len(region['elements'])) for regionID, region in interior),
+              'boundaryElements': sum(len(bcElms) for regionID, region in interior
+                                      for bcElms in region['bcElms'].itervalues() if bcElms),
+              'nInteriorFaces': None}
+    if space == 'fe':
+        verts = elements[:, 2:]
+        nEle, nPe = verts.shape
+        nDOF = len(mesh.nodes)
+        # every node pair of an element couples
+        rows = np.repeat(verts, nPe, axis=1).ravel()
+        cols = np.tile(verts, (1, nPe)).ravel()
+        pairs = np.unique(rows * nDOF + cols)
+        nnz = len(pairs)
+        rowMin = np.arange(nDOF)
+        np.minimum.at(rowMin, pairs // nDOF, pairs % nDOF)
+        envelope = int(np.sum(np.arange(nDOF) - rowMin))
+    else:
+        # dg nodes are numbered element by element, see gmshMesh.enable_connectivity
+        if mesh.renumber:
+            elements = mesh._order_dg_elements(elements)
+        verts = elements[:, 2:]
+        nEle, nPe = verts.shape
+        nDOF = nEle * nPe
+        if mesh.dim == 1:
+            faces = verts
+        else:
+            edges = np.stack((verts, np.roll(verts, -1, axis=1)), axis=2)
+            faces = np.min(edges, axis=2) * len(mesh.nodes) + np.max(edges, axis=2)
+        faces = faces.ravel()
+        eleIdx = np.repeat(np.arange(nEle), verts.shape[1])
+        order = np.argsort(faces, kind='mergesort')
+        shared = np.where(faces[order][1:] == faces[order][:-1])[0]
+        left, right = eleIdx[order][shared], eleIdx[order][shared + 1]
+        counts['nInteriorFaces'] = len(shared)
+        # element block plus the upwind neighbor's face nodes
+        nnz = nEle * nPe ** 2 + len(shared) * mesh.dim
+        minEle = np.arange(nEle)
+        np.minimum.at(minEle, left, right)
+        np.minimum.at(minEle, right, left)
+        envelope = int(np.sum(nPe * nPe * (np.arange(nEle) - minEle)) + nEle * nPe * (nPe - 1) // 2)
+    counts.update({'nElements': nEle, 'nodesPerElement': nPe, 'nDOF': nDOF, 'nnz': nnz,
+                   'envelope': envelope, 'luFill': nDOF + 2 * envelope})
+    return counts
+
+
+def availableMemory():
+    """
+    Memory [B] available to a new run, None if unknown.
+    """
+    try:
+        with open('/proc/meminfo') as meminfo:
+            for line in meminfo:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (IOError, OSError):
+        pass
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+class DryRunEstimate(object):
+    """
+    Predicted memory [B] per structure and time [s] per call of each solver
+    phase for one configuration.  flags lists the problems found, fits is
+    False if the run is expected to fail (memory, wall time, materials).
+    """
+    def __init__(self, config, counts, memory, time, memLimit=None, nIters=None, wallTime=None, model=None):
+        self.config, self.counts, self.memory, self.time = config, counts, memory, time
+        self.model = model
+        self.memLimit, self.nIters, self.wallTime = memLimit, nIters, wallTime
+        self.peakBytes = sum(memory.values())
+        self.setupTime = time['buildMesh'] + time['connectivity'] + 2 * time['assemble']
+        self.iterTime = time['scatter'] + time['rhs'] + time['bcs'] + time['solve']
+        self.totalTime = None if nIters is None else self.setupTime + nIters * self.iterTime
+        self.flags, self.fits = [], True
+
+    def flag(self, message, fatal=True):
+        self.flags.append(message)
+        self.fits = self.fits and not fatal
+
+    def toDict(self):
+        return {'config': self.config, 'counts': dict((k, v) for k, v in self.counts.iteritems()
+                                                      if k != 'regionElements'),
+                'memory': self.memory, 'time': self.time, 'peakBytes': self.peakBytes,
+                'setupTime': self.setupTime, 'iterTime': self.iterTime, 'totalTime': self.totalTime,
+                'memLimit': self.memLimit, 'flags': self.flags, 'fits': self.fits}
+
+    def summary(self):
+        config = ', '.join('%s=%s' % item for item in sorted(self.config.iteritems()))
+        lines = ["dry run: " + config]
+        for name in ('nElements', 'nodesPerElement', 'nDOF', 'nnz', 'luFill', 'nOrd'):
+            lines.append("{0: <32} {1: >14}".format(name, self.counts[name]))
+        lines.append("{0: <32} {1: >14}".format("memory", "MiB"))
+        for name, nbytes in sorted(self.memory.iteritems()):
+            lines.append("{0: <32} {1: >14.1f}".format('  ' + name, nbytes / 2. ** 20))
+        lines.append("{0: <32} {1: >14.1f}".format("  peak", self.peakBytes / 2. ** 20))
+        if self.memLimit is not None:
+            lines.append("{0: <32} {1: >14.1f}".format("  available", self.memLimit / 2. ** 20))
+        lines.append("{0: <32} {1: >14}".format("time per call", "s"))
+        for name, t in sorted(self.time.iteritems()):
+            lines.append("{0: <32} {1: >14.3e}".format('  ' + name, t))
+        lines.append("{0: <32} {1: >14.3e}".format("setup", self.setupTime))
+        lines.append("{0: <32} {1: >14.3e}".format("per source iteration", self.iterTime))
+        if self.totalTime is not None:
+            lines.append("{0: <32} {1: >14.3e}".format("total (%d iterations)" % self.nIters, self.totalTime))
+        for message in self.flags:
+            lines.append("WARNING: " + message)
+        return '\n'.join(lines)
+
+
+def estimate(geoFile=None, materialDict=None, nG=10, lOrder=8, sN=2, dim=1, space='dg',
+             renumber=None, quadKind='levelSym', mesh=None, model=None, memLimit=None,
+             nIters=None, wallTime=None):
+    """
+    Dry run of SnSolver(geoFile, materialDict, ..., nG=nG, lOrder=lOrder,
+    sN=sN, dim=dim, space=space, renumber=renumber, quadKind=quadKind).
+    mesh: an already parsed gmshMesh instead of geoFile.  memLimit [B]
+    defaults to the available memory; with nIters source iterations the
+    total time is checked against wallTime [s].  Returns a DryRunEstimate.
+    """
+    from spytran.materials.scatterKernel import ScatterKernel
+    model = dict(defaultModel, **(model or {}))
+    if mesh is None:
+        mesh = loadMesh(geoFile, dim, renumber)
+    counts = meshCounts(mesh, space)
+    if dim == 1:
+        nOrd = sN
+    else:
+        from ordReader import sharedD2quadSet
+        nOrd = sharedD2quadSet(sN, lOrder, quadKind).sNords
+    counts['nOrd'] = nOrd
+    nEle, nPe, nDOF, nSys = counts['nElements'], counts['nodesPerElement'], counts['nDOF'], nG * nOrd
+    # scattering work per element and group set by each region's kernel
+    materialDict = materialDict or {}
+    problems, scatterFlops = [], 0
+    for regionID, nRegionEle in counts['regionElements'].iteritems():
+        matName = mesh.regions[regionID]['material']
+        material = materialDict.get(matName)
+        if material is None:
+            problems.append("no material '%s' for region %d" % (matName, regionID))
+            continue
+        skernel = np.asarray(material.macroProp['Nskernel'])
+        if skernel.shape[1] != nG:
+            problems.append("material '%s' has %d groups, nG=%d" % (matName, skernel.shape[1], nG))
+        kernel = ScatterKernel(skernel, maxLegOrder=lOrder)
+        scatterFlops += nRegionEle * nOrd * nG ** 2 * (kernel.legOrder + 1)
+    lil = counts['nnz'] * model['lilBytesPerNnz'] + nDOF * model['lilBytesPerRow']
+    csc = counts['nnz'] * 12 + (nDOF + 1) * 4
+    memory = {'fluxFields': 4 * nSys * nDOF * 8,  # sysRHS, scFluxField, totFluxField, new sysRHS
+              'elements': nEle * (model['elementBytes'] + nSys * (2 * nPe + 5) * 8),
+              'dgElementDicts': nEle * model['dgElementBytes'] if space != 'fe' else 0,
+              'sysA': nSys * max(lil, csc),
+              'luFactor': counts['luFill'] * 12,
+              'gmresWork': (_gmresRestart + 4) * nDOF * 8,
+              'base': model['baseBytes']}
+    time = {'buildMesh': nEle * model['eleBuild'],
+            'connectivity': nEle ** 2 * model['connectivity'] if space != 'fe' else 0.,
+            'assemble': nSys * nEle * model['asmCall'],
+            'rhs': nSys * nEle * model['rhsCall'],
+            'bcs': nSys * counts['boundaryElements'] * model['bcCall'],
+            'scatter': nEle * nG * model['scatterCall'] + scatterFlops * model['scatterFlop'],
+            'solve': nSys * (model['solveCall'] + counts['luFill'] * model['luFillTime'])}
+    config = {'space': space, 'sN': sN, 'nG': nG, 'lOrder': lOrder, 'dim': dim}
+    if memLimit is None:
+        memLimit = availableMemory()
+    est = DryRunEstimate(config, counts, memory, time, memLimit, nIters, wallTime, model)
+    for message in problems:
+        est.flag(message)
+    if memLimit is not None and est.peakBytes > memLimit:
+        est.flag("predicted peak memory %.2f GiB exceeds the %.2f GiB available" %
+                 (est.peakBytes / 2. ** 30, memLimit / 2. ** 30))
+    if wallTime is not None and est.totalTime is not None and est.totalTime > wallTime:
+        est.flag("predicted run time %.0f s exceeds the wall time of %.0f s" % (est.totalTime, wallTime))
+    if time['connectivity'] > 0.5 * est.setupTime and time['connectivity'] > 60.:
+        est.flag("dg connectivity search (O(nElements^2)) dominates the setup: %.0f s" % time['connectivity'],
+                 fatal=False)
+    return est
+
+
+def calibrate(est, perf=None, memRows=None):
+    """
+    Cost model of est rescaled to measurements of a run of the same
+    configuration: perf, the run's Profiler (mean time per call of each
+    phase span), and memRows, utils/memReport.solverMemory of its solver
+    (python object sizes of the elements).  Returns the new model dict.
+    """
+    model = dict(est.model)
+    if perf is not None:
+        totals = perf.totals()
+        for phase, (span, coeffs) in _phaseSpans.iteritems():
+            calls, total = 0, 0.
+            for path, stat in totals.iteritems():
+                if path.rsplit('/', 1)[-1] == span:
+                    calls, total = calls + stat[0], total + stat[1]
+            if calls and est.time[phase] > 0:
+                scale = (total / calls) / est.time[phase]
+                for coeff in coeffs:
+                    model[coeff] *= scale
+    if memRows is not None:
+        nEle, nSys = est.counts['nElements'], est.config['nG'] * est.counts['nOrd']
+        rows = dict(memRows)
+        eleBytes = sum(nbytes for name, nbytes in memRows if name.endswith('/elements'))
+        model['elementBytes'] = max(eleBytes / float(nEle) - nSys * (2 * est.counts['nodesPerElement'] + 5) * 8, 0.)
+        dgBytes = sum(nbytes for name, nbytes in memRows if name.endswith('/gmshRegion'))
+        if est.config['space'] != 'fe' and dgBytes:
+            model['dgElementBytes'] = dgBytes / float(nEle)
+        # sysA only tells about lil_matrix sizes before the first scattering iteration
+        nDOF = est.counts['nDOF']
+        sysA = rows.get('sysA', 0) / float(nSys)
+        if sysA > 2 * (est.counts['nnz'] * 12 + (nDOF + 1) * 4):
+            model['lilBytesPerNnz'] = (sysA - nDOF * model['lilBytesPerRow']) / est.counts['nnz']
+    return model
+
+
+def saveModel(model, fname):
+    with open(fname, 'w') as outfile:
+        json.dump(model, outfile, indent=1, sort_keys=True)
+
+
+def loadModel(fname):
+    with open(fname) as infile:
+        return dict(defaultModel, **json.load(infile))
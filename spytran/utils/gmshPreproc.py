@@ -9,10 +9,13 @@
 #
 from __future__ import division
 from collections import defaultdict
+import os
 import subprocess
 import re
 import sys
 import numpy as np
+from meshOrder import rcm_order, hilbert_order, inverse_permutation
+from meshOrder import node_adjacency, element_adjacency
 
 
 # ============================================================================ #
@@ -21,25 +24,55 @@ class gmshMesh(object):
     @brief Parses 1D and 2D inp files from GMSH.
     Only supports triangular elements in 2D!
     """
-    def __init__(self, geoFile, inpFileName=None):
+    def __init__(self, geoFile, inpFileName=None, renumber=None):
         """!
         @param geoFile  Input GMSH compatible geo file.
         @param inpFileName  Custom name for .inp gmsh output (optional)
+        @param renumber  Bandwidth reducing renumbering applied after the
+            mesh is read: None, 'rcm' or 'hilbert' (optional)
         """
         if not inpFileName:
             self.inpFileName = geoFile + '.inp'
         else:
             self.inpFileName = inpFileName + '.inp'
         self.geoFile = geoFile
+        self.renumber = renumber
+        self.node_perm = None     # original gmsh node id -> new node id
+        self.dg_node_perm = None  # original dg node id -> new dg node id
         self.parseGEO()
 
     def runGMSH(self, dim=1):
-        self.dim = dim
         print("Constructing the mesh.  Executing GMSH.")
         subprocess.call(['gmsh', str(self.geoFile), '-' + str(dim), '-o', self.inpFileName, '-v', '0'])
         print("Meshing complete.")
+        self.loadINP(dim)
+
+    def cachedINP(self):
+        """!
+        @brief True if the .inp file exists and is newer than the .geo file,
+        i.e. gmsh need not be run again.
+        """
+        return os.path.exists(self.inpFileName) and \
+            os.path.getmtime(self.inpFileName) >= os.path.getmtime(self.geoFile)
+
+    def loadINP(self, dim=1):
+        """!
+        @brief Read the mesh from the .inp file written by gmsh.
+        """
+        self.dim = dim
         self.inpFL = fileToList(self.inpFileName)
+        if self.inpFL is None:
+            sys.exit("FATAL: Could not read gmsh output " + str(self.inpFileName))
         self.parseINP()
+        self.processRegions()
+
+    def processRegions(self):
+        """!
+        @brief Renumber (optional) and collect the region nodes and boundary
+        elements once nodes, elements and regions are known.
+        """
+        if self.renumber:
+            self.renumber_nodes(self.renumber)
         self.regionNodes()
         self.markRegionBCs()
 
@@ -160,6 +193,49 @@ class gmshMesh(object):
             else:
                 self.regions[regionID]['bc'] = self.regionInfo[regionID]['info']
 
+    def renumber_nodes(self, method='rcm'):
+        """!
+        @brief Permute the gmsh node ids to reduce the bandwidth of the
+        assembled system.  Must be called before regionNodes() so that the
+        regions, boundary elements and DG connectivity all see the new ids.
+        The original to new id map is stored in self.node_perm.
+        @param method  str.  'rcm' (reverse Cuthill-McKee on the node graph)
+            or 'hilbert' (Hilbert curve through the node coordinates)
+        """
+        nNodes = len(self.nodes)
+        if method == 'rcm':
+            order = rcm_order(node_adjacency(self.elements[:, 1:], nNodes))
+        elif method == 'hilbert':
+            order = hilbert_order(self.nodes[:, 1:self.dim + 1])
+        else:
+            sys.exit("FATAL: Unknown node renumbering method: " + str(method))
+        self.node_perm = inverse_permutation(order)
+        self.nodes = self.nodes[order]
+        self.nodes[:, 0] = np.arange(nNodes)
+        vertIDs = self.elements[:, 1:]
+        mask = vertIDs >= 0
+        vertIDs[mask] = self.node_perm[vertIDs[mask]]
+        self.elements[:, 1:] = vertIDs
+
+    def _order_dg_elements(self, interior_mesh_elements):
+        """!
+        @brief Reorder elements before DG node ids are handed out.  DG nodes
+        are numbered element by element, so a good element order gives a
+        banded system.  The map from the DG node ids the unordered mesh would
+        have received to the new ids is stored in self.dg_node_perm.
+        @param interior_mesh_elements  [[region_id, element_id, node_ids...],...]
+        @return reordered interior_mesh_elements
+        """
+        vert_ids = interior_mesh_elements[:, 2:].astype(int)
+        if self.renumber == 'hilbert':
+            centroids = np.mean(self.nodes[vert_ids][:, :, 1:self.dim + 1], axis=1)
+            order = hilbert_order(centroids)
+        else:
+            order = rcm_order(element_adjacency(vert_ids, len(self.nodes)))
+        old_ids = np.arange(vert_ids.size).reshape(vert_ids.shape)
+        self.dg_node_perm = inverse_permutation(old_ids[order].ravel())
+        return interior_mesh_elements[order]
+
     def regionNodes(self):
         """!
         @brief Identify nodes that reside in each region.
@@ -171,6 +247,8 @@ class gmshMesh(object):
                 # A boundary node in 1D is techically not an 'element' therefore
                 # has no 'elements'
                 self.regions[regionID]['nodeIDs'] = region['elementIDs']
+                if self.node_perm is not None:
+                    self.regions[regionID]['nodeIDs'] = self.node_perm[region['elementIDs']]
             else:
                 regionElementIndexs = np.unique([np.where(self.elements[:, 0] == i) for i in region['elementIDs']])
                 regionEles = np.array([self.elements[row] for row in regionElementIndexs])
@@ -284,6 +362,8 @@ class gmshMesh(object):
         Each element is asscoiated with bounding edges and verticies.
         @return dictionary of elements
         """
+        if self.renumber:
+            interior_mesh_elements = self._order_dg_elements(interior_mesh_elements)
         self.global_to_gmsh_table = {}
         dg_element_dict = {}
         global_node_id_idx = 0
@@ -1,12 +1,184 @@
-import h5py
+import sys
 import numpy as np
 
+# selectable solution fields, see SolutionWriter
+outputFields = ('ordFluxes', 'scalarFlux', 'fluxMoments', 'regionRates')
+# target chunk size [B] of compressed / chunked flux datasets
+chunkBytes = 2 ** 20
+
 
 def writeToHdf5(data, fnameout):
     """
     Dumps dictionary of np arrays to h5 data file
     """
+    import h5py
     h5f = h5py.File(fnameout, 'w')
     for dataname, dataset in data.iteritems():
         h5f.create_dataset(dataname, data=dataset)
     h5f.close()
+
+
+class SolutionWriter(object):
+    """
+    Writes a (nG, nOrd, nNodes) flux solution to hdf5 one energy group at a
+    time, so only one group is ever converted / reduced in memory.  Groups
+    may be written as soon as they are final (writeGroup), in any order.
+
+    Options:
+        fields: any of outputFields.  Default ('ordFluxes',)
+            ordFluxes   (nGsel, nOrd, nNodes) angular flux
+            scalarFlux  (nGsel, nNodes) angle integrated flux
+            fluxMoments (nGsel, nMom, nNodes) flux moments, momentIndex
+                        holds the (l, m) of each moment
+            regionRates regionRates/<regionID>/{volume, flux, total, nuFission}
+                        region integrated flux and reaction rates per group
+        groups: energy groups to write, default all.  Written as 'groups'
+            when given.
+        dtype: storage type of the flux fields, e.g. np.float32.  Default float64.
+        compression: None (default), 'gzip' or 'lzf'
+        compressionLevel: gzip level 0-9
+        chunks: None (contiguous unless compressed), True (one group per
+            chunk, split to ~chunkBytes) or an explicit chunk shape
+        scalarBasis: (nOrd,) angular integration weights, needed for scalarFlux
+        momentBasis: ((nMom, nOrd) weights, (nMom, 2) (l, m)), needed for fluxMoments
+        regions: [(regionID, nodeIDs, nodeWeights, totalXs, nuFission)],
+            needed for regionRates.  sum(nodeWeights * phi[nodeIDs]) is the
+            integral of phi over the region.
+    """
+    def __init__(self, fnameout, shape, fields=('ordFluxes',), groups=None, dtype=np.float64,
+                 compression=None, compressionLevel=None, chunks=None, scalarBasis=None,
+                 momentBasis=None, regions=None):
+        import h5py
+        for field in fields:
+            if field not in outputFields:
+                sys.exit("FATALITY: Unknown output field: " + str(field) + ".  Choose from " + str(outputFields))
+        self.nG, self.nOrd, self.nNodes = shape
+        self.fields = tuple(fields)
+        self.groups = np.arange(self.nG) if groups is None else np.asarray(groups, dtype=int)
+        self._row = dict((g, i) for i, g in enumerate(self.groups))
+        self.dtype = np.dtype(dtype)
+        self.scalarBasis = None if scalarBasis is None else np.asarray(scalarBasis, dtype=float)
+        self.momentBasis = momentBasis
+        self.regions = regions or []
+        self.h5f = h5py.File(fnameout, 'w')
+        if groups is not None:
+            self.h5f.create_dataset('groups', data=self.groups)
+        nGsel = len(self.groups)
+        dsetOpts = {'compression': compression, 'compression_opts': compressionLevel}
+        if 'ordFluxes' in self.fields:
+            self.h5f.create_dataset('ordFluxes', (nGsel, self.nOrd, self.nNodes), dtype=self.dtype,
+                                    chunks=self._chunks(chunks, compression, self.nOrd), **dsetOpts)
+        if 'scalarFlux' in self.fields or 'regionRates' in self.fields:
+            self._require(self.scalarBasis, 'scalarBasis', 'scalarFlux and regionRates')
+        if 'scalarFlux' in self.fields:
+            self.h5f.create_dataset('scalarFlux', (nGsel, self.nNodes), dtype=self.dtype,
+                                    chunks=self._chunks(chunks, compression), **dsetOpts)
+        if 'fluxMoments' in self.fields:
+            self._require(self.momentBasis, 'momentBasis', 'fluxMoments')
+            basis, index = self.momentBasis
+            self.h5f.create_dataset('momentIndex', data=np.asarray(index))
+            self.h5f.create_dataset('fluxMoments', (nGsel, len(basis), self.nNodes), dtype=self.dtype,
+                                    chunks=self._chunks(chunks, compression, len(basis)), **dsetOpts)
+        if 'regionRates' in self.fields:
+            self._require(self.regions or None, 'regions', 'regionRates')
+            for regionID, nodeIDs, nodeWeights, totalXs, nuFission in self.regions:
+                grp = self.h5f.create_group('regionRates/' + str(regionID))
+                grp.create_dataset('volume', data=np.sum(nodeWeights))
+                for rate in ('flux', 'total', 'nuFission'):
+                    grp.create_dataset(rate, (nGsel, ), dtype=np.float64)
+
+    def _require(self, value, name, field):
+        if value is None:
+            self.close()
+            sys.exit("FATALITY: " + name + " is required for the " + field + " output")
+
+    def _chunks(self, chunks, compression, nInner=None):
+        """
+        One group per chunk, the node axis split to ~chunkBytes.
+        """
+        if chunks is None and compression is None:
+            return None
+        if chunks is not None and chunks is not True:
+            return tuple(chunks)
+        inner = () if nInner is None else (nInner, )
+        nNodes = max(1, min(self.nNodes, chunkBytes // (self.dtype.itemsize * (nInner or 1))))
+        return (1, ) + inner + (nNodes, )
+
+    def writeMeta(self, data):
+        """
+        {name: array} written as is (mesh, keff, weights, ...)
+        """
+        for dataname, dataset in data.iteritems():
+            self.h5f.create_dataset(dataname, data=dataset)
+
+    def writeGroup(self, g, ordFlux):
+        """
+        Write group g from its (nOrd, nNodes) angular flux.  Unselected
+        groups are ignored.
+        """
+        if g not in self._row:
+            return
+        i = self._row[g]
+        if 'ordFluxes' in self.fields:
+            self.h5f['ordFluxes'][i] = ordFlux
+        if 'scalarFlux' in self.fields or 'regionRates' in self.fields:
+            phi = np.dot(self.scalarBasis, ordFlux)
+        if 'scalarFlux' in self.fields:
+            self.h5f['scalarFlux'][i] = phi
+        if 'fluxMoments' in self.fields:
+            self.h5f['fluxMoments'][i] = np.dot(self.momentBasis[0], ordFlux)
+        if 'regionRates' in self.fields:
+            for regionID, nodeIDs, nodeWeights, totalXs, nuFission in self.regions:
+                grp = self.h5f['regionRates/' + str(regionID)]
+                flux = np.sum(nodeWeights * phi[nodeIDs])
+                grp['flux'][i] = flux
+                grp['total'][i] = totalXs[g] * flux
+                grp['nuFission'][i] = nuFission[g] * flux
+
+    def close(self):
+        self.h5f.close()
+
+
+def writeSolution(fnameout, meta, fluxField, **kwargs):
+    """
+    Write meta data and the (nG, nOrd, nNodes) fluxField group by group,
+    see SolutionWriter for the options.  With no options the file layout is
+    the one of writeToHdf5(dict(meta, ordFluxes=fluxField)).
+    """
+    writer = SolutionWriter(fnameout, fluxField.shape, **kwargs)
+    try:
+        writer.writeMeta(meta)
+        for g in writer.groups:
+            writer.writeGroup(g, fluxField[g])
+    finally:
+        writer.close()
+
+
+def readNodeFields(h5f):
+    """
+    Returns the (nodes, ordFluxes) pair from a solution file.  If the
+    solver renumbered the mesh the permutation stored with the solution
+    is undone so rows are in the original node order.
+    """
+    if 'nodePerm' not in h5f:
+        return h5f['nodes'], h5f['ordFluxes']
+    perm = h5f['nodePerm'][...]
+    nodes = h5f['nodes'][...][perm]
+    nodes[:, 0] = np.arange(len(perm))
+    ordFlux = h5f['ordFluxes'][...][:, :, perm]
+    return nodes, ordFlux
+
+
+def mmapDataset(dataset, mode='c'):
+    """
+    Memory map an h5py dataset.  Only contiguous, uncompressed datasets
+    can be mapped, anything else (chunked, compressed, scalar or empty
+    datasets) is read into memory.  The default copy-on-write mode keeps
+    in-place edits of the array out of the file.
+    """
+    offset = dataset.id.get_offset()
+    if offset is None or dataset.chunks is not None or dataset.shape in ((), None) or \
+            dataset.size == 0 or dataset.dtype.kind not in 'biufc':
+        return dataset[...]
+    return np.memmap(dataset.file.filename, dtype=dataset.dtype, mode=mode,
+                     offset=offset, shape=dataset.shape, order='C')
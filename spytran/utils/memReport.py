@@ -0,0 +1,135 @@
+#!/usr/bin/python
+#
+# Memory accounting for solver data structures.
+#
+# deepSizeOf walks an object graph (numpy arrays, scipy sparse matrices,
+# containers, instance attributes) and adds up the bytes.  Objects already
+# counted are skipped, so shared data (quadrature sets, kernels, the flux
+# fields referenced by the elements) is attributed to the first category
+# of the report that reaches it.  Python object overheads are estimated
+# with sys.getsizeof.
+#
+# Process RSS (current and peak) is read from /proc / getrusage, see
+# utils/perf.py for RSS tracking per solver phase.
+
+import sys
+import types
+import numpy as np
+
+_skipTypes = (types.ModuleType, type, types.ClassType, types.FunctionType, types.MethodType,
+              types.BuiltinFunctionType, types.LambdaType)
+
+
+def deepSizeOf(obj, seen=None):
+    """
+    Bytes held by obj and everything it references, excluding objects in
+    seen (a set of ids, updated).
+    """
+    if seen is None:
+        seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen or isinstance(o, _skipTypes):
+            continue
+        seen.add(id(o))
+        if isinstance(o, np.ndarray):
+            if o.flags.owndata:
+                total += o.nbytes
+            elif isinstance(o.base, np.ndarray):
+                stack.append(o.base)
+            if o.dtype == object:
+                stack.extend(o.flat)
+            continue
+        total += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.iterkeys())
+            stack.extend(o.itervalues())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        elif hasattr(o, '__dict__'):
+            stack.append(o.__dict__)
+        elif hasattr(o, '__slots__'):
+            stack.extend(getattr(o, slot) for slot in o.__slots__ if hasattr(o, slot))
+    return total
+
+
+def currentRSS():
+    """
+    Resident set size [B] of this process, None if unknown.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            import resource
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except (IOError, OSError, IndexError, ValueError):
+        return None
+
+
+def peakRSS():
+    """
+    Peak resident set size [B] of this process so far.
+    """
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def solverMemory(solver):
+    """
+    [(name, bytes)] of the data structures of a SnFeSlv / SnDgSlv solver
+    (SnSolver.solver), per region for the region meshes.  Everything not
+    reached by a named entry is reported as 'other'.
+    """
+    seen = set()
+    mesh = solver.superMesh
+    rows = []
+
+    def add(name, *objs):
+        rows.append((name, sum(deepSizeOf(obj, seen) for obj in objs)))
+    add('quadrature', getattr(solver, 'quadSet', None), solver.wN)
+    for field in ('sysA', 'sysP', 'sysRHS', 'scFluxField', 'totFluxField'):
+        add(field, getattr(mesh, field, None))
+    add('nodes', solver.nodes, getattr(solver, 'nodePerm', None))
+    for regionID, region in sorted(mesh.regions.iteritems()):
+        prefix = 'region ' + str(regionID) + '/'
+        add(prefix + 'scatterKernel', getattr(region, 'scatterKernel', None), region.skernel)
+        add(prefix + 'elements', region.elements)
+        add(prefix + 'belements', region.belements)
+        add(prefix + 'gmshRegion', getattr(region, 'gmshRegion', None))
+        add(prefix + 'other', region)
+    add('other', mesh, solver)
+    return rows
+
+
+def formatReport(rows):
+    """
+    Table of [(name, bytes)].  Rows sharing a top level prefix ('region
+    1/elements', 'region 1/other', ...) are listed together, followed by
+    their subtotal ('region 1 total'); the table ends with the grand total.
+    """
+    groups = []
+    for name, nbytes in rows:
+        top = name.split('/', 1)[0] if '/' in name else None
+        for group in groups:
+            if top is not None and group[0] == top:
+                group[1].append((name, nbytes))
+                break
+        else:
+            groups.append((top, [(name, nbytes)]))
+    total = float(sum(nbytes for top, group in groups for name, nbytes in group)) or 1.
+    row = "{0: <32} {1: >12.3f} {2: >7.1f}"
+    lines = ["{0: <32} {1: >12} {2: >7}".format("structure", "MiB", "%")]
+    for top, group in groups:
+        for name, nbytes in group:
+            lines.append(row.format(name, nbytes / 2. ** 20, 100. * nbytes / total))
+        if top is not None:
+            subtotal = sum(nbytes for name, nbytes in group)
+            lines.append(row.format(top + " total", subtotal / 2. ** 20, 100. * subtotal / total))
+    lines.append("{0: <32} {1: >12.3f}".format("total", total / 2. ** 20))
+    rss, peak = currentRSS(), peakRSS()
+    if rss is not None:
+        lines.append("{0: <32} {1: >12.3f}".format("process RSS", rss / 2. ** 20))
+    lines.append("{0: <32} {1: >12.3f}".format("process peak RSS", peak / 2. ** 20))
+    return '\n'.join(lines)
@@ -0,0 +1,109 @@
+# Bandwidth reducing orderings for finite element meshes.
+#
+# Node (CG) or element (DG) orderings computed here are applied once after
+# mesh ingestion so that the assembled system matrices are banded and
+# the flux fields are traversed in a cache friendly order.
+#
+from __future__ import division
+import numpy as np
+
+
+def incidence(elements, nNodes):
+    """!
+    @brief Element to node incidence matrix.
+    @param elements  (nElements, nVerts) array of node ids.  Negative ids
+        (gmsh padding) are ignored.
+    @param nNodes  int. Total number of nodes in the mesh.
+    @return scipy.sparse.csr_matrix with shape (nElements, nNodes)
+    """
+    import scipy.sparse as sps
+    elements = np.asarray(elements, dtype=int)
+    rows = np.repeat(np.arange(elements.shape[0]), elements.shape[1])
+    cols = elements.ravel()
+    mask = cols >= 0
+    vals = np.ones(np.count_nonzero(mask))
+    return sps.csr_matrix((vals, (rows[mask], cols[mask])),
+                          shape=(elements.shape[0], nNodes))
+
+
+def node_adjacency(elements, nNodes):
+    """!
+    @brief Node graph.  Two nodes are adjacent if they share an element.
+    """
+    E = incidence(elements, nNodes)
+    return (E.T * E).tocsr()
+
+
+def element_adjacency(elements, nNodes):
+    """!
+    @brief Element graph.  Two elements are adjacent if they share a node.
+    """
+    E = incidence(elements, nNodes)
+    return (E * E.T).tocsr()
+
+
+def rcm_order(adjacency):
+    """!
+    @brief Reverse Cuthill-McKee ordering of a symmetric graph.
+    @return order  np_ndarray. order[new_id] = old_id
+    """
+    import scipy.sparse as sps
+    from scipy.sparse.csgraph import reverse_cuthill_mckee
+    return np.asarray(reverse_cuthill_mckee(sps.csr_matrix(adjacency), symmetric_mode=True),
+                      dtype=int)
+
+
+def hilbert_order(points, level=16):
+    """!
+    @brief Order points along a Hilbert space filling curve.
+    Points in 1D (or degenerate 2D) are simply sorted by position.
+    @param points  (nPoints, dim) array of coordinates
+    @param level  int.  Number of bits per axis used to bin the points.
+    @return order  np_ndarray. order[new_id] = old_id
+    """
+    points = np.asarray(points, dtype=float)
+    if points.ndim == 1:
+        points = points[:, None]
+    span = np.ptp(points, axis=0)
+    if points.shape[1] == 1 or np.all(span[1:] == 0):
+        return np.argsort(points[:, 0], kind='mergesort')
+    n = 2 ** level
+    scale = (n - 1) / np.max(span)
+    xy = ((points[:, :2] - points[:, :2].min(axis=0)) * scale).astype(np.int64)
+    x, y = xy[:, 0].copy(), xy[:, 1].copy()
+    d = np.zeros(len(x), dtype=np.int64)
+    s = n // 2
+    while s > 0:
+        rx = ((x & s) > 0).astype(np.int64)
+        ry = ((y & s) > 0).astype(np.int64)
+        d += s * s * ((3 * rx) ^ ry)
+        # rotate the quadrant so the curve stays continuous
+        rot = (ry == 0)
+        flip = rot & (rx == 1)
+        x[flip] = n - 1 - x[flip]
+        y[flip] = n - 1 - y[flip]
+        x[rot], y[rot] = y[rot], x[rot]
+        s //= 2
+    return np.argsort(d, kind='mergesort')
+
+
+def inverse_permutation(order):
+    """!
+    @brief Converts a new->old ordering into an old->new id map.
+    @return perm  np_ndarray. perm[old_id] = new_id
+    """
+    order = np.asarray(order, dtype=int)
+    perm = np.empty_like(order)
+    perm[order] = np.arange(len(order))
+    return perm
+
+
+def bandwidth(A):
+    """!
+    @brief Maximum distance of a nonzero entry from the diagonal.
+    """
+    import scipy.sparse as sps
+    A = sps.coo_matrix(A)
+    if A.nnz == 0:
+        return 0
+    return int(np.max(np.abs(A.row - A.col)))
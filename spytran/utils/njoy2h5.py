@@ -0,0 +1,124 @@
+#!/usr/bin/python2.7
+#
+# Builds an HDF5 cross section library (see materials/makeH5XS.py) from a
+# directory of NJOY outputs, or of .xs files, in parallel.
+#
+# Each file is parsed in a worker process and sent back to the parent,
+# which is the only writer of the library.  Isotopes are written as they
+# finish, so progress and per isotope timings are reported as they come in.
+# Files named <iso>_<T>K are the tables of one isotope at several
+# temperatures, they are stacked (see materials/xsTemperature.py) and
+# written once the last one is in.
+#
+# Use:
+#   python njoy2h5.py -i ./njoyOut -o xsdefault.h5 -n 8
+#   python njoy2h5.py -i ../materials/newXS --xs -o newXS.h5
+
+import os
+import sys
+import time
+import glob
+import traceback
+import multiprocessing
+import h5py
+import njoyParse
+from spytran.materials.readXS import readXS
+from spytran.materials.makeH5XS import writeH5Isotope
+from spytran.materials.xsTemperature import splitTemperature, stackTemperatures
+
+# njoy output name -> isotope name (createXS.sh renames)
+isoAliases = {'c0': 'c12'}
+
+
+def isoName(path):
+    """
+    Isotope name from a file name: lower case, no extension.  A
+    temperature suffix (_600K) is kept.
+    """
+    name = os.path.splitext(os.path.basename(path))[0].lower()
+    iso = splitTemperature(name)[0]
+    return isoAliases.get(iso, iso) + name[len(iso):]
+
+
+def findInputs(inDir, xsFiles=False):
+    """
+    .xs files in inDir if xsFiles, else every other regular file (njoy outputs).
+    """
+    if xsFiles:
+        return sorted(glob.glob(os.path.join(inDir, '*.xs')))
+    return sorted(path for path in glob.glob(os.path.join(inDir, '*'))
+                  if os.path.isfile(path) and os.path.splitext(path)[1] not in ('.xs', '.h5', '.hdf5'))
+
+
+def convertFile(path):
+    """
+    Worker.  Returns (path, xs data dict, seconds, traceback or None).
+    """
+    t0 = time.time()
+    try:
+        if path.endswith('.xs'):
+            xsData = readXS(path)
+        else:
+            xsData = njoyParse.njoy2XS(njoyParse.parseNJOY(path))
+        return path, xsData, time.time() - t0, None
+    except Exception:
+        return path, None, time.time() - t0, traceback.format_exc()
+
+
+def buildLibrary(inFiles, outFile, nProcs=None, verbose=True):
+    """
+    Converts inFiles with a pool of nProcs processes (default: all cores)
+    and writes one HDF5 library.  Returns the list of files that failed.
+    """
+    t0 = time.time()
+    failed = []
+    # multi-temperature isotopes: file count and tables received so far
+    nTables, pending = {}, {}
+    for path in inFiles:
+        iso, T = splitTemperature(isoName(path))
+        nTables[iso] = nTables.get(iso, 0) + 1
+        if T is not None:
+            pending[iso] = {}
+    pool = multiprocessing.Pool(nProcs)
+    h5f = h5py.File(outFile, 'w')
+    try:
+        results = pool.imap_unordered(convertFile, inFiles)
+        for i, (path, xsData, dt, err) in enumerate(results):
+            iso = splitTemperature(isoName(path))[0]
+            if err is not None:
+                failed.append(path)
+                nTables[iso] -= 1
+            elif iso in pending:
+                pending[iso][isoName(path)] = xsData
+            else:
+                writeH5Isotope(h5f, iso, xsData)
+            if iso in pending and len(pending[iso]) == nTables[iso] and nTables[iso] > 0:
+                writeH5Isotope(h5f, iso, stackTemperatures(pending.pop(iso))[iso])
+            if verbose:
+                print("[%d/%d] %-8s %s in %.2f s" % (i + 1, len(inFiles), isoName(path),
+                                                    'done' if err is None else 'FAILED', dt))
+                if err is not None:
+                    print(err)
+    finally:
+        pool.close()
+        pool.join()
+        h5f.close()
+    if verbose:
+        print("Converted %d/%d files into %s in %.2f s" % (len(inFiles) - len(failed), len(inFiles),
+                                                           outFile, time.time() - t0))
+    return failed
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='NJOY output (or .xs) directory to HDF5 xs library')
+    parser.add_argument('-i', type=str, help='input directory')
+    parser.add_argument('-o', type=str, default='xsdefault.h5', help='output h5 file')
+    parser.add_argument('-n', type=int, default=None, help='number of processes')
+    parser.add_argument('--xs', action='store_true', help='convert .xs files instead of njoy outputs')
+    args = parser.parse_args()
+    inFiles = findInputs(args.i, args.xs)
+    if not inFiles:
+        sys.exit("FATALITY: no input files found in " + str(args.i))
+    if buildLibrary(inFiles, args.o, args.n):
+        sys.exit(1)
@@ -22,10 +22,20 @@
 
 import re
 import numpy as np
+from spytran.materials.readXS import fixNJOYdata
 
 
 def readNJOY(inFileName, outFileName='parseout'):
     '''
+    Parses njoy output and writes a .xs file.
+    '''
+    xsWrite(parseNJOY(inFileName), outFileName)
+
+
+def parseNJOY(inFileName):
+    '''
+    Returns the raw njoy tables found in the njoy output file:
+    {'total_dilution': table, 'skernel': table, ...}
     '''
     propsDict = {}
     reFlags = {'total_dilution': ".*mf\s+3.*mt\s+1\s+",
@@ -45,7 +55,38 @@ def readNJOY(inFileName, outFileName='parseout'):
             # "group".
             # read from here untill we hit our second non-number containing line
             propsDict[check[0]] = getDataTable(fileLineList[i+1:])
-    xsWrite(propsDict, outFileName)
+    return propsDict
+
+
+def njoy2XS(propsDict):
+    '''
+    Converts parsed njoy tables straight to the xs data dict that
+    readXS.readXS returns for the .xs file written by xsWrite, without the
+    text round trip (and without rounding to 5 significant digits).
+    '''
+    tables = {}
+    if 'total_dilution' in propsDict:
+        # only take 0th order leg here
+        tot = propsDict['total_dilution']
+        tot = tot[tot[:, 1] == 0]
+        grps = np.arange(1, len(tot) + 1)
+        tables['total'] = np.column_stack((grps, tot[:, 2]))
+        tables['ffactor'] = np.column_stack((grps, tot[:, 3:] / tot[:, 2:3]))
+    if 'chi' in propsDict:
+        chi = np.asarray(propsDict['chi'])
+        tables['chi'] = np.column_stack((np.arange(1, len(chi) + 1), chi))
+    if 'fission' in propsDict:
+        fission = propsDict['fission']
+        tables['nufission'] = np.column_stack((np.arange(1, len(fission) + 1),
+                                               fission[:, 1] * propsDict['nu'][:len(fission), 1]))
+    if 'skernel' in propsDict:
+        # each group to group block holds one row per legendre order
+        skernel = propsDict['skernel']
+        lord = int(max(skernel[:, 2]))
+        starts = np.where(skernel[:, 2] == 0)[0]
+        tables['skernel'] = np.column_stack([skernel[starts, 0], skernel[starts, 1]] +
+                                            [skernel[starts + l, 3] for l in range(lord + 1)])
+    return fixNJOYdata(tables)
 
 
 def getDataTable(fileLines):
@@ -1,9 +1,10 @@
 # Ordinate set parser
 #
-import sys
+# The quadrature sets and legendre / spherical harmonic tables are computed
+# (and cached) in quadrature.py.
 import numpy as np
-import scipy.special as spc
-import scipy.misc as msc
+from quadrature import cachedTables, gaussLegendre, legendreArray, levelSymmetric, quadrantSet, \
+    sphericalHarmonics
 
 
 class D2quadSet(object):
@@ -21,20 +22,16 @@ class D2quadSet(object):
         We need to query D2ordSet with an ordinate ID and retrive angle,
         reflective pair, and quadrature weight information.
     """
-    octWeightMap = {8: [[0.1209877, ((0, 0), (0, 3), (3, 0))],
-                        [0.0907407, ((0, 1), (1, 0), (0, 2), (2, 0), (1, 2), (2, 1))],
-                        [0.0925926, ((1, 1), )]],
-                    6: [[0.1761263, ((0, 0), (0, 2), (2, 0))],
-                        [0.1572071, ((0, 1), (1, 0), (1, 1))]],
-                    4: [[1 / 3., ((0, 0), (0, 1), (1, 0))]]
-                    }
-
-    def __init__(self, sN):
-        self.sN = sN
-        self.sNmu, self.wN = levelSymQuadSet(sN)
-        self.sNords = (sN * (sN + 2) / 8) * 4        # no of ordinates
+    def __init__(self, sN, lMax=8, kind='levelSym'):
+        """
+        sN: quadrature order.  kind: 'levelSym' (sN <= 16) or 'product'
+        (any even sN), see quadrature.py.  Ylm is tabulated up to lMax.
+        """
+        self.sN, self.kind = sN, kind
+        self.octMu, self.octEta, self.octWeights = quadrantSet(sN, kind)
+        self.sNmu = np.unique(self.octMu)
+        self.sNords = 4 * len(self.octMu)        # no of ordinates
         self.ords = np.empty(self.sNords, dtype=object)
-        self._computeVariations()
         self.sgn = np.array([[1,  1],
                              [-1, 1],
                              [-1, -1],
@@ -44,35 +41,22 @@ class D2quadSet(object):
         for ordi in self.ords:
             ordi.computeReflectivePartners(self.ords)
         self.collectProps()
-        self.Ylm = createSphrHarm(self.mus, self.omegas, 8)
+        self.Ylm = cachedTables(('ylm', kind, sN, lMax, 2),
+                                lambda: {'Ylm': sphericalHarmonics(self.mus, self.omegas, lMax)})['Ylm']
         self.wN = self.wgts
 
     def _computeAngles(self, o):
         """ compute and ascosiate mu and eta for each ordinate.
         Input octant is in [0, 1, 2, 3] """
-        for j, varpair in enumerate(self.octVariations):
+        nOct = len(self.octMu)
+        for j in range(nOct):
             # (mu, eta)
-            iD = int(o * (self.sNords / 4.) + j)
+            iD = o * nOct + j
             self.ords[iD] = \
-                Ordinate(self.sNmu[varpair[0]] * self.sgn[o, 0],
-                         self.sNmu[varpair[1]] * self.sgn[o, 1],
+                Ordinate(self.octMu[j] * self.sgn[o, 0],
+                         self.octEta[j] * self.sgn[o, 1],
                          self.octWeights[j], o, iD)
 
-    def _computeVariations(self):
-        """ produces ord ID pairs in an octant """
-        self.octVariations, self.octWeights = [], []
-        for i in range(self.sN / 2):
-            for j in range(self.sN / 2 - i):
-                self.octVariations.append([i, j])
-                self.octWeights.append(self.findWeight(i, j))
-        self.octVariations = np.array(self.octVariations)
-
-    def findWeight(self, i, j):
-        for row in self.octWeightMap[self.sN]:
-            for idpair in row[1]:
-                if (i, j) == idpair:
-                    return row[0]
-
     def dirCosine(self, testOmega):
         """ return ordinates that have component in same dir as test direciton """
         outNormalIDs, inNormalIDs, i = [], [], 0
@@ -136,43 +120,21 @@ class Ordinate(object):
 
 
 def levelSymQuadSet(sN):
-    if sN == 4:
-        mu = np.array([0.3500212, 0.8688903])
-        wN = np.array([1 / 3.])
-    elif sN == 6:
-        mu = np.array([0.2666355, 0.6815076, 0.9261808])
-        wN = np.array([0.1761263, 0.1572071])
-    elif sN == 8:
-        mu = np.array([0.2182179, 0.5773503, 0.7867958, 0.9511897])
-        wN = np.array([0.1209877, 0.0907407, 0.0925926])
-    else:
-        sys.exit("Choose 4, 6, or 8 ordinates for 2D SN")
+    """
+    Direction cosine levels and quadrant point weights of the level
+    symmetric set, see quadrature.levelSymmetric.
+    """
+    mu, pairs, wN = levelSymmetric(sN)
     ordinateSet = np.array([mu, wN])
     return ordinateSet
 
 
 def createLegArray(sNmu, lMax):
-    legArray = np.zeros((lMax + 1, len(sNmu)))
-    for l in range(lMax + 1):
-        legArray[l, :] = spc.eval_legendre(l, sNmu)
-    return legArray
+    return legendreArray(sNmu, lMax)
 
 
 def createSphrHarm(mu, omega, lMax=8):
-    sphArray = np.zeros((lMax + 1, lMax + 1, len(mu)))
-    for l in range(lMax + 1):
-        for m in range(lMax + 1):
-            # loop over legendre order
-            for i, (mmu, om) in enumerate(zip(mu, omega)):
-                try:
-                    C = (2 * l + 1) * float(msc.factorial(l - m)) / \
-                        float(msc.factorial(l + m))
-                    #sphArray[m, l, i] = np.real(C ** (0.5) * spc.lpmv(m, l, mmu) * np.exp(complex(om * m)))
-                    sphArray[m, l, i] = np.real(C ** (0.5) * spc.lpmv(m, l, mmu) * np.cos(om * m))
-                    #sphArray[m, l, i] = spc.sph_harm(m, l, mmu, om).real
-                except:
-                    pass
-    return sphArray
+    return sphericalHarmonics(mu, omega, lMax)
 
 
 def readOrdFile(inFile, sNords):
@@ -189,20 +151,23 @@ def gaussLegQuadSet(sNords):
     Input number of ordinates. (should be even number)
     Compute symetric gauss-leg quadrature set
     """
-    legWeights = np.zeros(sNords + 1)
-    pnp1s = np.zeros(sNords)
-    pprimes = np.zeros(sNords)
-    legWeights[sNords] = 1.
-    mus = np.polynomial.legendre.legroots(legWeights)
-    for i, mu in enumerate(mus):
-        pprimes[i] = spc.lpn(sNords, mu)[1][-1]
-        pnp1s[i] = spc.lpn(sNords + 1, mu)[0][-1]
-    weights = -2. / ((sNords + 1) * pnp1s * pprimes)
-    #
-    ordinateSet = np.array([mus[::-1], weights])
+    ordinateSet = np.array(gaussLegendre(sNords))
     return ordinateSet
 
 
+_d2QuadSets = {}
+
+
+def sharedD2quadSet(sN, lMax=8, kind='levelSym'):
+    """
+    One D2quadSet per (sN, lMax, kind), shared by all meshes and elements.
+    """
+    key = (sN, lMax, kind)
+    if key not in _d2QuadSets:
+        _d2QuadSets[key] = D2quadSet(sN, lMax, kind)
+    return _d2QuadSets[key]
+
+
 if __name__ == "__main__":
     test2D = D2quadSet(4)
     test2D.plotOrds()
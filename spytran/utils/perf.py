@@ -0,0 +1,199 @@
+#!/usr/bin/python
+#
+# Performance instrumentation: nested timing spans and counters.
+#
+#   perf = Profiler()
+#   with perf.span('sweepFlux'):
+#       with perf.span('gmres', key=(g, o)):
+#           ...
+#       perf.count('gmresIters', n, key=(g, o))
+#   print(perf.summary())
+#
+# Spans are aggregated per nesting path ('kSolve/outer/sweepFlux/gmres')
+# and optional key (count, total, min, max time), so the cost of a span is
+# two clock reads and a dict update.  Cheap enough to leave on for the
+# solver phases; do not wrap per element work.  Individual span events
+# for a chrome://tracing / Perfetto timeline are only kept with
+# trace=True (up to maxEvents).  With memory=True the process peak RSS is
+# also recorded per span path (peak at exit and how much the span raised
+# it), one getrusage call per span boundary.
+
+import os
+import json
+import time
+import threading
+from memReport import peakRSS
+
+
+class _Span(object):
+    __slots__ = ('perf', 'name', 'key', 'tStart', 'peakStart')
+
+    def __init__(self, perf, name, key):
+        self.perf, self.name, self.key = perf, name, key
+
+    def __enter__(self):
+        self.perf._stack.append(self.name)
+        if self.perf.memory:
+            self.peakStart = peakRSS()
+        self.tStart = time.time()
+        return self
+
+    def __exit__(self, excType, excValue, tb):
+        tEnd = time.time()
+        perf = self.perf
+        path = '/'.join(perf._stack)
+        perf._stack.pop()
+        perf._addTime(path, self.key, tEnd - self.tStart)
+        if perf.memory:
+            peak = peakRSS()
+            stat = perf.memStats.setdefault(path, [0, 0])
+            stat[0] = max(stat[0], peak)
+            stat[1] = max(stat[1], peak - self.peakStart)
+        if perf.trace and len(perf.events) < perf.maxEvents:
+            perf.events.append((self.name, path, self.key, self.tStart, tEnd))
+        return False
+
+
+class _NullSpan(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, tb):
+        return False
+
+
+_nullSpan = _NullSpan()
+
+
+class Profiler(object):
+    """
+    Timing spans and counters, optionally peak RSS per span (memory=True).
+    A disabled profiler records nothing.
+    """
+    def __init__(self, enabled=True, trace=False, maxEvents=100000, memory=False):
+        self.enabled, self.trace, self.maxEvents = enabled, trace, maxEvents
+        self.memory = memory
+        self.reset()
+
+    def reset(self):
+        self.timers = {}    # (path, key) -> [count, total, min, max]
+        self.counters = {}  # (name, key) -> value
+        self.gauges = {}    # (name, key) -> last value
+        self.memStats = {}  # path -> [peak RSS at exit, peak RSS growth] [B]
+        self.events = []
+        self._stack = []
+        self.tCreated = time.time()
+
+    def span(self, name, key=None):
+        """
+        Context manager timing the enclosed block.  key (e.g. (g, o))
+        breaks the timer down further.
+        """
+        if not self.enabled:
+            return _nullSpan
+        return _Span(self, name, key)
+
+    def _addTime(self, path, key, dt):
+        stat = self.timers.get((path, key))
+        if stat is None:
+            self.timers[(path, key)] = [1, dt, dt, dt]
+        else:
+            stat[0] += 1
+            stat[1] += dt
+            if dt < stat[2]:
+                stat[2] = dt
+            if dt > stat[3]:
+                stat[3] = dt
+
+    def count(self, name, value=1, key=None):
+        """
+        Add value to counter name.
+        """
+        if self.enabled:
+            self.counters[(name, key)] = self.counters.get((name, key), 0) + value
+
+    def gauge(self, name, value, key=None):
+        """
+        Record the current value of name (e.g. matrix nnz).
+        """
+        if self.enabled:
+            self.gauges[(name, key)] = value
+
+    def totals(self, keyed=False):
+        """
+        {path: [count, total, min, max]}, summed over keys unless keyed.
+        """
+        if keyed:
+            return dict(((path if key is None else path + str(list(key))), list(stat))
+                        for (path, key), stat in self.timers.iteritems())
+        totals = {}
+        for (path, key), (n, total, tMin, tMax) in self.timers.iteritems():
+            if path not in totals:
+                totals[path] = [n, total, tMin, tMax]
+            else:
+                stat = totals[path]
+                stat[0] += n
+                stat[1] += total
+                stat[2], stat[3] = min(stat[2], tMin), max(stat[3], tMax)
+        return totals
+
+    def summary(self, keyed=False):
+        """
+        Human readable table of the timers and counters.
+        """
+        lines = ["{0: <48} {1: >8} {2: >11} {3: >11} {4: >11}".format(
+            "span", "calls", "total [s]", "mean [s]", "max [s]")]
+        for path, (n, total, tMin, tMax) in sorted(self.totals(keyed).iteritems()):
+            label = '  ' * path.count('/') + path.rsplit('/', 1)[-1]
+            lines.append("{0: <48} {1: >8} {2: >11.4e} {3: >11.4e} {4: >11.4e}".format(
+                label, n, total, total / n, tMax))
+        for title, values in (('counter', self.counters), ('gauge', self.gauges)):
+            for (name, key), value in sorted(self._merge(values, keyed).iteritems()):
+                lines.append("{0: <48} {1: >8}".format(
+                    title + ': ' + name + ('' if key is None else str(list(key))), value))
+        if self.memStats:
+            lines.append("{0: <48} {1: >11} {2: >11}".format("span", "peak [MiB]", "grew [MiB]"))
+            for path, (peak, growth) in sorted(self.memStats.iteritems()):
+                label = '  ' * path.count('/') + path.rsplit('/', 1)[-1]
+                lines.append("{0: <48} {1: >11.1f} {2: >11.1f}".format(label, peak / 2. ** 20, growth / 2. ** 20))
+        return '\n'.join(lines)
+
+    def _merge(self, values, keyed):
+        if keyed:
+            return values
+        merged = {}
+        for (name, key), value in values.iteritems():
+            merged[(name, None)] = merged.get((name, None), 0) + value
+        return merged
+
+    def toDict(self):
+        def keyed(values):
+            return [{'name': name, 'key': None if key is None else list(key), 'value': value}
+                    for (name, key), value in sorted(values.iteritems())]
+        return {'timers': [{'path': path, 'key': None if key is None else list(key),
+                            'calls': n, 'total': total, 'min': tMin, 'max': tMax}
+                           for (path, key), (n, total, tMin, tMax) in sorted(self.timers.iteritems())],
+                'counters': keyed(self.counters), 'gauges': keyed(self.gauges),
+                'memory': [{'path': path, 'peakRSS': peak, 'peakGrowth': growth}
+                           for path, (peak, growth) in sorted(self.memStats.iteritems())]}
+
+    def writeJSON(self, fname):
+        with open(fname, 'w') as outfile:
+            json.dump(self.toDict(), outfile, indent=1, sort_keys=True)
+
+    def writeChromeTrace(self, fname):
+        """
+        Span events (trace=True) in the chrome trace event format.
+        """
+        pid, tid = os.getpid(), threading.current_thread().ident
+        events = []
+        for name, path, key, tStart, tEnd in self.events:
+            event = {'name': name, 'cat': path, 'ph': 'X', 'pid': pid, 'tid': tid,
+                     'ts': (tStart - self.tCreated) * 1e6, 'dur': (tEnd - tStart) * 1e6}
+            if key is not None:
+                event['args'] = {'key': list(key)}
+            events.append(event)
+        with open(fname, 'w') as outfile:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, outfile)
@@ -0,0 +1,194 @@
+# Angular quadrature sets and the legendre / spherical harmonic tables
+# evaluated on them.
+#
+# 1D: Gauss-Legendre sets of any even order.
+# 2D: one quadrant (mu > 0, eta > 0, zed > 0) of
+#   'levelSym': level symmetric LQn sets, sN = 2..16.  The point weights
+#               are solved from the even moment conditions
+#                   sum_p w_p mu_p^2a eta_p^2b = <mu^2a eta^2b>,  a + b < sN / 2
+#               which reproduces the tabulated LQn weights.
+#   'product' : Gauss-Legendre polar x equal weight azimuthal product sets,
+#               sN / 2 polar levels and sN / 2 azimuthal angles per quadrant.
+#               Any even sN, all weights positive.
+# Quadrant weights sum to 1.
+#
+# Tables are cached per (table, kind, sN, lMax, dim) in memory and, when
+# SPYTRAN_CACHE_DIR is set, on disk (see diskCache.py).  Cached arrays are
+# read only and are shared by every element of a mesh.
+
+import os
+import math
+import sys
+import numpy as np
+from diskCache import DiskCache
+
+# first direction cosine of the level symmetric sets (Lewis & Miller)
+levelSymMu1 = {2: np.sqrt(1. / 3.), 4: 0.3500212, 6: 0.2666355, 8: 0.2182179,
+               10: 0.1893213, 12: 0.1672126, 14: 0.1519859, 16: 0.1389568}
+
+_memCache = {}
+diskCache = None
+
+
+def setCacheDir(cacheDir):
+    """
+    Enable (cacheDir) or disable (None) the disk tier.
+    """
+    global diskCache
+    diskCache = DiskCache(cacheDir, prefix='quad_') if cacheDir else None
+
+
+setCacheDir(os.environ.get('SPYTRAN_CACHE_DIR'))
+
+
+def cachedTables(key, build):
+    """
+    {name: array} for key, from memory, disk or build().
+    """
+    if key in _memCache:
+        return _memCache[key]
+    tables = diskCache.get(key) if diskCache is not None else None
+    if tables is None:
+        tables = build()
+        if diskCache is not None:
+            try:
+                diskCache.put(key, tables)
+            except (IOError, OSError) as e:
+                print("WARNING: Could not write to quadrature disk cache: " + str(e))
+    for array in tables.values():
+        array.flags.writeable = False
+    _memCache[key] = tables
+    return tables
+
+
+def legendreArray(mu, lMax):
+    """
+    P_l(mu) as (lMax + 1, len(mu)).
+    """
+    import scipy.special as spc
+    return spc.eval_legendre(np.arange(lMax + 1)[:, None], np.asarray(mu, dtype=float)[None, :])
+
+
+def sphericalHarmonics(mu, omega, lMax):
+    """
+    Real spherical harmonics, Ylm[m, l, n] = sqrt(C_lm) * P_l^m(mu_n) * cos(m * omega_n)
+    with C_lm = (2l + 1) (l - m)! / (l + m)!.  Zero for m > l.
+    """
+    import scipy.special as spc
+    fact = np.array([float(math.factorial(k)) for k in range(2 * lMax + 1)])
+    m, l = np.meshgrid(np.arange(lMax + 1), np.arange(lMax + 1), indexing='ij')
+    valid = m <= l
+    C = np.where(valid, (2 * l + 1) * fact[np.abs(l - m)] / fact[l + m], 0.)
+    mu, omega = np.asarray(mu, dtype=float), np.asarray(omega, dtype=float)
+    Ylm = np.sqrt(C)[:, :, None] * spc.lpmv(m[:, :, None], l[:, :, None], mu[None, None, :]) * \
+        np.cos(m[:, :, None] * omega[None, None, :])
+    return np.where(valid[:, :, None], Ylm, 0.)
+
+
+def gaussLegendre(sN):
+    """
+    Gauss-Legendre set of sN ordinates, mu descending.  Returns (mu, w).
+    """
+    def build():
+        import scipy.special as spc
+        legWeights = np.zeros(sN + 1)
+        pnp1s = np.zeros(sN)
+        pprimes = np.zeros(sN)
+        legWeights[sN] = 1.
+        mus = np.polynomial.legendre.legroots(legWeights)
+        for i, mu in enumerate(mus):
+            pprimes[i] = spc.lpn(sN, mu)[1][-1]
+            pnp1s[i] = spc.lpn(sN + 1, mu)[0][-1]
+        weights = -2. / ((sN + 1) * pnp1s * pprimes)
+        return {'mu': mus[::-1], 'w': weights}
+    tables = cachedTables(('gaussLeg', None, sN, None, 1), build)
+    return tables['mu'], tables['w']
+
+
+def legendreTable(sN, lMax):
+    """
+    P_l on the sN Gauss-Legendre ordinates, (lMax + 1, sN).
+    """
+    return cachedTables(('legendre', None, sN, lMax, 1),
+                        lambda: {'P': legendreArray(gaussLegendre(sN)[0], lMax)})['P']
+
+
+def _doubleFactorial(n):
+    return float(np.prod(np.arange(n, 0, -2, dtype=float))) if n > 0 else 1.
+
+
+def levelSymmetric(sN):
+    """
+    Level symmetric LQn set.  Returns the direction cosine levels, the
+    quadrant points as level index pairs (i, j) (the third cosine is level
+    sN / 2 - 1 - i - j) and the point weights.
+    """
+    if sN not in levelSymMu1:
+        sys.exit("FATALITY: Level symmetric sets are available for sN in " +
+                 str(sorted(levelSymMu1.keys())) + ".  Use a product set for higher orders.")
+    n = sN // 2
+    if sN == 2:
+        mu = np.array([levelSymMu1[2]])
+    else:
+        mu1 = levelSymMu1[sN]
+        mu = np.sqrt(mu1 ** 2 + np.arange(n) * 2. * (1. - 3. * mu1 ** 2) / (sN - 2))
+    pairs = np.array([(i, j) for i in range(n) for j in range(n - i)])
+    # points with the same cosines (in any order) share a weight
+    triples = np.sort(np.column_stack((pairs, n - 1 - pairs.sum(axis=1))), axis=1)
+    classes, pointClass = np.unique(triples, axis=0, return_inverse=True)
+    A, b = [], []
+    for a in range(n):
+        for c in range(n - a):
+            moments = mu[pairs[:, 0]] ** (2 * a) * mu[pairs[:, 1]] ** (2 * c)
+            A.append(np.bincount(pointClass, moments, minlength=len(classes)))
+            b.append(_doubleFactorial(2 * a - 1) * _doubleFactorial(2 * c - 1) /
+                     _doubleFactorial(2 * a + 2 * c + 1))
+    classWeights = np.linalg.lstsq(np.array(A), np.array(b), rcond=None)[0]
+    return mu, pairs, classWeights[pointClass]
+
+
+def productSet(sN):
+    """
+    Gauss-Legendre (polar) x equal weight (azimuthal) quadrant.
+    Returns the quadrant (mu, eta, w).
+    """
+    xi, wXi = np.polynomial.legendre.leggauss(sN)
+    xi, wXi = xi[sN // 2:], wXi[sN // 2:]
+    nAzi = sN // 2
+    phi = (np.arange(nAzi) + 0.5) * (np.pi / 2.) / nAzi
+    sinTheta = np.sqrt(1. - xi ** 2)
+    mu = (sinTheta[:, None] * np.cos(phi)[None, :]).ravel()
+    eta = (sinTheta[:, None] * np.sin(phi)[None, :]).ravel()
+    w = np.repeat(wXi / nAzi, nAzi)
+    return mu, eta, w
+
+
+def quadrantSet(sN, kind='levelSym'):
+    """
+    (mu, eta, w) of the 2D quadrant mu > 0, eta > 0.
+    """
+    def build():
+        if kind == 'levelSym':
+            mu, pairs, w = levelSymmetric(sN)
+            return {'mu': mu[pairs[:, 0]], 'eta': mu[pairs[:, 1]], 'w': w}
+        elif kind == 'product':
+            mu, eta, w = productSet(sN)
+            return {'mu': mu, 'eta': eta, 'w': w}
+        sys.exit("FATALITY: Unknown quadrature set kind: " + str(kind) + ".  Use 'levelSym' or 'product'.")
+    tables = cachedTables(('quadrant', kind, sN, None, 2), build)
+    return tables['mu'], tables['eta'], tables['w']
+
+
+def fluxMomentBasis(wN, table, dim=1):
+    """
+    Flux moment weights as used by the scattering source, (nMom, nOrd):
+        1D: 0.5 * w_n * P_l(mu_n), table = P (lMax + 1, nOrd)
+        2D: 0.25 * w_n * Ylm[m, l, n] for m <= l, table = Ylm
+    Returns the weights and the (l, m) of each moment.
+    """
+    wN = np.asarray(wN, dtype=float)
+    if dim == 1:
+        index = np.column_stack((np.arange(len(table)), np.zeros(len(table), dtype=int)))
+        return 0.5 * wN * table, index
+    index = np.array([(l, m) for l in range(table.shape[1]) for m in range(l + 1)])
+    return 0.25 * wN * table[index[:, 1], index[:, 0]], index
@@ -0,0 +1,302 @@
+#!/usr/bin/python
+#
+# End to end scaling studies: complete SnSolver problems on synthetic
+# meshes and materials (utils/synthetic.py), refining one of mesh size,
+# quadrature order, group count or legendre order at a time.
+#
+#   study = scalingStudy('size', [100, 200, 400, 800],
+#                        variants=[{'space': 'fe'}, {'space': 'dg'},
+#                                  {'space': 'fe', 'renumber': 'rcm'}])
+#   print(study.report())
+#
+# Every case records the wall time, the time per solver phase (leaf spans
+# of utils/perf.py), source / gmres iterations and the peak memory.  The
+# exponents p of time ~ x^p are fitted per phase and variant by least
+# squares in log-log, x being the number of elements, ordinates, groups
+# or legendre moments.  Cases run in a fresh interpreter each so the peak
+# RSS is their own (isolate=False runs them in this process, where the
+# peak RSS is the process high water mark).
+#
+# Command line: benchmarks/scaling.py
+
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+import numpy as np
+from memReport import currentRSS, peakRSS
+
+defaultCase = {'space': 'fe', 'dim': 1, 'size': 200, 'nRegions': 2, 'sN': 4, 'nG': 4, 'lOrder': 3,
+               'renumber': None, 'quadKind': 'levelSym', 'mode': 'fixed', 'residTol': 1e-5}
+
+# leaf span -> phase.  Wrapper spans (sourceIter, scatterSource, ...) and
+# constructA (inside buildSysMatrix) are not phases of their own.
+phases = ('gmsh', 'connectivity', 'buildMesh', 'buildSysMatrix', 'buildSysRHS', 'applyBCs',
+          'scatter', 'gmres', 'updateEleFluxes', 'fissionSrc')
+
+# refined parameter -> x of the fits (record key)
+scaleOf = {'size': 'nElements', 'sN': 'nOrdinates', 'nG': 'nG', 'lOrder': 'nMoments'}
+
+# fitted quantities besides the phases
+_metrics = ('wall', 'setup', 'solve', 'iterations', 'gmresIters', 'memory')
+
+_spytranDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def phaseTotals(perf):
+    """
+    {phase: total time [s]} summed over all span paths ending in the phase.
+    """
+    totals = dict((phase, 0.) for phase in phases)
+    for path, stat in perf.totals().iteritems():
+        leaf = path.rsplit('/', 1)[-1]
+        if leaf in totals:
+            totals[leaf] += stat[1]
+    return totals
+
+
+def _problem(case):
+    """
+    Synthetic mesh, materials, bcs and sources of a case.  The first
+    region holds a unit volumetric source (fixed source mode), the others
+    are fissile; in k mode all regions are fissile and sourceless.
+    """
+    from synthetic import slabMesh1D, squareMesh2D, SynthMaterial
+    if case['dim'] == 1:
+        mesh = slabMesh1D(case['size'], case['nRegions'], renumber=case['renumber'])
+        bcDict = {'left': 'vac', 'right': 'ref'}
+        nOrd = case['sN']
+    else:
+        from ordReader import sharedD2quadSet
+        mesh = squareMesh2D(case['size'], case['nRegions'], renumber=case['renumber'])
+        bcDict = {'left': 'vac', 'right': 'vac', 'bottom': 'ref', 'top': 'ref'}
+        nOrd = sharedD2quadSet(case['sN'], case['lOrder'], case['quadKind']).sNords
+    materials, srcDict = {}, {}
+    for i in range(case['nRegions']):
+        name = 'mat_' + str(i + 1)
+        fixedSrc = case['mode'] == 'fixed' and i == 0
+        materials[name] = SynthMaterial(case['nG'], case['lOrder'], fissile=not fixedSrc)
+        srcDict[name] = np.ones((case['nG'], nOrd)) if fixedSrc else None
+    return mesh, materials, bcDict, srcDict, nOrd
+
+
+def runCase(case):
+    """
+    Build and solve one problem, defaultCase updated with case.  Returns
+    the record of the run.
+    """
+    from spyTran import SnSolver
+    import scipy.sparse.linalg  # imported lazily by the solvers, not problem memory
+    case = dict(defaultCase, **case)
+    baseRSS = currentRSS()
+    if baseRSS is None:
+        # no /proc: growth of the peak instead
+        baseRSS = peakRSS()
+    tStart = time.time()
+    mesh, materials, bcDict, srcDict, nOrd = _problem(case)
+    slv = SnSolver(None, materials, bcDict, srcDict, nG=case['nG'], lOrder=case['lOrder'], sN=case['sN'],
+                   dim=case['dim'], space=case['space'], quadKind=case['quadKind'], mesh=mesh)
+    tSetup = time.time()
+    if case['mode'] == 'k':
+        slv.kSolve(residTol=case['residTol'])
+    else:
+        slv.trSolve(residTol=case['residTol'])
+    tEnd = time.time()
+    totals = slv.perf.totals()
+    return {'case': case,
+            'nElements': sum(len(region['elements']) for region in mesh.regions.itervalues()
+                             if region['type'] == 'interior'),
+            'nOrdinates': nOrd, 'nG': case['nG'], 'nMoments': case['lOrder'] + 1,
+            'wall': tEnd - tStart, 'setup': tSetup - tStart, 'solve': tEnd - tSetup,
+            'phases': phaseTotals(slv.perf),
+            'iterations': sum(stat[0] for path, stat in totals.iteritems() if path.endswith('/scatter')),
+            'outerIters': totals.get('outerIter', [0])[0],
+            'gmresIters': sum(value for (name, key), value in slv.perf.counters.iteritems()
+                              if name == 'gmresIters'),
+            'residual': float(slv.solver.norm), 'keff': float(slv.solver.keff),
+            'peakRSS': peakRSS(), 'memory': max(peakRSS() - baseRSS, 0)}
+
+
+def _worker(caseFile, outFile):
+    """
+    Entry point of the isolated runs, solver output goes to /dev/null.
+    """
+    with open(caseFile) as infile:
+        case = json.load(infile)
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        record = runCase(case)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    with open(outFile, 'w') as outfile:
+        json.dump(record, outfile)
+
+
+def runIsolated(case, python=None):
+    """
+    runCase in a fresh interpreter.  A failed run returns a record with
+    'error' set to the tail of its stderr.
+    """
+    tmpDir = tempfile.mkdtemp()
+    caseFile, outFile = os.path.join(tmpDir, 'case.json'), os.path.join(tmpDir, 'record.json')
+    try:
+        with open(caseFile, 'w') as outfile:
+            json.dump(case, outfile)
+        script = ("import sys; sys.path[:0] = [%r, %r]; from utils.scaling import _worker; _worker(%r, %r)" %
+                  (_spytranDir, os.path.dirname(_spytranDir), caseFile, outFile))
+        proc = subprocess.Popen([python or sys.executable, '-c', script], cwd=_spytranDir,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        out, err = proc.communicate()
+        if proc.returncode != 0 or not os.path.exists(outFile):
+            return {'case': dict(defaultCase, **case), 'error': err.strip().splitlines()[-1:] or ['failed']}
+        with open(outFile) as infile:
+            return json.load(infile)
+    finally:
+        for fname in (caseFile, outFile):
+            if os.path.exists(fname):
+                os.remove(fname)
+        os.rmdir(tmpDir)
+
+
+def fitExponent(x, y):
+    """
+    Least squares fit of y = c x^p in log-log.  Returns (p, c, r2), None
+    with less than two distinct positive points.
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    mask = (x > 0) & (y > 0)
+    x, y = np.log(x[mask]), np.log(y[mask])
+    if len(np.unique(x)) < 2:
+        return None
+    p, logc = np.polyfit(x, y, 1)
+    resid = y - (p * x + logc)
+    ssTot = np.sum((y - np.mean(y)) ** 2)
+    r2 = 1. - np.sum(resid ** 2) / ssTot if ssTot > 0 else 1.
+    return float(p), float(np.exp(logc)), float(r2)
+
+
+def variantLabel(variant):
+    return ','.join(str(k) + '=' + str(v) for k, v in sorted(variant.iteritems())) or 'base'
+
+
+class ScalingStudy(object):
+    """
+    Records of one parameter refined over values for each variant (dict
+    of case overrides, e.g. {'space': 'dg'} or {'renumber': 'rcm'}).
+    """
+    def __init__(self, param, values, base, variants, records=None):
+        if param not in scaleOf:
+            sys.exit("FATALITY: Cannot refine " + str(param) + ", choose from " + str(sorted(scaleOf)))
+        self.param, self.values = param, list(values)
+        self.base, self.variants = dict(base), [dict(v) for v in variants]
+        self.records = records if records is not None else {}  # label -> [record per value]
+
+    def cases(self):
+        """
+        [(variant label, case)] of every run of the study.
+        """
+        return [(variantLabel(variant), dict(self.base, **dict(variant, **{self.param: value})))
+                for variant in self.variants for value in self.values]
+
+    def run(self, isolate=True, repeat=1, show=True):
+        """
+        Run all cases, keeping the fastest successful of repeat runs of
+        each; a case is recorded as failed only when every repeat failed.
+        """
+        self.records = dict((variantLabel(variant), []) for variant in self.variants)
+        for label, case in self.cases():
+            best, failed = None, None
+            for i in range(repeat):
+                record = runIsolated(case) if isolate else runCase(case)
+                if 'error' in record:
+                    failed = record
+                elif best is None or record['wall'] < best['wall']:
+                    best = record
+            if best is None:
+                best = failed
+            self.records[label].append(best)
+            if show:
+                print("{0: <32} {1}={2: <8} ".format(label, self.param, case[self.param]) +
+                      ("FAILED: " + ' '.join(best['error']) if 'error' in best else
+                       "{0:.3e} s  {1} iterations".format(best['wall'], best['iterations'])))
+        return self
+
+    def fits(self):
+        """
+        {variant label: {quantity: (p, c, r2) or None}} for the phases and
+        the wall / setup / solve time, iterations, gmres iterations and
+        memory against x = scaleOf[param].
+        """
+        fits = {}
+        for label, records in self.records.iteritems():
+            records = [r for r in records if 'error' not in r]
+            x = [r[scaleOf[self.param]] for r in records]
+            fits[label] = dict((metric, fitExponent(x, [r[metric] for r in records])) for metric in _metrics)
+            for phase in phases:
+                fits[label][phase] = fitExponent(x, [r['phases'][phase] for r in records])
+        return fits
+
+    def report(self):
+        """
+        Per variant table of the runs and the fitted exponents side by side.
+        """
+        labels = [variantLabel(variant) for variant in self.variants]
+        x = scaleOf[self.param]
+        lines = ["scaling study: " + self.param + " (x = " + x + ")",
+                 "{0: <32} {1: >8} {2: >8} {3: >11} {4: >7} {5: >8} {6: >11}".format(
+                     "variant", self.param, x, "wall [s]", "iters", "gmres", "mem [MiB]")]
+        for label in labels:
+            for value, r in zip(self.values, self.records.get(label, [])):
+                if 'error' in r:
+                    lines.append("{0: <32} {1: >8} failed: {2}".format(label, value, ' '.join(r['error'])))
+                    continue
+                lines.append("{0: <32} {1: >8} {2: >8} {3: >11.3e} {4: >7} {5: >8} {6: >11.1f}".format(
+                    label, value, r[x], r['wall'], r['iterations'], r['gmresIters'], r['memory'] / 2. ** 20))
+        fits = self.fits()
+        lines.append("exponent p of quantity ~ x^p (r2)")
+        lines.append("{0: <16}".format("quantity") + ''.join(" {0: >24}".format(label[-24:]) for label in labels))
+        for metric in _metrics + phases:
+            row = [fits.get(label, {}).get(metric) for label in labels]
+            if all(fit is None for fit in row):
+                continue
+            lines.append("{0: <16}".format(metric) + ''.join(
+                " {0: >24}".format('-' if fit is None else "%.2f (%.2f)" % (fit[0], fit[2])) for fit in row))
+        return '\n'.join(lines)
+
+    def toDict(self):
+        return {'param': self.param, 'values': self.values, 'base': self.base, 'variants': self.variants,
+                'records': self.records,
+                'fits': dict((label, dict((k, None if v is None else list(v)) for k, v in fit.iteritems()))
+                             for label, fit in self.fits().iteritems())}
+
+    def writeJSON(self, fname):
+        with open(fname, 'w') as outfile:
+            json.dump(self.toDict(), outfile, indent=1, sort_keys=True)
+
+    @classmethod
+    def readJSON(cls, fname):
+        with open(fname) as infile:
+            data = json.load(infile)
+        return cls(data['param'], data['values'], data['base'], data['variants'], data['records'])
+
+
+def scalingStudy(param, values, variants=None, isolate=True, repeat=1, show=True, **base):
+    """
+    Refine param ('size', 'sN', 'nG' or 'lOrder') over values for each
+    variant, default fe vs dg.  Further kwargs set the other parameters
+    of the cases, see defaultCase.  Returns the ScalingStudy.
+    """
+    unknown = set(base) - set(defaultCase)
+    if unknown:
+        sys.exit("FATALITY: Unknown case parameters: " + str(sorted(unknown)))
+    if variants is None:
+        variants = [{'space': 'fe'}, {'space': 'dg'}]
+    study = ScalingStudy(param, values, base, variants)
+    study.run(isolate, repeat, show)
+    if show:
+        print(study.report())
+    return study
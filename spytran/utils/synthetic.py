@@ -0,0 +1,120 @@
+#!/usr/bin/python
+#
+# Synthetic problems of any size, no gmsh and no xs library needed.
+# Used by the benchmarks and scaling studies.
+#
+#   mesh = slabMesh1D(200, nRegions=2)
+#   materials = {'mat_1': SynthMaterial(10, 8), 'mat_2': SynthMaterial(10, 8, fissile=True)}
+#   bcDict = {'left': 'vac', 'right': 'ref'}
+#   slv = SnSolver(None, materials, bcDict, {}, nG=10, sN=4, space='fe', mesh=mesh)
+#
+# Meshes are gmshMesh instances as if read from gmsh: interior regions
+# 1..nRegions named 'mat_1', ... and boundary regions named after the side
+# ('left', 'right' and in 2D 'bottom', 'top').
+
+import numpy as np
+from gmshPreproc import gmshMesh
+
+
+def _newMesh(dim, nodes, elements, regions, renumber):
+    mesh = gmshMesh.__new__(gmshMesh)
+    mesh.dim, mesh.renumber = dim, renumber
+    mesh.geoFile, mesh.inpFileName = None, None
+    mesh.node_perm, mesh.dg_node_perm = None, None
+    mesh.nodes = nodes
+    mesh.elements = elements
+    mesh.regions = regions
+    mesh.regionInfo = dict((regionID, {'type': region['type'],
+                                       'info': region.get('material', region.get('bc'))})
+                           for regionID, region in regions.iteritems())
+    mesh.processRegions()
+    return mesh
+
+
+def slabMesh1D(nEle, nRegions=1, length=10., renumber=None):
+    """
+    Uniform 1D slab [0, length] of nEle elements in nRegions equal regions.
+    """
+    nodes = np.zeros((nEle + 1, 4))
+    nodes[:, 0] = np.arange(nEle + 1)
+    nodes[:, 1] = np.linspace(0., length, nEle + 1)
+    eleIDs = np.arange(nEle) + nEle + 1
+    elements = np.vstack((eleIDs, np.arange(nEle), np.arange(1, nEle + 1))).T
+    regions = {}
+    for i, eleRange in enumerate(np.array_split(eleIDs, nRegions)):
+        regions[i + 1] = {'elementIDs': eleRange, 'type': 'interior', 'material': 'mat_' + str(i + 1)}
+    # a 1D boundary region lists its node
+    regions[nRegions + 1] = {'elementIDs': np.array([0]), 'type': 'bc', 'bc': 'left'}
+    regions[nRegions + 2] = {'elementIDs': np.array([nEle]), 'type': 'bc', 'bc': 'right'}
+    return _newMesh(1, nodes, elements, regions, renumber)
+
+
+def squareMesh2D(n, nRegions=1, length=10., renumber=None):
+    """
+    Square [0, length]^2 of n x n nodes, 2 (n - 1)^2 triangles, split into
+    nRegions vertical stripes.
+    """
+    x, y = np.meshgrid(np.linspace(0., length, n), np.linspace(0., length, n))
+    nodes = np.zeros((n * n, 4))
+    nodes[:, 0], nodes[:, 1], nodes[:, 2] = np.arange(n * n), x.ravel(), y.ravel()
+    ids = np.arange(n * n).reshape(n, n)  # ids[row (y), col (x)]
+    a, b, c, d = ids[:-1, :-1].ravel(), ids[:-1, 1:].ravel(), ids[1:, :-1].ravel(), ids[1:, 1:].ravel()
+    tris = np.vstack((np.vstack((a, b, c)).T, np.vstack((d, c, b)).T))
+    sides = {'bottom': ids[0], 'top': ids[-1], 'left': ids[:, 0], 'right': ids[:, -1]}
+    lines = [np.vstack((side[:-1], side[1:], -np.ones(n - 1, dtype=int))).T for side in sides.itervalues()]
+    verts = np.vstack([tris] + lines)
+    # gmsh pads line elements with -100 (-101 after the 0 based shift)
+    verts[verts < 0] = -101
+    eleIDs = np.arange(len(verts)) + n * n
+    elements = np.hstack((eleIDs[:, None], verts))
+    regions = {}
+    stripe = np.minimum((np.mean(nodes[tris, 1], axis=1) / length * nRegions).astype(int), nRegions - 1)
+    for i in range(nRegions):
+        regions[i + 1] = {'elementIDs': eleIDs[:len(tris)][stripe == i], 'type': 'interior',
+                          'material': 'mat_' + str(i + 1)}
+    start = len(tris)
+    for j, name in enumerate(sides):
+        regions[nRegions + 1 + j] = {'elementIDs': eleIDs[start: start + n - 1], 'type': 'bc', 'bc': name}
+        start += n - 1
+    return _newMesh(2, nodes, elements, regions, renumber)
+
+
+class SynthMaterial(object):
+    """
+    Material with the macroProp of a mixedMat: nG groups, downscatter only,
+    legendre moments 0..legOrder, scattering ratio c.  Fissile materials
+    also have chi and Nnufission.
+    """
+    def __init__(self, nG, legOrder=8, c=0.7, fissile=False):
+        g = np.arange(nG)
+        self.macroProp = {'Ntotal': 1.0 + 0.1 * g}
+        # within group and the next three groups down
+        transfer = np.tril(np.triu(np.ones((nG, nG)), -3))
+        transfer *= c * self.macroProp['Ntotal'][None, :] / np.sum(transfer, axis=0)[None, :]
+        moments = 0.5 ** np.arange(legOrder + 1)
+        self.macroProp['Nskernel'] = moments[:, None, None] * transfer[None, :, :]
+        if fissile:
+            chi = np.exp(-g)
+            self.macroProp['chi'] = chi / np.sum(chi)
+            self.macroProp['Nnufission'] = 0.3 * self.macroProp['Ntotal']
+
+
+def writeXSFile(fname, nG, legOrder=8, fissile=True):
+    """
+    .xs file (materials/readXS.py format) of a SynthMaterial.
+    """
+    mat = SynthMaterial(nG, legOrder, fissile=fissile)
+    # NJOY group order: group 1 is the slowest
+    rev = slice(None, None, -1)
+    lines = ["TOTAL"] + ["%4d    %.4E" % (i + 1, v) for i, v in enumerate(mat.macroProp['Ntotal'][rev])] + [""]
+    if fissile:
+        for name, key in (("CHI", 'chi'), ("NUFISSION", 'Nnufission')):
+            lines += [name] + ["%4d    %.4E" % (i + 1, v) for i, v in enumerate(mat.macroProp[key][rev])] + [""]
+    lines.append("SKERNEL")
+    skernel = mat.macroProp['Nskernel'][:, rev, rev]
+    rows, cols = np.nonzero(np.any(skernel != 0, axis=0))
+    for row, col in sorted(zip(rows, cols), key=lambda rc: rc[::-1]):
+        # column (source group) first, see readXS.matrixSkernel
+        lines.append("%d\t%d\t" % (col + 1, row + 1) + "\t".join("%.4E" % v for v in skernel[:, row, col]))
+    with open(fname, 'w') as outfile:
+        outfile.write("\n".join(lines) + "\n\n")
@@ -0,0 +1,118 @@
+#!/usr/bin/python
+#
+# XDMF descriptor for FE / DG solution files.
+#
+# The solution file written by the solvers' writeData holds the heavy data:
+#   geometry     (nNodes, 3) flux field node coordinates
+#   connectivity (nCells, nVerts) flux field node ids of every cell
+#   scalarFlux   (nG, nNodes) or ordFluxes (nG, nOrd, nNodes)
+# The .xmf file only references these datasets, ParaView / VisIt read them
+# lazily from the solution file.  DG nodes are never shared between cells
+# so the DG fields stay discontinuous.
+#
+# Fields that are not stored in the solution file (the scalar flux of an
+# ordFluxes only file and the total flux) are computed one group at a time
+# and written to a small companion file next to the .xmf file.
+
+import os
+import sys
+import numpy as np
+import xml.etree.ElementTree as ET
+
+# xdmf topology type by number of cell vertices
+topologyTypes = {2: 'Polyline', 3: 'Triangle', 4: 'Quadrilateral'}
+
+
+def _dataItem(parent, h5File, path, shape, dtype):
+    item = ET.SubElement(parent, 'DataItem', Format='HDF', Dimensions=' '.join(str(n) for n in shape),
+                         NumberType='Int' if dtype.kind in 'iu' else 'Float', Precision=str(dtype.itemsize))
+    item.text = h5File + ':/' + path
+    return item
+
+
+def _groupSlab(parent, h5File, path, shape, dtype, row):
+    """
+    Row `row` of a (nG, nNodes) dataset as a hyperslab, no copy.
+    """
+    slab = ET.SubElement(parent, 'DataItem', ItemType='HyperSlab', Dimensions=str(shape[1]))
+    select = ET.SubElement(slab, 'DataItem', Dimensions='3 2', Format='XML')
+    select.text = '%d 0 1 1 1 %d' % (row, shape[1])
+    _dataItem(slab, h5File, path, shape, dtype)
+    return slab
+
+
+def _indent(elem, level=0):
+    pad = '\n' + '  ' * level
+    if len(elem):
+        if not elem.text or not elem.text.strip():
+            elem.text = pad + '  '
+        for child in elem:
+            _indent(child, level + 1)
+        if not child.tail or not child.tail.strip():
+            child.tail = pad
+    if level and (not elem.tail or not elem.tail.strip()):
+        elem.tail = pad
+
+
+def writeXdmf(h5File, xmfFile=None, name='flux'):
+    """
+    Write an xdmf descriptor for the solution file h5File.  One nodal
+    attribute per stored energy group ('grpN', N = 1, 2, ...) plus the
+    group sum 'tot'.  Returns the path of the .xmf file.
+    """
+    import h5py
+    if xmfFile is None:
+        xmfFile = os.path.splitext(h5File)[0] + '.xmf'
+    xmfDir = os.path.dirname(os.path.abspath(xmfFile))
+    solRef = os.path.relpath(os.path.abspath(h5File), xmfDir)
+    auxFile = os.path.splitext(xmfFile)[0] + '_fields.h5'
+    auxRef = os.path.basename(auxFile)
+    with h5py.File(h5File, 'r') as h5f:
+        if 'geometry' not in h5f or 'connectivity' not in h5f:
+            sys.exit("FATALITY: " + h5File + " holds no geometry / connectivity.  Rewrite it with writeData.")
+        geometry, cells = h5f['geometry'], h5f['connectivity']
+        nCells, nVerts = cells.shape
+        if nVerts not in topologyTypes:
+            sys.exit("FATALITY: No xdmf topology for cells with " + str(nVerts) + " vertices")
+        nNodes = geometry.shape[0]
+        groups = h5f['groups'][...] if 'groups' in h5f else None
+        totFlux = np.zeros(nNodes)
+        with h5py.File(auxFile, 'w') as aux:
+            if 'scalarFlux' in h5f:
+                flux, fluxRef = h5f['scalarFlux'], solRef
+                for i in range(flux.shape[0]):
+                    totFlux += flux[i]
+            else:
+                ordFlux = h5f['ordFluxes']
+                angNorm = 0.5 if nVerts == 2 else 0.25
+                scalarBasis = angNorm * h5f['weights'][...]
+                flux = aux.create_dataset('scalarFlux', (ordFlux.shape[0], nNodes), dtype=np.float64)
+                for i in range(ordFlux.shape[0]):
+                    flux[i] = np.dot(scalarBasis, ordFlux[i])
+                    totFlux += flux[i]
+                fluxRef = auxRef
+            tot = aux.create_dataset('totFlux', data=totFlux)
+            if groups is None:
+                groups = np.arange(flux.shape[0])
+            #
+            root = ET.Element('Xdmf', Version='3.0')
+            grid = ET.SubElement(ET.SubElement(root, 'Domain'), 'Grid', Name=name, GridType='Uniform')
+            topo = ET.SubElement(grid, 'Topology', TopologyType=topologyTypes[nVerts],
+                                 NumberOfElements=str(nCells))
+            if nVerts == 2:
+                topo.set('NodesPerElement', '2')
+            _dataItem(topo, solRef, 'connectivity', cells.shape, cells.dtype)
+            geo = ET.SubElement(grid, 'Geometry', GeometryType='XYZ')
+            _dataItem(geo, solRef, 'geometry', geometry.shape, geometry.dtype)
+            for i, g in enumerate(groups):
+                attr = ET.SubElement(grid, 'Attribute', Name='grp' + str(g + 1),
+                                     AttributeType='Scalar', Center='Node')
+                _groupSlab(attr, fluxRef, 'scalarFlux', flux.shape, flux.dtype, i)
+            attr = ET.SubElement(grid, 'Attribute', Name='tot', AttributeType='Scalar', Center='Node')
+            _dataItem(attr, auxRef, 'totFlux', tot.shape, tot.dtype)
+    _indent(root)
+    with open(xmfFile, 'w') as outfile:
+        outfile.write('<?xml version="1.0" ?>\n')
+        outfile.write(ET.tostring(root))
+        outfile.write('\n')
+    return xmfFile